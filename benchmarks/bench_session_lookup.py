@@ -0,0 +1,86 @@
+"""Micro-benchmark for SessionManager lookups under concurrent load.
+
+Simulates the Slack message firehose: many concurrent tasks calling
+``get_session`` for a mix of tracked and untracked threads while a
+trickle of writers creates new sessions. Reports lookups per second for
+the current lock-free read path and for a baseline that serializes every
+lookup through one global lock, as the manager used to.
+
+On one event loop there is no contention to remove: the old critical
+section never awaited, so the lock was always free when a lookup took
+it. Any gap between the two numbers is only the cost of entering and
+leaving an uncontended asyncio.Lock (from none to about 1.4x depending
+on the machine); lock-free reads do not otherwise raise throughput.
+
+Usage:
+    python benchmarks/bench_session_lookup.py [--tasks 200] [--lookups 500]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from bender.session_manager import SessionManager
+
+
+class GlobalLockSessionManager(SessionManager):
+    """Baseline: every lookup takes a single shared lock."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._global_lock = asyncio.Lock()
+
+    async def get_session(self, thread_ts: str) -> str | None:
+        # As before: nothing inside the section awaits, so the lock is never contended
+        async with self._global_lock:
+            return await super().get_session(thread_ts)
+
+
+async def _reader(manager: SessionManager, keys: list[str], lookups: int) -> None:
+    rng = random.Random()
+    for _ in range(lookups):
+        await manager.get_session(rng.choice(keys))
+        # Interleave with other tasks like independent Slack events would
+        await asyncio.sleep(0)
+
+
+async def _writer(manager: SessionManager, count: int) -> None:
+    for i in range(count):
+        await manager.create_session(f"new.{i}")
+        await asyncio.sleep(0)
+
+
+async def _run(manager: SessionManager, tasks: int, lookups: int, tracked: int) -> float:
+    for i in range(tracked):
+        await manager.create_session(f"tracked.{i}")
+    # Most firehose lookups miss: three untracked threads for every tracked one
+    keys = [f"tracked.{i}" for i in range(tracked)]
+    keys += [f"untracked.{i}" for i in range(tracked * 3)]
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_reader(manager, keys, lookups) for _ in range(tasks)),
+        _writer(manager, lookups),
+    )
+    elapsed = time.perf_counter() - start
+    return tasks * lookups / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200, help="concurrent reader tasks")
+    parser.add_argument("--lookups", type=int, default=500, help="lookups per task")
+    parser.add_argument("--tracked", type=int, default=1000, help="threads with a session")
+    args = parser.parse_args()
+
+    for name, manager in (
+        ("global lock", GlobalLockSessionManager()),
+        ("lock-free", SessionManager()),
+    ):
+        rate = asyncio.run(_run(manager, args.tasks, args.lookups, args.tracked))
+        print(f"{name:>12}: {rate:>12,.0f} lookups/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark for splitting large Claude Code outputs into Slack messages.
+
+Compares ``split_text`` against the previous implementation, which
+re-sliced the remaining text on every chunk and so copied it once per
+chunk (quadratic in the output size). Inputs mix prose and fenced code
+blocks, at 1 MB and 10 MB.
+
+Usage:
+    python benchmarks/bench_split_text.py [--sizes 1 10] [--skip-baseline]
+"""
+
+import argparse
+import time
+
+from bender.slack_utils import SLACK_MSG_LIMIT, split_text
+
+
+def _baseline_split_text(text: str, max_length: int = SLACK_MSG_LIMIT) -> list[str]:
+    """The previous remainder-slicing splitter, kept for comparison."""
+    chunks: list[str] = []
+    while len(text) > max_length:
+        split_pos = text.rfind("\n", 0, max_length)
+        if split_pos == -1:
+            split_pos = max_length
+        chunks.append(text[:split_pos])
+        text = text[split_pos:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def _make_input(size: int) -> str:
+    block = (
+        "Here is what I found in the deployment logs:\n\n"
+        "```python\n"
+        + "".join(f"    result_{i} = compute(value_{i}, retries={i % 5})\n" for i in range(40))
+        + "```\n\n"
+        + "The service restarted cleanly and all health checks are passing. " * 8
+        + "\n\n"
+    )
+    return (block * (size // len(block) + 1))[:size]
+
+
+def _time(fn, text: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    chunks = fn(text)
+    return time.perf_counter() - start, len(chunks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10], help="input sizes in MB")
+    parser.add_argument("--skip-baseline", action="store_true", help="only time split_text")
+    args = parser.parse_args()
+
+    for size_mb in args.sizes:
+        text = _make_input(size_mb * 1024 * 1024)
+        elapsed, count = _time(split_text, text)
+        line = f"{size_mb:>3} MB: split_text {elapsed * 1000:>9.1f} ms ({count} chunks)"
+        if not args.skip_baseline:
+            base_elapsed, _ = _time(_baseline_split_text, text)
+            line += f" | baseline {base_elapsed * 1000:>9.1f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,11 @@
 
 import asyncio
 import logging
+import sys
 
 from bender.app import create_app, start
 from bender.config import load_settings
+from bender.executor import run_executor
 
 logger = logging.getLogger(__name__)
 
@@ -22,5 +24,19 @@ async def main() -> None:
     await start(app, settings)
 
 
+async def executor_main() -> None:
+    """Start an executor process that runs invocations for a front process."""
+    settings = load_settings(executor=True)
+    logger.info(
+        "Bender executor starting (workspace=%s, socket=%s)",
+        settings.bender_workspace,
+        settings.bender_executor_socket,
+    )
+    await run_executor(settings)
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    if sys.argv[1:] == ["executor"]:
+        asyncio.run(executor_main())
+    else:
+        asyncio.run(main())
@@ -1,17 +1,34 @@
 """HTTP API endpoints — FastAPI routes for external triggers."""
 
+import asyncio
+import json
 import logging
+import math
+import uuid
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import aclosing
+from dataclasses import asdict
+from typing import Literal
 
-from fastapi import Depends, FastAPI, HTTPException, Security
+from fastapi import Depends, FastAPI, Header, HTTPException, Security
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from pydantic import BaseModel
+from pydantic import AnyHttpUrl, BaseModel, Field
 from slack_sdk.errors import SlackApiError
 from slack_sdk.web.async_client import AsyncWebClient
 
-from bender.claude_code import ClaudeCodeError, invoke_claude
+from bender.claude_code import ClaudeCodeError, ClaudeResponse, ResultEvent, TextDelta, ToolUse
 from bender.config import Settings
+from bender.executor import ExecutorClient
+from bender.idempotency import IdempotencyCache, IdempotencyKeyReusedError
+from bender.jobs import FAILED, SUCCEEDED, Job, JobTable, JobTableFullError
+from bender.metrics import ACTIVE_SESSIONS, REGISTRY
+from bender.scheduler import InvocationScheduler, SchedulerFullError
 from bender.session_manager import SessionManager
-from bender.slack_utils import SLACK_MSG_LIMIT, split_text
+from bender.slack_dispatcher import SlackBacklogFullError, SlackDispatcher
+from bender.slack_utils import TRUNCATED_NOTICE
+from bender.socket_pool import SocketModePool
+from bender.webhooks import WebhookSender
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +40,10 @@ class InvokeRequest(BaseModel):
 
     channel: str
     message: str
+    # "async" returns 202 with a job_id right away; poll GET /api/jobs/{job_id}
+    mode: Literal["sync", "async"] = "sync"
+    # If set, the finished job is POSTed here (implies async mode); http(s) only
+    callback_url: AnyHttpUrl | None = None
 
 
 class InvokeResponse(BaseModel):
@@ -31,6 +52,68 @@ class InvokeResponse(BaseModel):
     thread_ts: str
     session_id: str
     response: str
+    truncated: bool = False
+
+
+class StreamInvokeRequest(BaseModel):
+    """Request body for the /api/invoke/stream endpoint."""
+
+    channel: str
+    message: str
+
+
+class BatchItem(BaseModel):
+    """One invocation within a batch."""
+
+    # May be omitted when the batch sets parent_channel
+    channel: str | None = None
+    message: str
+
+
+class BatchInvokeRequest(BaseModel):
+    """Request body for the /api/invoke/batch endpoint."""
+
+    items: list[BatchItem] = Field(min_length=1)
+    mode: Literal["sync", "async"] = "sync"
+    # Post every item as a reply under one parent message in this channel
+    parent_channel: str | None = None
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one batch item (or its job ID, in async mode)."""
+
+    index: int
+    status: str
+    result: InvokeResponse | None = None
+    error: str | None = None
+    error_status: int | None = None
+    job_id: str | None = None
+
+
+class BatchInvokeResponse(BaseModel):
+    """Response body for the /api/invoke/batch endpoint."""
+
+    parent_ts: str | None = None
+    items: list[BatchItemResult]
+
+
+class JobAccepted(BaseModel):
+    """Response body for an /api/invoke call accepted in async mode."""
+
+    job_id: str
+    status: str
+
+
+class JobResponse(BaseModel):
+    """Response body for the /api/jobs/{job_id} endpoint."""
+
+    job_id: str
+    status: str
+    created_at: float
+    finished_at: float | None = None
+    result: InvokeResponse | None = None
+    error: str | None = None
+    error_status: int | None = None
 
 
 def create_api(
@@ -38,8 +121,26 @@ def create_api(
     slack_client: AsyncWebClient,
     settings: Settings,
     sessions: SessionManager,
+    scheduler: InvocationScheduler,
+    dispatcher: SlackDispatcher | None = None,
+    jobs: JobTable | None = None,
+    webhooks: WebhookSender | None = None,
+    idempotency: IdempotencyCache | None = None,
+    socket_pool: SocketModePool | None = None,
+    executors: ExecutorClient | None = None,
 ) -> None:
-    """Register API routes on the FastAPI app."""
+    """Register API routes on the FastAPI app.
+
+    ``socket_pool`` holds the Slack Socket Mode connections whose state
+    ``/ready`` reports; without it (HTTP events mode) the Slack check is
+    skipped. With ``executors``, ``/metrics`` adds in the Claude Code
+    process metrics those executors record.
+    """
+    dispatcher = dispatcher or SlackDispatcher(slack_client)
+    jobs = jobs if jobs is not None else JobTable()
+    webhooks = webhooks or WebhookSender()
+    idempotency = idempotency if idempotency is not None else IdempotencyCache()
+    ACTIVE_SESSIONS.set_function(lambda: len(sessions))
 
     async def verify_api_key(
         credentials: HTTPAuthorizationCredentials = Security(security),
@@ -58,63 +159,429 @@ def create_api(
         """Health check endpoint."""
         return {"status": "ok"}
 
-    @fastapi_app.post(
-        "/api/invoke",
-        response_model=InvokeResponse,
-        dependencies=[Depends(verify_api_key)],
-    )
-    async def invoke(request: InvokeRequest) -> InvokeResponse:
-        """Invoke Claude Code from an external trigger.
+    @fastapi_app.get("/ready")
+    async def readiness_check() -> JSONResponse:
+        """Readiness probe: 503 while saturated, disconnected or unable to persist.
 
-        Posts a message in the specified channel, creates a thread,
-        invokes Claude Code, and posts the response in the thread.
+        Unlike ``/health`` this tells a load balancer or orchestrator to stop
+        routing here until the replica has capacity again.
         """
-        logger.info("API invoke: channel=%s", request.channel)
+        problems = []
+
+        slack = None
+        if socket_pool is not None:
+            connections = await socket_pool.status()
+            connected = sum(connection["connected"] for connection in connections)
+            slack = {"mode": "socket", "connected": connected, "connections": connections}
+            if not connected:
+                problems.append("No Slack Socket Mode connection is up")
+
+        queue_limit = math.ceil(scheduler.max_queue * settings.bender_ready_queue_threshold)
+        if scheduler.in_flight >= scheduler.max_concurrency and scheduler.queued >= queue_limit:
+            problems.append(f"Invocation queue is saturated ({scheduler.queued} waiting)")
+
+        store = sessions.store_status()
+        if not store["ok"]:
+            problems.append("Session store is failing to persist")
+
+        body = {
+            "status": "not_ready" if problems else "ready",
+            "problems": problems,
+            "slack": slack,
+            "invocations": {
+                "in_flight": scheduler.in_flight,
+                "queued": scheduler.queued,
+                "max_concurrency": scheduler.max_concurrency,
+                "max_queue": scheduler.max_queue,
+            },
+            "session_store": store,
+        }
+        return JSONResponse(status_code=503 if problems else 200, content=body)
+
+    @fastapi_app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics() -> PlainTextResponse:
+        """Metrics in the Prometheus text exposition format."""
+        remote = await executors.metrics() if executors is not None else []
+        return PlainTextResponse(
+            REGISTRY.render(remote), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
 
-        # Post the initial message to create a thread
+    async def post_trigger(channel: str, text: str) -> str:
+        """Post the message that starts a thread and return its ts."""
         try:
-            post_result = await slack_client.chat_postMessage(
-                channel=request.channel,
-                text=f"External trigger: {request.message}",
-            )
+            post_result = await dispatcher.chat_postMessage(channel=channel, text=text)
+        except SlackBacklogFullError as exc:
+            logger.warning("Rejecting API invoke: %s", exc)
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
         except SlackApiError as exc:
             logger.error("Failed to post to Slack: %s", exc)
             raise HTTPException(
                 status_code=502, detail="Failed to post message to Slack"
             ) from exc
+        return post_result["ts"]
 
-        thread_ts = post_result["ts"]
-        session_id = await sessions.create_session(thread_ts)
+    def admit(kind: str = "invoke") -> None:
+        """Turn the request away with 429 if the invocation queue is full."""
+        try:
+            scheduler.admit()
+        except SchedulerFullError as exc:
+            logger.warning("Rejecting API %s: %s", kind, exc)
+            raise _too_busy(exc) from exc
 
-        # Invoke Claude Code
+    async def answer_in_thread(
+        channel: str,
+        thread_ts: str,
+        prompt: str,
+        session_id: str,
+        heading: str = "",
+    ) -> ClaudeResponse:
+        """Run Claude Code and post its response (or the failure) in the thread."""
         try:
-            response = await invoke_claude(
-                prompt=request.message,
-                workspace=settings.bender_workspace,
-                session_id=session_id,
+            response = await scheduler.run(
+                prompt=prompt, session_id=session_id, thread_ts=thread_ts
             )
+        except SchedulerFullError as exc:
+            logger.warning("Rejecting API invoke: %s", exc)
+            await dispatcher.chat_postMessage(
+                channel=channel,
+                thread_ts=thread_ts,
+                text=f"{heading}Bender is at capacity right now, please try again later.",
+            )
+            raise _too_busy(exc) from exc
         except ClaudeCodeError as exc:
             logger.error("Claude Code invocation failed: %s", exc)
-            await slack_client.chat_postMessage(
-                channel=request.channel,
+            await dispatcher.chat_postMessage(
+                channel=channel,
                 thread_ts=thread_ts,
-                text="An error occurred while processing this request.",
+                text=f"{heading}An error occurred while processing this request.",
             )
             raise HTTPException(
                 status_code=500, detail="Claude Code invocation failed"
             ) from exc
 
-        # Post the response in the thread, splitting long messages
-        chunks = split_text(response.result, SLACK_MSG_LIMIT)
-        for chunk in chunks:
-            await slack_client.chat_postMessage(
-                channel=request.channel,
-                thread_ts=thread_ts,
-                text=chunk,
-            )
+        await post_response(channel, thread_ts, response, heading)
+        return response
+
+    async def post_response(
+        channel: str, thread_ts: str, response: ClaudeResponse, heading: str = ""
+    ) -> None:
+        """Post a response in the thread: split into messages, or as a snippet if very long."""
+        text = heading + response.result
+        if response.truncated:
+            text += TRUNCATED_NOTICE
+        await dispatcher.post_text(
+            channel,
+            thread_ts,
+            text,
+            snippet_threshold=settings.bender_snippet_threshold,
+        )
+
+    async def adopt_session(thread_ts: str, session_id: str, response: ClaudeResponse) -> None:
+        """Record the turn, switching to the session ID the CLI reported if it differs."""
+        if response.session_id and response.session_id != session_id:
+            # The CLI (e.g. a warm pool worker) picked its own session ID
+            await sessions.set_session(thread_ts, response.session_id)
+        await sessions.record_turn(thread_ts)
+
+    async def run_invoke(request: InvokeRequest) -> InvokeResponse:
+        """Post the trigger, run Claude Code and post the response in the thread."""
+        thread_ts = await post_trigger(request.channel, f"External trigger: {request.message}")
+        session_id = await sessions.create_session(thread_ts)
+
+        response = await answer_in_thread(request.channel, thread_ts, request.message, session_id)
+        await adopt_session(thread_ts, session_id, response)
 
         return InvokeResponse(
             thread_ts=thread_ts,
             session_id=response.session_id,
             response=response.result,
+            truncated=response.truncated,
+        )
+
+    def check_callback(callback_url: AnyHttpUrl | None) -> None:
+        """Reject a callback URL whose host is not in BENDER_WEBHOOK_ALLOWED_HOSTS."""
+        allowed = settings.webhook_allowed_hosts()
+        if callback_url is None or not allowed or (callback_url.host or "").lower() in allowed:
+            return
+        raise HTTPException(
+            status_code=422, detail=f"callback_url host {callback_url.host!r} is not allowed"
+        )
+
+    async def run_job(
+        job: Job,
+        invocation: Awaitable[InvokeResponse],
+        callback_url: str | None = None,
+    ) -> None:
+        """Await an async-mode invocation, record its outcome and fire the webhook."""
+        try:
+            response = await invocation
+        except HTTPException as exc:
+            job.fail(str(exc.detail), exc.status_code)
+        except Exception as exc:
+            logger.exception("API job %s failed", job.job_id)
+            job.fail(str(exc))
+        else:
+            job.succeed(response.model_dump())
+        if callback_url is not None:
+            webhooks.submit(callback_url, _job_response(job).model_dump())
+
+    @fastapi_app.post(
+        "/api/invoke",
+        response_model=InvokeResponse,
+        responses={202: {"model": JobAccepted}},
+        dependencies=[Depends(verify_api_key)],
+    )
+    async def invoke(
+        request: InvokeRequest,
+        idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    ) -> InvokeResponse | JSONResponse:
+        """Invoke Claude Code from an external trigger.
+
+        Posts a message in the specified channel, creates a thread,
+        invokes Claude Code, and posts the response in the thread.
+        In async mode, or when a ``callback_url`` is given, this happens in
+        the background and the call returns 202 with a job ID; the finished
+        job can be polled or is POSTed to the callback URL.
+
+        With an ``Idempotency-Key`` header, repeats of the request attach to
+        the run already in flight, or get its cached response once it has
+        finished, instead of starting another one.
+        """
+        logger.info("API invoke: channel=%s mode=%s", request.channel, request.mode)
+        check_callback(request.callback_url)
+        if idempotency_key is None:
+            return await start_invoke(request)
+
+        async def work() -> tuple[int, dict]:
+            response = await start_invoke(request)
+            if isinstance(response, JSONResponse):
+                return response.status_code, json.loads(response.body)
+            return 200, response.model_dump()
+
+        try:
+            (status_code, content), replayed = await idempotency.run(
+                idempotency_key, request.model_dump_json(), work
+            )
+        except IdempotencyKeyReusedError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+        headers = {"Idempotent-Replayed": "true"} if replayed else None
+        return JSONResponse(status_code=status_code, content=content, headers=headers)
+
+    async def start_invoke(request: InvokeRequest) -> InvokeResponse | JSONResponse:
+        """Run a sync invocation, or start an async job and return 202."""
+        admit()
+        if request.mode == "sync" and request.callback_url is None:
+            return await run_invoke(request)
+
+        try:
+            job = jobs.create()
+        except JobTableFullError as exc:
+            logger.warning("Rejecting API invoke: %s", exc)
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        callback_url = str(request.callback_url) if request.callback_url is not None else None
+        job.task = asyncio.create_task(
+            run_job(job, run_invoke(request), callback_url=callback_url)
+        )
+        return JSONResponse(
+            status_code=202,
+            content=JobAccepted(job_id=job.job_id, status=job.status).model_dump(),
         )
+
+    @fastapi_app.post(
+        "/api/invoke/stream",
+        response_class=StreamingResponse,
+        dependencies=[Depends(verify_api_key)],
+    )
+    async def invoke_stream(request: StreamInvokeRequest) -> StreamingResponse:
+        """Invoke Claude Code and stream its progress as Server-Sent Events.
+
+        Emits ``started`` (thread_ts, session_id) as soon as the thread
+        exists, then ``text`` and ``tool_use`` events as the CLI produces
+        them, and finally ``result`` (the InvokeResponse fields) or
+        ``error``. The response is also posted in the Slack thread.
+        """
+        logger.info("API stream invoke: channel=%s", request.channel)
+        admit("stream invoke")
+        thread_ts = await post_trigger(request.channel, f"External trigger: {request.message}")
+        session_id = await sessions.create_session(thread_ts)
+
+        async def events() -> AsyncIterator[str]:
+            yield _sse("started", {"thread_ts": thread_ts, "session_id": session_id})
+            stream = scheduler.stream(
+                prompt=request.message, session_id=session_id, thread_ts=thread_ts
+            )
+            try:
+                async with aclosing(stream):
+                    async for event in stream:
+                        if isinstance(event, TextDelta):
+                            yield _sse("text", {"text": event.text})
+                        elif isinstance(event, ToolUse):
+                            yield _sse("tool_use", asdict(event))
+                        elif isinstance(event, ResultEvent):
+                            response = event.response
+                            await adopt_session(thread_ts, session_id, response)
+                            await post_response(request.channel, thread_ts, response)
+                            result = InvokeResponse(
+                                thread_ts=thread_ts,
+                                session_id=response.session_id,
+                                response=response.result,
+                                truncated=response.truncated,
+                            )
+                            yield _sse("result", result.model_dump())
+                            return
+                raise ClaudeCodeError("Claude Code finished without a result")
+            except ClaudeCodeError as exc:
+                logger.error("Claude Code invocation failed: %s", exc)
+                full = isinstance(exc, SchedulerFullError)
+                await dispatcher.chat_postMessage(
+                    channel=request.channel,
+                    thread_ts=thread_ts,
+                    text=(
+                        "Bender is at capacity right now, please try again later."
+                        if full
+                        else "An error occurred while processing this request."
+                    ),
+                )
+                yield _sse("error", {"error": str(exc), "status": 429 if full else 500})
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @fastapi_app.post(
+        "/api/invoke/batch",
+        response_model=BatchInvokeResponse,
+        responses={202: {"model": BatchInvokeResponse}},
+        dependencies=[Depends(verify_api_key)],
+    )
+    async def invoke_batch(request: BatchInvokeRequest) -> BatchInvokeResponse | JSONResponse:
+        """Invoke Claude Code for many items, at most BENDER_BATCH_CONCURRENCY at a time.
+
+        Each item gets its own thread, unless ``parent_channel`` is set: then
+        one parent message is posted and every item is answered as a reply
+        under it, in a fresh session. Sync mode returns per-item results;
+        async mode returns 202 with a job ID per item.
+        """
+        items = request.items
+        if len(items) > settings.bender_batch_max_items:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Too many items ({len(items)} > {settings.bender_batch_max_items})",
+            )
+        if request.parent_channel is None and any(item.channel is None for item in items):
+            raise HTTPException(
+                status_code=422, detail="Each item needs a channel unless parent_channel is set"
+            )
+        logger.info(
+            "API batch invoke: items=%d mode=%s parent_channel=%s",
+            len(items),
+            request.mode,
+            request.parent_channel,
+        )
+        admit("batch invoke")
+
+        parent_ts = None
+        if request.parent_channel is not None:
+            parent_ts = await post_trigger(
+                request.parent_channel, f"External batch trigger: {len(items)} requests"
+            )
+        slots = asyncio.Semaphore(settings.bender_batch_concurrency)
+
+        async def run_item(index: int, item: BatchItem) -> InvokeResponse:
+            async with slots:
+                if parent_ts is None:
+                    return await run_invoke(
+                        InvokeRequest(channel=item.channel, message=item.message)
+                    )
+                heading = f"*[{index + 1}/{len(items)}]* {_preview(item.message)}\n\n"
+                response = await answer_in_thread(
+                    request.parent_channel, parent_ts, item.message, str(uuid.uuid4()), heading
+                )
+                return InvokeResponse(
+                    thread_ts=parent_ts,
+                    session_id=response.session_id,
+                    response=response.result,
+                    truncated=response.truncated,
+                )
+
+        if request.mode == "async":
+            try:
+                batch_jobs = [jobs.create() for _ in items]
+            except JobTableFullError as exc:
+                logger.warning("Rejecting API batch invoke: %s", exc)
+                raise HTTPException(status_code=503, detail=str(exc)) from exc
+            for index, (job, item) in enumerate(zip(batch_jobs, items)):
+                job.task = asyncio.create_task(run_job(job, run_item(index, item)))
+            body = BatchInvokeResponse(
+                parent_ts=parent_ts,
+                items=[
+                    BatchItemResult(index=index, status=job.status, job_id=job.job_id)
+                    for index, job in enumerate(batch_jobs)
+                ],
+            )
+            return JSONResponse(status_code=202, content=body.model_dump())
+
+        async def run_sync_item(index: int, item: BatchItem) -> BatchItemResult:
+            try:
+                result = await run_item(index, item)
+            except HTTPException as exc:
+                return BatchItemResult(
+                    index=index,
+                    status=FAILED,
+                    error=str(exc.detail),
+                    error_status=exc.status_code,
+                )
+            except Exception as exc:
+                logger.exception("API batch item %d failed", index)
+                return BatchItemResult(index=index, status=FAILED, error=str(exc), error_status=500)
+            return BatchItemResult(index=index, status=SUCCEEDED, result=result)
+
+        results = await asyncio.gather(
+            *(run_sync_item(index, item) for index, item in enumerate(items))
+        )
+        return BatchInvokeResponse(parent_ts=parent_ts, items=list(results))
+
+    @fastapi_app.get(
+        "/api/jobs/{job_id}",
+        response_model=JobResponse,
+        dependencies=[Depends(verify_api_key)],
+    )
+    async def get_job(job_id: str) -> JobResponse:
+        """Report the status, and once finished the result, of an async invocation."""
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found or expired")
+        return _job_response(job)
+
+
+def _job_response(job: Job) -> JobResponse:
+    """Public view of a job, as returned by polling and sent to webhooks."""
+    return JobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        result=job.result,
+        error=job.error,
+        error_status=job.error_status,
+    )
+
+
+def _too_busy(exc: SchedulerFullError) -> HTTPException:
+    """429 telling the caller when the queue is likely to have room again."""
+    return HTTPException(
+        status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+def _preview(message: str, limit: int = 200) -> str:
+    """Single-line, length-capped version of a prompt for use as a heading."""
+    line = " ".join(message.split())
+    return line if len(line) <= limit else line[: limit - 3] + "..."
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -4,14 +4,26 @@ import asyncio
 import logging
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from slack_bolt.adapter.fastapi.async_handler import AsyncSlackRequestHandler
 from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
 from slack_bolt.async_app import AsyncApp
 
 from bender.api import create_api
 from bender.config import Settings
+from bender.event_dedup import EventDeduplicator
+from bender.executor import ExecutorClient, local_backend
+from bender.idempotency import IdempotencyCache
+from bender.jobs import JobTable
+from bender.scheduler import InvocationScheduler
 from bender.session_manager import SessionManager
+from bender.session_store import SessionStore, SQLiteSessionStore
+from bender.slack_dispatcher import SlackDispatcher
 from bender.slack_handler import register_handlers
+from bender.socket_pool import SocketModePool
+from bender.webhooks import WebhookSender
+from bender.worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
@@ -23,39 +35,155 @@ class BenderApp:
         self,
         fastapi_app: FastAPI,
         bolt_app: AsyncApp,
-        socket_handler: AsyncSocketModeHandler,
+        socket_pool: SocketModePool | None,
         settings: Settings,
+        sessions: SessionManager | None = None,
+        worker_pool: WorkerPool | None = None,
+        webhooks: WebhookSender | None = None,
+        executors: ExecutorClient | None = None,
     ) -> None:
         self.fastapi_app = fastapi_app
         self.bolt_app = bolt_app
-        self.socket_handler = socket_handler
+        self.socket_pool = socket_pool
         self.settings = settings
+        self.sessions = sessions if sessions is not None else SessionManager()
+        self.worker_pool = worker_pool
+        self.webhooks = webhooks
+        self.executors = executors
 
 
 def create_app(settings: Settings) -> BenderApp:
     """Create and configure the Bender application."""
-    sessions = SessionManager()
+    store = SessionStore()
+    if settings.bender_session_db is not None:
+        store = SQLiteSessionStore(
+            settings.bender_session_db,
+            flush_interval=settings.bender_session_flush_interval,
+        )
+    sessions = SessionManager(
+        store,
+        max_entries=settings.bender_session_max_entries,
+        idle_ttl=settings.bender_session_idle_ttl,
+        sweep_interval=settings.bender_session_sweep_interval,
+        read_through=settings.bender_session_read_through,
+        miss_ttl=settings.bender_session_miss_ttl,
+    )
+
+    executors = None
+    executor_paths = settings.executor_socket_paths()
+    if executor_paths:
+        # Claude Code runs in executor processes; this one only does Slack and HTTP
+        executors = ExecutorClient(
+            executor_paths, sessions, retry_interval=settings.bender_executor_retry_interval
+        )
+        stream_fn, worker_pool = executors.stream, None
+    else:
+        stream_fn, worker_pool = local_backend(settings)
+        if settings.bender_session_read_through:
+            logger.warning(
+                "BENDER_SESSION_READ_THROUGH without BENDER_EXECUTOR_SOCKETS: a reply picked"
+                " up by another replica resumes without the transcript unless the replicas"
+                " share ~/.claude"
+            )
+
+    scheduler = InvocationScheduler(
+        workspace=settings.bender_workspace,
+        max_concurrency=settings.invocation_slots(),
+        max_queue=settings.bender_max_queue,
+        stream_fn=stream_fn,
+    )
 
-    # Slack bolt app (Socket Mode)
-    bolt_app = AsyncApp(token=settings.slack_bot_token)
-    register_handlers(bolt_app, settings, sessions)
-    socket_handler = AsyncSocketModeHandler(bolt_app, settings.slack_app_token)
+    # Slack bolt app; signatures are only checked on HTTP-delivered events
+    if settings.bender_slack_mode == "http":
+        bolt_app = AsyncApp(
+            token=settings.slack_bot_token, signing_secret=settings.slack_signing_secret
+        )
+    else:
+        bolt_app = AsyncApp(token=settings.slack_bot_token)
+    # One outbound queue shared by Slack handlers and the HTTP API
+    dispatcher = SlackDispatcher(
+        bolt_app.client,
+        rate=settings.bender_slack_channel_rate,
+        burst=settings.bender_slack_channel_burst,
+        max_backlog=settings.bender_slack_max_backlog,
+    )
+    dedup = EventDeduplicator(
+        ttl=settings.bender_event_dedup_ttl,
+        max_entries=settings.bender_event_dedup_max_entries,
+    )
+    register_handlers(bolt_app, settings, sessions, scheduler, dedup, dispatcher)
 
     # FastAPI app
     fastapi_app = FastAPI(title="Bender API", version="0.1.0")
-    create_api(fastapi_app, bolt_app.client, settings, sessions)
+
+    socket_pool = None
+    if settings.bender_slack_mode == "http":
+        mount_slack_events(fastapi_app, bolt_app, settings.bender_slack_events_path)
+    else:
+        socket_pool = SocketModePool(
+            [
+                AsyncSocketModeHandler(bolt_app, settings.slack_app_token)
+                for _ in range(settings.bender_slack_socket_connections)
+            ]
+        )
+    jobs = JobTable(max_jobs=settings.bender_max_jobs, ttl=settings.bender_job_ttl)
+    webhooks = WebhookSender(
+        concurrency=settings.bender_webhook_concurrency,
+        max_retries=settings.bender_webhook_max_retries,
+        timeout=settings.bender_webhook_timeout,
+        close_timeout=settings.bender_webhook_close_timeout,
+    )
+    idempotency = IdempotencyCache(
+        ttl=settings.bender_idempotency_ttl,
+        max_entries=settings.bender_idempotency_max_entries,
+    )
+    create_api(
+        fastapi_app,
+        bolt_app.client,
+        settings,
+        sessions,
+        scheduler,
+        dispatcher,
+        jobs,
+        webhooks,
+        idempotency,
+        socket_pool,
+        executors,
+    )
 
     return BenderApp(
         fastapi_app=fastapi_app,
         bolt_app=bolt_app,
-        socket_handler=socket_handler,
+        socket_pool=socket_pool,
         settings=settings,
+        sessions=sessions,
+        worker_pool=worker_pool,
+        webhooks=webhooks,
+        executors=executors,
     )
 
 
+def mount_slack_events(fastapi_app: FastAPI, bolt_app: AsyncApp, path: str) -> None:
+    """Receive Slack events over HTTP on the FastAPI app.
+
+    bolt verifies each request's signature with the app's signing secret
+    and acknowledges it before the listeners run, so any replica behind a
+    load balancer can take any event.
+    """
+    handler = AsyncSlackRequestHandler(bolt_app)
+
+    @fastapi_app.post(path, include_in_schema=False)
+    async def slack_events(request: Request) -> Response:
+        """Slack Events API and interactivity request URL."""
+        return await handler.handle(request)
+
+
 async def start(app: BenderApp, settings: Settings) -> None:
-    """Start both Slack Socket Mode and FastAPI server concurrently."""
-    logger.info("Starting Slack Socket Mode handler")
+    """Start the Slack Socket Mode connections (if any) and FastAPI server concurrently."""
+    if app.socket_pool is not None:
+        logger.info("Starting Slack Socket Mode handlers")
+    else:
+        logger.info("Receiving Slack events over HTTP at %s", settings.bender_slack_events_path)
     logger.info("Starting FastAPI server on port %d", settings.bender_api_port)
 
     uvicorn_config = uvicorn.Config(
@@ -66,11 +194,26 @@ async def start(app: BenderApp, settings: Settings) -> None:
     )
     uvicorn_server = uvicorn.Server(uvicorn_config)
 
-    results = await asyncio.gather(
-        app.socket_handler.start_async(),
-        uvicorn_server.serve(),
-        return_exceptions=True,
-    )
+    await app.sessions.start()
+    if app.worker_pool is not None:
+        await app.worker_pool.start()
+    if app.executors is not None:
+        await app.executors.start()
+
+    try:
+        components = [uvicorn_server.serve()]
+        if app.socket_pool is not None:
+            components.append(app.socket_pool.start_async())
+        results = await asyncio.gather(*components, return_exceptions=True)
+    finally:
+        if app.worker_pool is not None:
+            await app.worker_pool.stop()
+        if app.executors is not None:
+            await app.executors.close()
+        if app.webhooks is not None:
+            await app.webhooks.close()
+        await app.sessions.close()
+
     for result in results:
         if isinstance(result, Exception):
             logger.error("Component failed: %s", result)
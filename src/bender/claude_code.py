@@ -3,14 +3,27 @@
 import asyncio
 import json
 import logging
-from dataclasses import dataclass
+import os
+import tempfile
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from bender.metrics import NONZERO_EXITS, PROCESSES_RUNNING, SPAWN_SECONDS, TIMEOUTS
+
 logger = logging.getLogger(__name__)
 
 # Default timeout for Claude Code invocations (5 minutes)
 DEFAULT_TIMEOUT_SECONDS = 300
 
+# Default in-memory caps for CLI output; anything beyond spills to a temp file
+DEFAULT_MAX_OUTPUT_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_STDERR_BYTES = 64 * 1024
+
+# Chunk size used when draining stderr
+_READ_CHUNK_BYTES = 64 * 1024
+
 
 @dataclass
 class ClaudeResponse:
@@ -19,92 +32,422 @@ class ClaudeResponse:
     result: str
     session_id: str
     is_error: bool = False
+    # Set when the output exceeded the in-memory cap and `result` is only its head
+    truncated: bool = False
+    output_bytes: int = 0
+
+
+@dataclass
+class TextDelta:
+    """Assistant text emitted while Claude Code is still running."""
+
+    text: str
+
+
+@dataclass
+class ToolUse:
+    """A tool call made by the assistant during the run."""
+
+    name: str
+    input: dict = field(default_factory=dict)
+    tool_use_id: str = ""
+
+
+@dataclass
+class ResultEvent:
+    """Final event of a run, carrying the complete response."""
+
+    response: ClaudeResponse
+
+
+ClaudeEvent = TextDelta | ToolUse | ResultEvent
 
 
 class ClaudeCodeError(Exception):
     """Raised when Claude Code CLI invocation fails."""
 
 
-async def invoke_claude(
+class OutputCapture:
+    """Byte sink that keeps the first ``limit`` bytes in memory.
+
+    Once more than ``limit`` bytes have been written, everything written so
+    far and from then on goes to a temp file instead, so the full output is
+    on disk rather than in memory while the run lasts. ``close()`` deletes
+    the file.
+    """
+
+    def __init__(self, limit: int, name: str) -> None:
+        self.limit = limit
+        self.name = name
+        self.total = 0
+        self.spill_path: Path | None = None
+        self._head = bytearray()
+        self._file = None
+
+    @property
+    def truncated(self) -> bool:
+        return self._file is not None
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        if self._file is None and len(self._head) + len(data) <= self.limit:
+            self._head += data
+            return
+        if self._file is None:
+            fd, path = tempfile.mkstemp(prefix=f"bender-{self.name}-", suffix=".log")
+            self._file = os.fdopen(fd, "wb")
+            self.spill_path = Path(path)
+            self._file.write(self._head)
+            logger.warning(
+                "Claude Code %s reached %d bytes, spilling to %s", self.name, self.total, path
+            )
+        self._file.write(data)
+        # Keep the in-memory head topped up to the limit
+        if len(self._head) < self.limit:
+            self._head += data[: self.limit - len(self._head)]
+
+    def head(self) -> bytes:
+        return bytes(self._head)
+
+    def close(self) -> None:
+        """Close and delete the spill file."""
+        if self._file is None:
+            return
+        self._file.close()
+        if self.spill_path is not None:
+            self.spill_path.unlink(missing_ok=True)
+            self.spill_path = None
+
+
+class StreamDecoder:
+    """Turns raw stream-json stdout into events without unbounded buffering.
+
+    Lines up to ``max_output_bytes`` are parsed. Longer lines are never
+    materialized: their bytes spill to a temp file, and if the oversized line
+    was the final result, a truncated response is built from the assistant
+    text seen so far.
+    """
+
+    def __init__(self, session_id: str, max_output_bytes: int) -> None:
+        self.session_id = session_id
+        self.output_bytes = 0
+        self._texts = OutputCapture(max_output_bytes, "text")
+        self._raw = OutputCapture(max_output_bytes, "stdout")
+        self._overflow = OutputCapture(0, "result")
+        self._in_oversized_line = False
+        self._oversized_is_result = False
+
+    def feed(self, chunk: bytes, complete: bool) -> list[ClaudeEvent]:
+        """Decode a line, or a piece of an oversized line when ``complete`` is False."""
+        self.output_bytes += len(chunk)
+        if not complete or self._in_oversized_line:
+            if not self._in_oversized_line:
+                self._in_oversized_line = True
+                # The CLI serializes "type" first, so the prefix identifies the event
+                self._oversized_is_result = b'"type":"result"' in chunk[:64]
+            self._overflow.write(chunk)
+            if not complete:
+                return []
+            self._in_oversized_line = False
+            if self._oversized_is_result:
+                return [ResultEvent(self._truncated_response())]
+            return []
+
+        events = _parse_stream_line(chunk, self.session_id)
+        if events is None:
+            self._raw.write(chunk)
+            return []
+        for event in events:
+            if isinstance(event, TextDelta):
+                self._texts.write(event.text.encode())
+            elif isinstance(event, ResultEvent):
+                event.response.output_bytes = self.output_bytes
+        return events
+
+    def _truncated_response(self) -> ClaudeResponse:
+        return ClaudeResponse(
+            result=self._texts.head().decode(errors="ignore"),
+            session_id=self.session_id,
+            truncated=True,
+            output_bytes=self.output_bytes,
+        )
+
+    def fallback_response(self) -> ClaudeResponse:
+        """Build a response when the run ended without a result event."""
+        if self._raw.total:
+            # No result event (e.g. plain-text output), use whatever was printed
+            response = _parse_response(self._raw.head(), self.session_id)
+            response.truncated = self._raw.truncated
+        elif self._overflow.total:
+            response = self._truncated_response()
+        else:
+            response = ClaudeResponse(
+                result=self._texts.head().decode(errors="ignore"),
+                session_id=self.session_id,
+                truncated=self._texts.truncated,
+            )
+        response.output_bytes = self.output_bytes
+        return response
+
+    def close(self) -> None:
+        """Close and delete the spill files."""
+        self._texts.close()
+        self._raw.close()
+        self._overflow.close()
+
+
+async def read_line(reader: asyncio.StreamReader) -> tuple[bytes, bool]:
+    """Read one line without exceeding the reader's buffer limit.
+
+    Returns ``(data, complete)``. A line longer than the limit is returned in
+    limit-sized pieces with ``complete=False``; the piece that ends it has
+    ``complete=True``. At EOF, returns ``(b"", True)``.
+    """
+    try:
+        return await reader.readuntil(b"\n"), True
+    except asyncio.IncompleteReadError as exc:
+        return exc.partial, True
+    except asyncio.LimitOverrunError as exc:
+        return await reader.read(exc.consumed), False
+
+
+async def _drain_stderr(reader: asyncio.StreamReader, capture: OutputCapture) -> None:
+    while chunk := await reader.read(_READ_CHUNK_BYTES):
+        capture.write(chunk)
+
+
+def _build_command(prompt: str, session_id: str | None, resume: bool) -> list[str]:
+    """Build the CLI argument list for a streaming headless run."""
+    cmd = ["claude", "--print", "--output-format", "stream-json", "--verbose"]
+
+    if resume and session_id:
+        cmd.extend(["--resume", session_id])
+    elif session_id:
+        cmd.extend(["--session-id", session_id])
+
+    cmd.extend(["--", prompt])
+    return cmd
+
+
+async def stream_claude(
     prompt: str,
     workspace: Path,
     session_id: str | None = None,
     resume: bool = False,
     timeout: int = DEFAULT_TIMEOUT_SECONDS,
-) -> ClaudeResponse:
-    """Invoke Claude Code CLI in headless mode via subprocess.
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    max_stderr_bytes: int = DEFAULT_MAX_STDERR_BYTES,
+    thread_ts: str | None = None,
+) -> AsyncIterator[ClaudeEvent]:
+    """Invoke Claude Code CLI and yield events as they are emitted.
+
+    Runs the CLI with ``--output-format stream-json`` and parses its output
+    line by line, so callers see assistant text and tool calls while the run
+    is in progress. The last event is always a ``ResultEvent``. Output past
+    the in-memory caps spills to temp files that are deleted when the stream
+    closes; a truncated response reports only the size of the full output.
 
     Args:
         prompt: The message/prompt to send to Claude Code.
         workspace: Working directory where Claude Code runs.
         session_id: Session ID for new or resumed sessions.
         resume: Whether to resume an existing session.
-        timeout: Maximum execution time in seconds.
+        timeout: Maximum execution time in seconds for the whole run.
+        max_output_bytes: Largest stdout line held in memory; longer output
+            spills to disk and the response is marked truncated.
+        max_stderr_bytes: Stderr bytes held in memory; the rest spills to disk.
+        thread_ts: Slack thread the invocation belongs to (for logging).
 
-    Returns:
-        ClaudeResponse with the parsed result.
+    Yields:
+        TextDelta, ToolUse and finally ResultEvent instances.
 
     Raises:
         ClaudeCodeError: If the CLI invocation fails.
     """
-    cmd = ["claude", "--print", "--output-format", "json"]
-
-    if resume and session_id:
-        cmd.extend(["--resume", session_id])
-    elif session_id:
-        cmd.extend(["--session-id", session_id])
-
-    cmd.extend(["--", prompt])
+    cmd = _build_command(prompt, session_id, resume)
 
     logger.info(
-        "Invoking Claude Code (session=%s, resume=%s, workspace=%s)",
+        "Invoking Claude Code (session=%s, resume=%s, thread=%s, workspace=%s)",
         session_id,
         resume,
+        thread_ts,
         workspace,
     )
 
-    process = None
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=workspace,
-        )
-
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(),
-            timeout=timeout,
-        )
+        with SPAWN_SECONDS.time():
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=workspace,
+                limit=max_output_bytes,
+            )
     except FileNotFoundError:
         raise ClaudeCodeError(
             "Claude Code CLI not found. Ensure 'claude' is installed and in PATH."
         )
-    except asyncio.TimeoutError:
-        if process is not None:
+    PROCESSES_RUNNING.inc()
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    decoder = StreamDecoder(session_id or "", max_output_bytes)
+    stderr = OutputCapture(max_stderr_bytes, "stderr")
+    # Drain stderr concurrently so a chatty CLI cannot block on a full pipe
+    stderr_task = asyncio.create_task(_drain_stderr(process.stderr, stderr))
+    result: ClaudeResponse | None = None
+
+    try:
+        try:
+            while True:
+                chunk, complete = await asyncio.wait_for(
+                    read_line(process.stdout), max(deadline - loop.time(), 0)
+                )
+                if not chunk:
+                    break
+                for event in decoder.feed(chunk, complete):
+                    if isinstance(event, ResultEvent):
+                        # Held back until the exit code is known
+                        result = event.response
+                        continue
+                    yield event
+
+            await asyncio.wait_for(process.wait(), max(deadline - loop.time(), 0))
+            await stderr_task
+        except asyncio.TimeoutError:
+            TIMEOUTS.inc()
+            raise ClaudeCodeError(f"Claude Code timed out after {timeout}s")
+
+        if process.returncode != 0:
+            NONZERO_EXITS.inc()
+            error_msg = stderr.head().decode(errors="replace").strip() or "Unknown error"
+            if stderr.truncated:
+                error_msg += f" (stderr truncated, {stderr.total} bytes in total)"
+            logger.error("Claude Code failed (exit=%d): %s", process.returncode, error_msg)
+            raise ClaudeCodeError(
+                f"Claude Code exited with code {process.returncode}: {error_msg}"
+            )
+
+        if result is None:
+            result = decoder.fallback_response()
+        yield ResultEvent(result)
+    finally:
+        if process.returncode is None:
             process.kill()
             await process.wait()
-        raise ClaudeCodeError(f"Claude Code timed out after {timeout}s")
+        PROCESSES_RUNNING.dec()
+        if not stderr_task.done():
+            stderr_task.cancel()
+        stderr.close()
+        decoder.close()
+
+
+async def collect_response(events: AsyncIterator[ClaudeEvent]) -> ClaudeResponse:
+    """Drain an event stream and return the final response."""
+    async with aclosing(events):
+        async for event in events:
+            if isinstance(event, ResultEvent):
+                return event.response
+    raise ClaudeCodeError("Claude Code finished without a result")
+
+
+async def invoke_claude(
+    prompt: str,
+    workspace: Path,
+    session_id: str | None = None,
+    resume: bool = False,
+    timeout: int = DEFAULT_TIMEOUT_SECONDS,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    max_stderr_bytes: int = DEFAULT_MAX_STDERR_BYTES,
+) -> ClaudeResponse:
+    """Invoke Claude Code CLI in headless mode via subprocess.
+
+    Args:
+        prompt: The message/prompt to send to Claude Code.
+        workspace: Working directory where Claude Code runs.
+        session_id: Session ID for new or resumed sessions.
+        resume: Whether to resume an existing session.
+        timeout: Maximum execution time in seconds.
+        max_output_bytes: In-memory cap for stdout, see ``stream_claude``.
+        max_stderr_bytes: In-memory cap for stderr, see ``stream_claude``.
+
+    Returns:
+        ClaudeResponse with the parsed result.
+
+    Raises:
+        ClaudeCodeError: If the CLI invocation fails.
+    """
+    return await collect_response(
+        stream_claude(
+            prompt,
+            workspace,
+            session_id=session_id,
+            resume=resume,
+            timeout=timeout,
+            max_output_bytes=max_output_bytes,
+            max_stderr_bytes=max_stderr_bytes,
+        )
+    )
+
 
-    if process.returncode != 0:
-        error_msg = stderr.decode().strip() if stderr else "Unknown error"
-        logger.error("Claude Code failed (exit=%d): %s", process.returncode, error_msg)
-        raise ClaudeCodeError(f"Claude Code exited with code {process.returncode}: {error_msg}")
+def _parse_stream_line(line: bytes, session_id: str) -> list[ClaudeEvent] | None:
+    """Parse one stream-json line into events.
 
-    return _parse_response(stdout.decode(), session_id or "")
+    Returns None when the line is not JSON, and an empty list for event
+    types Bender does not surface (system init, tool results, ...).
+    """
+    try:
+        data = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        if line.strip():
+            logger.warning("Claude Code emitted a non-JSON line, keeping it as raw text")
+            return None
+        return []
+    if not isinstance(data, dict):
+        return None
 
+    event_type = data.get("type")
+    if event_type == "assistant":
+        events: list[ClaudeEvent] = []
+        for block in data.get("message", {}).get("content", []):
+            if block.get("type") == "text" and block.get("text"):
+                events.append(TextDelta(text=block["text"]))
+            elif block.get("type") == "tool_use":
+                events.append(
+                    ToolUse(
+                        name=block.get("name", ""),
+                        input=block.get("input") or {},
+                        tool_use_id=block.get("id", ""),
+                    )
+                )
+        return events
+    if event_type == "result":
+        return [
+            ResultEvent(
+                ClaudeResponse(
+                    result=data.get("result", ""),
+                    session_id=data.get("session_id", session_id),
+                    is_error=data.get("is_error", False),
+                )
+            )
+        ]
+    return []
 
-def _parse_response(raw_output: str, session_id: str) -> ClaudeResponse:
+
+def _parse_response(raw_output: str | bytes, session_id: str) -> ClaudeResponse:
     """Parse JSON output from Claude Code CLI."""
     try:
         data = json.loads(raw_output)
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, UnicodeDecodeError):
         # If output is not valid JSON, treat the raw text as the result
         logger.warning("Claude Code output is not valid JSON, using raw text")
-        return ClaudeResponse(result=raw_output.strip(), session_id=session_id)
+        return ClaudeResponse(result=_stripped_text(raw_output), session_id=session_id)
+    if not isinstance(data, dict):
+        return ClaudeResponse(result=_stripped_text(raw_output), session_id=session_id)
 
-    # Claude Code --print --output-format json returns a structured response
-    result = data.get("result", raw_output.strip())
+    # Claude Code --print --output-format json returns a structured response.
+    # Only fall back to (a stripped copy of) the raw output when "result" is missing.
+    result = data["result"] if "result" in data else _stripped_text(raw_output)
     returned_session_id = data.get("session_id", session_id)
     is_error = data.get("is_error", False)
 
@@ -113,3 +456,10 @@ def _parse_response(raw_output: str, session_id: str) -> ClaudeResponse:
         session_id=returned_session_id,
         is_error=is_error,
     )
+
+
+def _stripped_text(raw_output: str | bytes) -> str:
+    """Strip surrounding whitespace, decoding bytes after the strip to copy once."""
+    if isinstance(raw_output, bytes):
+        return raw_output.strip().decode(errors="replace")
+    return raw_output.strip()
@@ -2,6 +2,7 @@
 
 import logging
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings
 
@@ -9,9 +10,18 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
-    # Required: Slack tokens
-    slack_bot_token: str
-    slack_app_token: str
+    # Required (except in executor processes): Slack bot token
+    slack_bot_token: str | None = None
+
+    # How Slack delivers events: one Socket Mode WebSocket ("socket", needs
+    # SLACK_APP_TOKEN) or signed HTTP requests ("http", needs
+    # SLACK_SIGNING_SECRET) that any replica behind a load balancer can take
+    bender_slack_mode: Literal["socket", "http"] = "socket"
+    slack_app_token: str | None = None
+    # Socket Mode connections opened with the app token (Slack allows up to 10)
+    bender_slack_socket_connections: int = 1
+    slack_signing_secret: str | None = None
+    bender_slack_events_path: str = "/slack/events"
 
     # Required: Claude Code authentication (at least one)
     anthropic_api_key: str | None = None
@@ -25,6 +35,83 @@ class Settings(BaseSettings):
     # Optional: API key for authenticating external HTTP requests
     bender_api_key: str | None = None
 
+    # Optional: Claude Code process limits
+    bender_max_concurrency: int = 4
+    bender_max_queue: int = 32
+    # Optional: /ready fails once this fraction of BENDER_MAX_QUEUE is waiting
+    bender_ready_queue_threshold: float = 1.0
+
+    # Optional: in-memory caps for Claude Code output (the rest spills to a temp file)
+    bender_max_output_bytes: int = 8 * 1024 * 1024
+    bender_max_stderr_bytes: int = 64 * 1024
+
+    # Optional: SQLite file for persisting thread -> session mappings (in-memory if unset)
+    bender_session_db: Path | None = None
+    bender_session_flush_interval: float = 1.0
+    # Optional: look threads up in the session DB when this process has not seen them,
+    # so replicas sharing BENDER_SESSION_DB all answer replies in any thread
+    bender_session_read_through: bool = False
+    # Seconds a thread the session DB does not have is not looked up again
+    bender_session_miss_ttl: float = 5.0
+
+    # Optional: bounds on the in-memory session map (0 disables each limit)
+    bender_session_max_entries: int = 10000
+    bender_session_idle_ttl: float = 7 * 24 * 3600
+    bender_session_sweep_interval: float = 300.0
+
+    # Optional: outbound Slack pacing (messages per second per channel, burst, waiting calls)
+    bender_slack_channel_rate: float = 1.0
+    bender_slack_channel_burst: int = 3
+    bender_slack_max_backlog: int = 1000
+
+    # Optional: async /api/invoke jobs kept for polling (count, seconds after finishing)
+    bender_max_jobs: int = 1000
+    bender_job_ttl: float = 3600.0
+
+    # Optional: completion webhooks (deliveries in flight, retries, per-attempt timeout)
+    bender_webhook_concurrency: int = 8
+    bender_webhook_max_retries: int = 5
+    bender_webhook_timeout: float = 10.0
+    # Seconds shutdown waits for pending webhooks before abandoning them
+    bender_webhook_close_timeout: float = 30.0
+    # Optional: comma-separated hosts a callback_url may point at (empty: any host)
+    bender_webhook_allowed_hosts: str = ""
+
+    # Optional: Idempotency-Key results kept for replay (seconds, count)
+    bender_idempotency_ttl: float = 86400.0
+    bender_idempotency_max_entries: int = 10000
+
+    # Optional: /api/invoke/batch limits (items per request, items run at once)
+    bender_batch_max_items: int = 500
+    bender_batch_concurrency: int = 4
+
+    # Optional: responses longer than this many characters are uploaded as a snippet (0 disables)
+    bender_snippet_threshold: int = 12000
+
+    # Optional: minimum seconds between in-place edits of a streaming Slack reply
+    bender_stream_update_interval: float = 1.0
+
+    # Optional: window for dropping redelivered Slack events
+    bender_event_dedup_ttl: float = 600.0
+    bender_event_dedup_max_entries: int = 10000
+
+    # Optional: run Claude Code in executor processes. The front process sends
+    # invocations to these Unix sockets (comma-separated); an executor started
+    # with `python -m bender executor` listens on BENDER_EXECUTOR_SOCKET
+    bender_executor_sockets: str = ""
+    bender_executor_socket: Path = Path("/tmp/bender-executor.sock")
+    # Seconds an unreachable executor keeps its threads before they move elsewhere,
+    # and between reconnection attempts to it
+    bender_executor_retry_interval: float = 30.0
+    # Invocations each executor runs at once (its BENDER_MAX_CONCURRENCY); the front
+    # lets this many per executor run. 0 means the front's own BENDER_MAX_CONCURRENCY
+    bender_executor_concurrency: int = 0
+
+    # Optional: warm pool of pre-started Claude Code processes (0 disables it); idle
+    # processes and those kept for recent threads together stay within this size
+    bender_worker_pool_size: int = 0
+    bender_worker_max_requests: int = 10
+
     model_config = {"case_sensitive": False}
 
     def validate_auth(self) -> None:
@@ -35,6 +122,35 @@ class Settings(BaseSettings):
                 "ANTHROPIC_API_KEY or CLAUDE_CODE_OAUTH_TOKEN"
             )
 
+    def executor_socket_paths(self) -> list[Path]:
+        """Executor sockets the front process sends invocations to (empty: run locally)."""
+        return [Path(p.strip()) for p in self.bender_executor_sockets.split(",") if p.strip()]
+
+    def webhook_allowed_hosts(self) -> set[str]:
+        """Hosts completion webhooks may be sent to (empty: no restriction)."""
+        hosts = self.bender_webhook_allowed_hosts.split(",")
+        return {host.strip().lower() for host in hosts if host.strip()}
+
+    def invocation_slots(self) -> int:
+        """Invocations this process lets run at once.
+
+        Running locally that is BENDER_MAX_CONCURRENCY; with executors it is
+        their combined capacity, so adding executors adds capacity.
+        """
+        executors = len(self.executor_socket_paths())
+        if not executors:
+            return self.bender_max_concurrency
+        return executors * (self.bender_executor_concurrency or self.bender_max_concurrency)
+
+    def validate_slack(self) -> None:
+        """Ensure the credentials for the selected Slack event mode are configured."""
+        if not self.slack_bot_token:
+            raise ValueError("SLACK_BOT_TOKEN is required")
+        if self.bender_slack_mode == "socket" and not self.slack_app_token:
+            raise ValueError("SLACK_APP_TOKEN is required when BENDER_SLACK_MODE=socket")
+        if self.bender_slack_mode == "http" and not self.slack_signing_secret:
+            raise ValueError("SLACK_SIGNING_SECRET is required when BENDER_SLACK_MODE=http")
+
 
 def configure_logging(level: str) -> None:
     """Configure application-wide logging."""
@@ -46,9 +162,14 @@ def configure_logging(level: str) -> None:
     )
 
 
-def load_settings() -> Settings:
-    """Load settings from environment, validate, and configure logging."""
+def load_settings(executor: bool = False) -> Settings:
+    """Load settings from environment, validate, and configure logging.
+
+    Executor processes never talk to Slack, so they skip the Slack checks.
+    """
     settings = Settings()
     settings.validate_auth()
+    if not executor:
+        settings.validate_slack()
     configure_logging(settings.log_level)
     return settings
@@ -0,0 +1,92 @@
+"""Slack event deduplication — drop redelivered events within a time window."""
+
+import logging
+import time
+from collections import OrderedDict
+
+from bender.metrics import SLACK_EVENT_DUPLICATES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 600.0
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def event_key(event: dict, body: dict | None = None) -> str | None:
+    """Build the dedup key for a Slack event.
+
+    Uses the envelope's ``event_id`` when available, otherwise the event
+    type, channel and timestamp (an ``app_mention`` and the ``message`` for
+    the same post share channel+ts, so the type keeps them apart).
+
+    Returns:
+        The key, or None if the event carries nothing to identify it by.
+    """
+    if body and body.get("event_id"):
+        return body["event_id"]
+    ts = event.get("event_ts") or event.get("ts")
+    if not ts:
+        return None
+    return f"{event.get('type', '')}:{event.get('channel', '')}:{ts}"
+
+
+class EventDeduplicator:
+    """Bounded, time-windowed set of recently seen Slack event keys.
+
+    Slack redelivers an event (with the same ``event_id`` and an increasing
+    ``retry_num``) when the handler is slow to acknowledge it. Each key is
+    remembered for ``ttl`` seconds; beyond ``max_entries`` the oldest keys
+    are forgotten first.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> time first seen, oldest first
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Number of keys currently remembered."""
+        return len(self._seen)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.ttl
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if seen_at >= cutoff and len(self._seen) <= self.max_entries:
+                break
+            del self._seen[key]
+
+    def is_duplicate(self, key: str | None) -> bool:
+        """Record the key and report whether it was already seen in the window.
+
+        Args:
+            key: Dedup key from ``event_key``; None is never a duplicate.
+
+        Returns:
+            True if the event should be dropped.
+        """
+        if key is None:
+            return False
+        now = time.monotonic()
+        self._expire(now)
+        if key in self._seen:
+            self.hits += 1
+            SLACK_EVENT_DUPLICATES.inc()
+            logger.info("Dropping duplicate Slack event %s", key)
+            return True
+        self.misses += 1
+        self._seen[key] = now
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return False
+
+    def stats(self) -> dict[str, int]:
+        """Snapshot of dedup counters."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._seen)}
@@ -0,0 +1,679 @@
+"""Executor workers — run Claude Code in separate processes behind a Unix socket.
+
+The front process (Slack intake, HTTP API, posting) hands each invocation
+to an executor over a Unix domain socket, so subprocess management and
+decoding of the CLI's output never share its event loop. Executors can be
+scaled independently of Slack intake.
+
+Protocol: every frame is a 4-byte big-endian length followed by that many
+bytes of UTF-8 JSON. A connection carries one invocation: the client sends
+an ``invoke`` frame, the executor answers with ``text``/``tool_use``
+frames and finally one ``result`` or ``error`` frame, then closes. Closing
+the connection early cancels the run.
+
+Session transcripts move between executors over the same socket: an
+``export_session`` frame is answered with a ``session`` frame carrying the
+transcript (null if the executor has none), and an ``import_session``
+frame carrying one is answered with ``ok``.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import re
+import struct
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from dataclasses import asdict
+from pathlib import Path
+
+from bender.claude_code import (
+    DEFAULT_TIMEOUT_SECONDS,
+    ClaudeCodeError,
+    ClaudeEvent,
+    ClaudeResponse,
+    ResultEvent,
+    TextDelta,
+    ToolUse,
+    stream_claude,
+)
+from bender.config import Settings
+from bender.hash_ring import HashRing
+from bender.metrics import (
+    PROCESS_METRICS,
+    REGISTRY,
+    SESSION_MIGRATION_FAILURES,
+    SESSION_MIGRATIONS,
+)
+from bender.scheduler import InvocationScheduler, SchedulerFullError, StreamFn
+from bender.session_manager import SessionManager
+from bender.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+
+# Largest frame accepted; a result carries at most the in-memory output cap
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Frames larger than this are decoded in a worker thread
+THREAD_DECODE_BYTES = 1024 * 1024
+
+# Transcripts larger than this are not migrated; JSON escaping can double them
+MAX_TRANSCRIPT_BYTES = MAX_FRAME_BYTES // 2
+
+# Seconds between connection attempts to an executor that left the ring
+DEFAULT_RETRY_INTERVAL = 30.0
+
+# Seconds past the invocation timeout to wait for an executor's result,
+# covering its queue wait and process shutdown
+READ_MARGIN_SECONDS = 60.0
+
+# Seconds a metrics scrape waits for each executor
+METRICS_TIMEOUT_SECONDS = 2.0
+
+_SESSION_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9-]*")
+
+
+class ExecutorProtocolError(ClaudeCodeError):
+    """Raised when a peer sends a malformed or oversized frame."""
+
+
+async def write_frame(writer: asyncio.StreamWriter, message: dict) -> None:
+    """Send one length-prefixed JSON frame."""
+    payload = json.dumps(message).encode()
+    writer.write(_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict | None:
+    """Read one length-prefixed JSON frame.
+
+    Returns:
+        The decoded message, or None if the peer closed the connection
+        cleanly between frames.
+
+    Raises:
+        ExecutorProtocolError: If the frame is truncated, too large or not JSON.
+    """
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError as exc:
+        if not exc.partial:
+            return None
+        raise ExecutorProtocolError("Connection closed inside a frame header") from exc
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ExecutorProtocolError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    try:
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError as exc:
+        raise ExecutorProtocolError("Connection closed inside a frame") from exc
+    try:
+        if length > THREAD_DECODE_BYTES:
+            return await asyncio.to_thread(json.loads, payload)
+        return json.loads(payload)
+    except ValueError as exc:
+        raise ExecutorProtocolError(f"Invalid frame: {exc}") from exc
+
+
+def encode_event(event: ClaudeEvent) -> dict:
+    """Wire form of a stream event."""
+    if isinstance(event, TextDelta):
+        return {"type": "text", "text": event.text}
+    if isinstance(event, ToolUse):
+        return {"type": "tool_use", **asdict(event)}
+    return {"type": "result", "response": asdict(event.response)}
+
+
+def decode_event(message: dict) -> ClaudeEvent:
+    """Stream event from its wire form; ``error`` frames raise instead.
+
+    Raises:
+        SchedulerFullError: If the executor had no room for the invocation.
+        ClaudeCodeError: If the invocation failed in the executor.
+    """
+    kind = message.get("type")
+    if kind == "text":
+        return TextDelta(text=message["text"])
+    if kind == "tool_use":
+        return ToolUse(
+            name=message["name"],
+            input=message.get("input", {}),
+            tool_use_id=message.get("tool_use_id", ""),
+        )
+    if kind == "result":
+        return ResultEvent(ClaudeResponse(**message["response"]))
+    if kind == "error":
+        if message.get("full"):
+            raise SchedulerFullError(message["error"], retry_after=message.get("retry_after", 1))
+        raise ClaudeCodeError(message["error"])
+    raise ExecutorProtocolError(f"Unexpected frame type: {kind!r}")
+
+
+def transcript_dir(workspace: Path, home: Path | None = None) -> Path:
+    """Directory where Claude Code keeps session transcripts for a workspace.
+
+    The CLI writes each session to ``~/.claude/projects/<dir>/<session_id>.jsonl``,
+    where ``<dir>`` is the absolute workspace path with every character
+    other than a letter or digit replaced by ``-``.
+    """
+    home = Path.home() if home is None else home
+    return home / ".claude" / "projects" / re.sub(r"[^A-Za-z0-9]", "-", str(workspace.resolve()))
+
+
+def _read_transcript(path: Path) -> str | None:
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return None
+    if size > MAX_TRANSCRIPT_BYTES:
+        raise ValueError(f"Transcript of {size} bytes is too large to move")
+    return path.read_text()
+
+
+def _write_transcript(path: Path, transcript: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".jsonl.partial")
+    partial.write_text(transcript)
+    os.replace(partial, path)
+
+
+class ExecutorServer:
+    """Serves invocations on a Unix socket, running them through a scheduler.
+
+    The executor's own scheduler bounds how many Claude Code processes
+    this process runs; when it is full the client gets a
+    SchedulerFullError, just as from a local scheduler. Session transcripts
+    are exported from and imported into ``transcripts`` (by default where
+    Claude Code keeps them for the scheduler's workspace).
+    """
+
+    def __init__(
+        self, path: Path, scheduler: InvocationScheduler, transcripts: Path | None = None
+    ) -> None:
+        self.path = path
+        self.scheduler = scheduler
+        self.transcripts = (
+            transcript_dir(scheduler.workspace) if transcripts is None else transcripts
+        )
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        """Listen on the socket path, replacing a stale socket file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        # Only processes running as the same user or group may submit work
+        os.chmod(self.path, 0o660)
+        logger.info("Executor listening on %s", self.path)
+
+    async def serve_forever(self) -> None:
+        """Start (if needed) and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting connections and remove the socket file."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.path.unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await read_frame(reader)
+            if request is None:
+                return
+            if request.get("type") in ("export_session", "import_session"):
+                await write_frame(writer, await self._transfer(request))
+                return
+            if request.get("type") == "metrics":
+                await write_frame(
+                    writer, {"type": "metrics", "metrics": REGISTRY.snapshot(PROCESS_METRICS)}
+                )
+                return
+            if request.get("type") != "invoke":
+                await write_frame(
+                    writer, {"type": "error", "error": "Expected an invoke frame"}
+                )
+                return
+            run = asyncio.create_task(self._run(request, writer))
+            # Any read now means the client went away; cancel its run
+            hangup = asyncio.create_task(reader.read(1))
+            await asyncio.wait({run, hangup}, return_when=asyncio.FIRST_COMPLETED)
+            if not run.done():
+                logger.info("Executor client disconnected, cancelling its run")
+                run.cancel()
+            hangup.cancel()
+            await asyncio.gather(run, return_exceptions=True)
+        except (ExecutorProtocolError, ConnectionError) as exc:
+            logger.warning("Executor connection failed: %s", exc)
+        finally:
+            writer.close()
+
+    async def _transfer(self, request: dict) -> dict:
+        """Export or import one session transcript."""
+        session_id = request.get("session_id")
+        if not isinstance(session_id, str) or not _SESSION_ID.fullmatch(session_id):
+            return {"type": "error", "error": f"Invalid session ID: {session_id!r}"}
+        path = self.transcripts / f"{session_id}.jsonl"
+        try:
+            if request["type"] == "export_session":
+                transcript = await asyncio.to_thread(_read_transcript, path)
+                return {"type": "session", "session_id": session_id, "transcript": transcript}
+            transcript = request.get("transcript")
+            if not isinstance(transcript, str):
+                return {"type": "error", "error": "import_session needs a transcript"}
+            await asyncio.to_thread(_write_transcript, path, transcript)
+        except (OSError, ValueError) as exc:
+            logger.warning("Transcript transfer for session %s failed: %s", session_id, exc)
+            return {"type": "error", "error": str(exc)}
+        logger.info("Imported transcript for session %s", session_id)
+        return {"type": "ok"}
+
+    async def _run(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        stream = self.scheduler.stream(
+            prompt=request["prompt"],
+            session_id=request.get("session_id"),
+            resume=request.get("resume", False),
+            thread_ts=request.get("thread_ts"),
+        )
+        try:
+            async with aclosing(stream):
+                async for event in stream:
+                    await write_frame(writer, encode_event(event))
+        except SchedulerFullError as exc:
+            await write_frame(
+                writer,
+                {"type": "error", "error": str(exc), "full": True, "retry_after": exc.retry_after},
+            )
+        except ClaudeCodeError as exc:
+            await write_frame(writer, {"type": "error", "error": str(exc)})
+
+
+class ExecutorClient:
+    """Sends invocations to executor processes; a drop-in ``stream_fn``.
+
+    Claude Code keeps session transcripts on the executor's local disk, so
+    a ``--resume`` only works on the executor that ran the session. Turns
+    of a thread tracked in ``sessions`` therefore go to the executor that
+    owns it: the one recorded in the SessionManager, or for a new thread
+    the one chosen by a consistent hash of its ``thread_ts``. Invocations
+    outside a tracked thread go to the executor with the fewest in flight.
+
+    An executor that refuses connections leaves the ring, so new threads
+    go elsewhere. Its own threads wait ``retry_interval`` seconds for it to
+    come back (a restart during a deploy keeps its transcripts); their
+    turns fail meanwhile. If it is still down after that, or once it is
+    removed explicitly or dropped from ``paths``, a background task
+    reassigns its threads to their new ring owners and copies their
+    transcripts over when the old executor can still export them. Threads
+    whose transcript is lost are marked on their session record, so their
+    next turn starts a fresh conversation under the same session ID even
+    after the front process restarts. Executors that left are probed again
+    every ``retry_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        paths: list[Path],
+        sessions: SessionManager | None = None,
+        retry_interval: float = DEFAULT_RETRY_INTERVAL,
+    ) -> None:
+        if not paths:
+            raise ValueError("ExecutorClient needs at least one socket path")
+        self.paths = paths
+        self.sessions = sessions
+        self.retry_interval = retry_interval
+        self.ring = HashRing(str(path) for path in paths)
+        self.in_flight = {path: 0 for path in paths}
+        self.migrations = {"moved": 0, "lost": 0}
+        # Executors off the ring, with the monotonic time they were last tried
+        self._down: dict[Path, float] = {}
+        # Unreachable executors whose threads move unless they return in time
+        self._grace: dict[Path, asyncio.Task] = {}
+        # Threads being moved off an executor; at most one task per executor
+        self._moves: dict[Path, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        """Start moving threads off executors that are no longer configured.
+
+        Call after the SessionManager has loaded its sessions.
+        """
+        if self.sessions is None:
+            return
+        for worker in await self.sessions.workers():
+            if Path(worker) not in self.in_flight:
+                self._move_threads(Path(worker), "no longer configured")
+
+    async def close(self) -> None:
+        """Cancel grace periods and thread moves still in progress."""
+        tasks = [*self._grace.values(), *self._moves.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _open(self, path: Path) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_unix_connection(path, limit=MAX_FRAME_BYTES)
+
+    async def _reachable(self, path: Path) -> bool:
+        try:
+            _, writer = await self._open(path)
+        except OSError:
+            return False
+        writer.close()
+        return True
+
+    async def _probe_down(self) -> None:
+        """Return executors that accept connections again to the ring."""
+        now = time.monotonic()
+        # With nothing left on the ring, try everything rather than fail outright
+        force = len(self.ring) == 0
+        for path, tried_at in list(self._down.items()):
+            if path in self._moves:
+                continue
+            # An executor in its grace period is probed when the period ends
+            if not force and (path in self._grace or now - tried_at < self.retry_interval):
+                continue
+            if await self._reachable(path):
+                self._rejoin(path)
+            else:
+                self._down[path] = now
+
+    def _rejoin(self, path: Path) -> None:
+        self._down.pop(path, None)
+        grace = self._grace.pop(path, None)
+        if grace is not None:
+            grace.cancel()
+        self.ring.add(str(path))
+        logger.info("Executor at %s is reachable again", path)
+
+    def _mark_down(self, path: Path, reason: str) -> None:
+        """Take an unreachable executor off the ring and start its grace period."""
+        node = str(path)
+        if node in self.ring:
+            self.ring.remove(node)
+            logger.warning(
+                "Executor at %s left the ring (%s); its threads move in %gs unless it returns",
+                path,
+                reason,
+                self.retry_interval,
+            )
+        self._down[path] = time.monotonic()
+        if path not in self._grace and path not in self._moves:
+            self._grace[path] = asyncio.create_task(self._expire(path))
+
+    async def _expire(self, path: Path) -> None:
+        await asyncio.sleep(self.retry_interval)
+        del self._grace[path]
+        if await self._reachable(path):
+            self._rejoin(path)
+            return
+        self._down[path] = time.monotonic()
+        await self._move_threads(path, f"unreachable for {self.retry_interval:g}s")
+
+    def _move_threads(self, path: Path, reason: str) -> asyncio.Task:
+        """Start moving an executor's threads, or join the move already running."""
+        task = self._moves.get(path)
+        if task is None:
+            task = asyncio.create_task(self._reassign(path, reason))
+            self._moves[path] = task
+            task.add_done_callback(lambda _: self._moves.pop(path, None))
+        return task
+
+    async def _reassign(self, path: Path, reason: str) -> None:
+        node = str(path)
+        if node in self.ring:
+            self.ring.remove(node)
+            if path in self.in_flight:
+                self._down[path] = time.monotonic()
+        logger.warning("Moving threads off executor at %s: %s", path, reason)
+        if self.sessions is None:
+            return
+        for thread_ts, session_id in await self.sessions.threads_on_worker(node):
+            target = self.ring.node_for(thread_ts)
+            if target is None:
+                return
+            if not await self._migrate(session_id, path, Path(target)):
+                await self.sessions.set_transcript_lost(thread_ts)
+            await self.sessions.set_worker(thread_ts, target)
+
+    async def remove_executor(self, path: Path, reason: str = "removed") -> None:
+        """Take an executor off the ring now and move its threads to the others.
+
+        Each thread goes to its new ring owner, taking its transcript along
+        if the old executor can still export it. Concurrent calls for the
+        same executor share one move. With no executor left the threads
+        keep their owner.
+        """
+        grace = self._grace.pop(path, None)
+        if grace is not None:
+            grace.cancel()
+        await asyncio.shield(self._move_threads(path, reason))
+
+    async def _owner(self, thread_ts: str) -> Path | None:
+        """Executor that owns a tracked thread, or None before its first turn."""
+        owner = await self.sessions.get_worker(thread_ts)
+        if owner is None:
+            return None
+        path = Path(owner)
+        if owner in self.ring or path in self._grace:
+            return path
+        # Off the ring for good: wait for its threads to move (once, shared)
+        await asyncio.shield(self._move_threads(path, "no longer on the ring"))
+        owner = await self.sessions.get_worker(thread_ts)
+        if owner is not None and owner not in self.ring:
+            raise ClaudeCodeError(f"No executor reachable to take over from {owner}")
+        return None if owner is None else Path(owner)
+
+    async def _connect(
+        self, thread_ts: str | None
+    ) -> tuple[Path, asyncio.StreamReader, asyncio.StreamWriter]:
+        await self._probe_down()
+        tracked = (
+            thread_ts is not None
+            and self.sessions is not None
+            and await self.sessions.has_session(thread_ts)
+        )
+        owner = await self._owner(thread_ts) if tracked else None
+        if owner is not None:
+            try:
+                reader, writer = await self._open(owner)
+            except OSError as exc:
+                self._mark_down(owner, str(exc))
+                raise ClaudeCodeError(
+                    f"Executor at {owner} holding this thread is unreachable ({exc}); "
+                    f"its threads move to other executors after {self.retry_interval:g}s"
+                ) from exc
+            if str(owner) not in self.ring:
+                self._rejoin(owner)
+            return owner, reader, writer
+        errors = []
+        # Each failure takes an executor off the ring, so this ends
+        while self.ring.nodes:
+            if tracked:
+                # A new thread goes to its consistent-hash owner
+                path = Path(self.ring.node_for(thread_ts))
+            else:
+                path = min(map(Path, self.ring.nodes), key=self.in_flight.__getitem__)
+            try:
+                reader, writer = await self._open(path)
+            except OSError as exc:
+                errors.append(f"{path}: {exc}")
+                self._mark_down(path, str(exc))
+                continue
+            if tracked:
+                await self.sessions.set_worker(thread_ts, str(path))
+            return path, reader, writer
+        raise ClaudeCodeError(f"No executor reachable ({'; '.join(errors) or 'all down'})")
+
+    async def _request(self, path: Path, message: dict) -> dict:
+        """Send one non-streaming request to an executor and return its reply."""
+        reader, writer = await self._open(path)
+        try:
+            await write_frame(writer, message)
+            reply = await read_frame(reader)
+        finally:
+            writer.close()
+        if reply is None:
+            raise ClaudeCodeError(f"Executor at {path} closed the connection")
+        if reply.get("type") == "error":
+            raise ClaudeCodeError(reply["error"])
+        return reply
+
+    async def metrics(self) -> list[dict]:
+        """Collect the Claude Code process metrics of every reachable executor.
+
+        Executors that are down or slow to answer are left out of the scrape.
+        """
+
+        async def scrape(path: Path) -> dict | None:
+            try:
+                async with asyncio.timeout(METRICS_TIMEOUT_SECONDS):
+                    reply = await self._request(path, {"type": "metrics"})
+            except (ClaudeCodeError, OSError, TimeoutError) as exc:
+                logger.debug("No metrics from executor at %s: %s", path, exc)
+                return None
+            return reply.get("metrics")
+
+        paths = [path for path in self.paths if path not in self._down]
+        snapshots = await asyncio.gather(*(scrape(path) for path in paths))
+        return [snapshot for snapshot in snapshots if snapshot]
+
+    async def _migrate(self, session_id: str, source: Path, target: Path) -> bool:
+        """Copy a session transcript between executors; False if it was lost."""
+        try:
+            exported = await self._request(
+                source, {"type": "export_session", "session_id": session_id}
+            )
+            transcript = exported.get("transcript")
+            if transcript is not None:
+                await self._request(
+                    target,
+                    {"type": "import_session", "session_id": session_id, "transcript": transcript},
+                )
+        except (OSError, ClaudeCodeError) as exc:
+            logger.warning(
+                "Could not move session %s from %s to %s: %s", session_id, source, target, exc
+            )
+            transcript = None
+        if transcript is None:
+            self.migrations["lost"] += 1
+            SESSION_MIGRATION_FAILURES.inc()
+            return False
+        self.migrations["moved"] += 1
+        SESSION_MIGRATIONS.inc()
+        logger.info("Moved session %s from %s to %s", session_id, source, target)
+        return True
+
+    async def _transcript_lost(self, thread_ts: str | None) -> bool:
+        if thread_ts is None or self.sessions is None:
+            return False
+        record = await self.sessions.get_record(thread_ts)
+        return record is not None and record.transcript_lost
+
+    async def stream(
+        self,
+        prompt: str,
+        workspace: Path,
+        session_id: str | None = None,
+        resume: bool = False,
+        timeout: int = DEFAULT_TIMEOUT_SECONDS,
+        thread_ts: str | None = None,
+    ) -> AsyncIterator[ClaudeEvent]:
+        """Run one invocation on an executor, yielding its events.
+
+        ``workspace`` is the executor's own concern; it is accepted for
+        compatibility with ``stream_claude``. The executor enforces its own
+        timeout; if no result arrives within ``timeout`` plus
+        ``READ_MARGIN_SECONDS`` the run is abandoned, which cancels it on
+        the executor. ``thread_ts`` keeps a tracked thread on the executor
+        that holds its transcript.
+
+        Raises:
+            SchedulerFullError: If the executor had no room for it.
+            ClaudeCodeError: If no executor is reachable or the run failed.
+        """
+        path, reader, writer = await self._connect(thread_ts)
+        fresh = resume and await self._transcript_lost(thread_ts)
+        if fresh:
+            logger.info("Session %s lost its transcript, starting it afresh", session_id)
+        self.in_flight[path] += 1
+        deadline = asyncio.get_running_loop().time() + timeout + READ_MARGIN_SECONDS
+        try:
+            await write_frame(
+                writer,
+                {
+                    "type": "invoke",
+                    "prompt": prompt,
+                    "session_id": session_id,
+                    "resume": resume and not fresh,
+                    "thread_ts": thread_ts,
+                },
+            )
+            while True:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        message = await read_frame(reader)
+                except TimeoutError:
+                    raise ClaudeCodeError(
+                        f"Executor at {path} sent no result within {timeout}s"
+                    ) from None
+                if message is None:
+                    raise ClaudeCodeError(f"Executor at {path} closed the connection mid-run")
+                event = decode_event(message)
+                if isinstance(event, ResultEvent) and fresh:
+                    await self.sessions.set_transcript_lost(thread_ts, False)
+                yield event
+                if isinstance(event, ResultEvent):
+                    return
+        except ConnectionError as exc:
+            raise ClaudeCodeError(f"Lost connection to executor at {path}: {exc}") from exc
+        finally:
+            self.in_flight[path] -= 1
+            writer.close()
+
+
+def local_backend(settings: Settings) -> tuple[StreamFn, WorkerPool | None]:
+    """Build the in-process Claude Code backend (warm pool or plain spawns)."""
+    if settings.bender_worker_pool_size > 0:
+        worker_pool = WorkerPool(
+            workspace=settings.bender_workspace,
+            size=settings.bender_worker_pool_size,
+            max_requests=settings.bender_worker_max_requests,
+            max_output_bytes=settings.bender_max_output_bytes,
+            max_stderr_bytes=settings.bender_max_stderr_bytes,
+        )
+        return worker_pool.stream, worker_pool
+    stream_fn = functools.partial(
+        stream_claude,
+        max_output_bytes=settings.bender_max_output_bytes,
+        max_stderr_bytes=settings.bender_max_stderr_bytes,
+    )
+    return stream_fn, None
+
+
+async def run_executor(settings: Settings) -> None:
+    """Run an executor process serving ``BENDER_EXECUTOR_SOCKET`` until cancelled."""
+    stream_fn, worker_pool = local_backend(settings)
+    scheduler = InvocationScheduler(
+        workspace=settings.bender_workspace,
+        max_concurrency=settings.bender_max_concurrency,
+        max_queue=settings.bender_max_queue,
+        stream_fn=stream_fn,
+    )
+    server = ExecutorServer(settings.bender_executor_socket, scheduler)
+    if worker_pool is not None:
+        await worker_pool.start()
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        if worker_pool is not None:
+            await worker_pool.stop()
@@ -0,0 +1,68 @@
+"""Consistent hashing — stable assignment of keys (Slack threads) to nodes."""
+
+import bisect
+import hashlib
+from collections.abc import Iterable
+
+# Virtual points per node; more points spread keys more evenly
+DEFAULT_REPLICAS = 100
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Maps keys to nodes so that adding or removing a node moves few keys.
+
+    Each node is placed on the ring at ``replicas`` pseudo-random points; a
+    key belongs to the first node point at or after the key's own hash.
+    When a node leaves, only the keys it owned move (to its neighbours).
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = DEFAULT_REPLICAS) -> None:
+        self.replicas = replicas
+        self._points: list[int] = []
+        self._owners: dict[int, str] = {}
+        self._nodes: set[str] = set()
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self) -> int:
+        """Number of nodes on the ring."""
+        return len(self._nodes)
+
+    def __contains__(self, node: object) -> bool:
+        return node in self._nodes
+
+    @property
+    def nodes(self) -> list[str]:
+        """Nodes currently on the ring, sorted."""
+        return sorted(self._nodes)
+
+    def add(self, node: str) -> None:
+        """Place a node on the ring (no-op if already present)."""
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            # On the (astronomically rare) collision the first owner keeps the point
+            if point not in self._owners:
+                self._owners[point] = node
+                bisect.insort(self._points, point)
+
+    def remove(self, node: str) -> None:
+        """Take a node off the ring (no-op if absent)."""
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        self._points = [p for p in self._points if self._owners[p] != node]
+        self._owners = {p: owner for p, owner in self._owners.items() if owner != node}
+
+    def node_for(self, key: str) -> str | None:
+        """Node that owns ``key``, or None if the ring is empty."""
+        if not self._points:
+            return None
+        index = bisect.bisect_left(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
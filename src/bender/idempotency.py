@@ -0,0 +1,116 @@
+"""Idempotency keys — single-flight and replay of /api/invoke results."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from bender.metrics import IDEMPOTENT_REPLAYS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 24 * 3600.0
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Raised when a key is sent again with a different request body."""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "task", "finished_at")
+
+    def __init__(self, fingerprint: str, task: asyncio.Task) -> None:
+        self.fingerprint = fingerprint
+        self.task = task
+        self.finished_at: float | None = None
+
+
+class IdempotencyCache:
+    """Deduplicates requests that carry the same idempotency key.
+
+    The first request for a key starts the work in its own task; requests
+    arriving while it runs await that same task (single-flight), and
+    requests after it succeeded get the cached result for ``ttl`` seconds.
+    Failures are not cached, so a retry after an error runs again. Beyond
+    ``max_entries`` the oldest finished results are dropped.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Ordered by creation; finished entries expire from the front
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.replays = 0
+
+    def __len__(self) -> int:
+        """Number of keys currently tracked."""
+        return len(self._entries)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        for key in [
+            key
+            for key, entry in self._entries.items()
+            if entry.finished_at is not None and entry.finished_at < cutoff
+        ]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            finished = [
+                key for key, entry in self._entries.items() if entry.finished_at is not None
+            ]
+            for key in finished[: len(self._entries) - self.max_entries + 1]:
+                del self._entries[key]
+
+    def _finish(self, key: str, entry: _Entry, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None:
+            # Let the next retry run again
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        else:
+            entry.finished_at = time.monotonic()
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        work: Callable[[], Awaitable[Any]],
+    ) -> tuple[Any, bool]:
+        """Run ``work`` once per key and share its result.
+
+        Args:
+            key: The caller's idempotency key.
+            fingerprint: Identifies the request body; reusing a key with a
+                different body is an error.
+            work: Produces the result; only called for a new key.
+
+        Returns:
+            The result and whether it was replayed from an earlier request.
+
+        Raises:
+            IdempotencyKeyReusedError: If the key was used for another body.
+        """
+        self._expire()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyKeyReusedError(
+                    "Idempotency-Key was already used with a different request"
+                )
+            self.replays += 1
+            IDEMPOTENT_REPLAYS.inc()
+            logger.info("Replaying idempotent request %s", key)
+            # Shielded so a disconnecting caller does not cancel the shared run
+            return await asyncio.shield(entry.task), True
+
+        task = asyncio.ensure_future(work())
+        entry = _Entry(fingerprint, task)
+        self._entries[key] = entry
+        task.add_done_callback(lambda done: self._finish(key, entry, done))
+        return await asyncio.shield(task), False
@@ -0,0 +1,111 @@
+"""Job table — tracks asynchronous /api/invoke runs for polling."""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_JOBS = 1000
+DEFAULT_JOB_TTL_SECONDS = 3600.0
+
+# Job states
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobTableFullError(Exception):
+    """Raised when the table is at capacity with unfinished jobs."""
+
+
+@dataclass
+class Job:
+    """One asynchronous invocation and its outcome."""
+
+    job_id: str
+    status: str = PENDING
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    result: dict | None = None
+    error: str | None = None
+    # HTTP status the synchronous call would have returned on failure
+    error_status: int | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status != PENDING
+
+    def succeed(self, result: dict) -> None:
+        self.status = SUCCEEDED
+        self.result = result
+        self.finished_at = time.time()
+
+    def fail(self, error: str, error_status: int = 500) -> None:
+        self.status = FAILED
+        self.error = error
+        self.error_status = error_status
+        self.finished_at = time.time()
+
+
+class JobTable:
+    """Bounded in-memory table of asynchronous jobs.
+
+    Finished jobs are kept for ``ttl`` seconds after completion so callers
+    can poll for the result, then dropped. When ``max_jobs`` is reached,
+    the oldest finished jobs are dropped early; if every slot holds an
+    unfinished job, new jobs are rejected.
+    """
+
+    def __init__(
+        self,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        ttl: float = DEFAULT_JOB_TTL_SECONDS,
+    ) -> None:
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        # Insertion (creation) order
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of jobs currently tracked."""
+        return len(self._jobs)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def create(self) -> Job:
+        """Register a new pending job.
+
+        Raises:
+            JobTableFullError: If the table is full of unfinished jobs.
+        """
+        self._expire()
+        if len(self._jobs) >= self.max_jobs:
+            oldest_done = next((job_id for job_id, job in self._jobs.items() if job.done), None)
+            if oldest_done is None:
+                raise JobTableFullError(f"Too many jobs in progress ({len(self._jobs)})")
+            del self._jobs[oldest_done]
+        job = Job(job_id=uuid.uuid4().hex)
+        self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Look up a job, or None if it is unknown or has expired."""
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        """Number of jobs still running."""
+        return sum(1 for job in self._jobs.values() if not job.done)
@@ -0,0 +1,233 @@
+"""In-process metrics — counters, gauges and histograms in Prometheus text format."""
+
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import TypeVar
+
+# Latency buckets in seconds, from Slack API calls up to full Claude Code runs
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+    def samples(self, remote: Sequence[float] = ()) -> list[str]:
+        return [f"{self.name} {_format_value(self.value + sum(remote))}"]
+
+
+class Gauge:
+    """Value that can go up and down, or be read from a callback at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self.value = 0.0
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from ``function`` whenever metrics are rendered."""
+        self._function = function
+
+    def get(self) -> float:
+        return self._function() if self._function is not None else self.value
+
+    def snapshot(self) -> float:
+        return self.get()
+
+    def samples(self, remote: Sequence[float] = ()) -> list[str]:
+        return [f"{self.name} {_format_value(self.get() + sum(remote))}"]
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the wall-clock duration of the enclosed block."""
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started_at)
+
+    def snapshot(self) -> dict:
+        return {"buckets": list(self.bucket_counts), "sum": self.sum, "count": self.count}
+
+    def samples(self, remote: Sequence[dict] = ()) -> list[str]:
+        bucket_counts = list(self.bucket_counts)
+        total, count = self.sum, self.count
+        for other in remote:
+            if len(other["buckets"]) != len(bucket_counts):
+                continue
+            bucket_counts = [a + b for a, b in zip(bucket_counts, other["buckets"])]
+            total += other["sum"]
+            count += other["count"]
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, bucket_counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+Metric = Counter | Gauge | Histogram
+M = TypeVar("M", Counter, Gauge, Histogram)
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self, names: tuple[str, ...]) -> dict:
+        """Return the current values of the named metrics, JSON-serialisable."""
+        return {name: self._metrics[name].snapshot() for name in names}
+
+    def render(self, remote: Sequence[dict] = ()) -> str:
+        """Render all metrics in the Prometheus text exposition format.
+
+        ``remote`` holds snapshots taken in other processes (executors);
+        their values are added to the local ones.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(
+                metric.samples([snap[metric.name] for snap in remote if metric.name in snap])
+            )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Claude Code subprocesses
+SPAWN_SECONDS = REGISTRY.register(
+    Histogram("bender_claude_spawn_seconds", "Time to spawn a Claude Code process.")
+)
+INVOCATION_SECONDS = REGISTRY.register(
+    Histogram("bender_claude_invocation_seconds", "Total Claude Code invocation time.")
+)
+QUEUE_WAIT_SECONDS = REGISTRY.register(
+    Histogram("bender_scheduler_queue_wait_seconds", "Time spent waiting for a free slot.")
+)
+TIMEOUTS = REGISTRY.register(
+    Counter("bender_claude_timeouts_total", "Claude Code invocations that timed out.")
+)
+NONZERO_EXITS = REGISTRY.register(
+    Counter("bender_claude_nonzero_exits_total", "Claude Code processes that exited non-zero.")
+)
+ERROR_RESPONSES = REGISTRY.register(
+    Counter("bender_claude_error_responses_total", "Claude Code results with is_error set.")
+)
+PROCESSES_RUNNING = REGISTRY.register(
+    Gauge("bender_claude_processes_running", "Claude Code processes currently alive.")
+)
+# Recorded where Claude Code runs; a front process adds in its executors' values
+PROCESS_METRICS = (
+    SPAWN_SECONDS.name, TIMEOUTS.name, NONZERO_EXITS.name, PROCESSES_RUNNING.name,
+)
+
+# Sessions and Slack
+ACTIVE_SESSIONS = REGISTRY.register(
+    Gauge("bender_active_sessions", "Slack threads with a tracked Claude Code session.")
+)
+SESSION_LRU_EVICTIONS = REGISTRY.register(
+    Counter("bender_session_lru_evictions_total", "Sessions evicted to stay under max entries.")
+)
+SESSION_TTL_EVICTIONS = REGISTRY.register(
+    Counter("bender_session_ttl_evictions_total", "Sessions expired after being idle too long.")
+)
+SESSION_MIGRATIONS = REGISTRY.register(
+    Counter("bender_session_migrations_total", "Session transcripts moved between executors.")
+)
+SESSION_MIGRATION_FAILURES = REGISTRY.register(
+    Counter(
+        "bender_session_migration_failures_total",
+        "Sessions reassigned without their transcript (history lost).",
+    )
+)
+SLACK_EVENT_DUPLICATES = REGISTRY.register(
+    Counter("bender_slack_event_duplicates_total", "Redelivered Slack events that were dropped.")
+)
+SLACK_RATE_LIMITED = REGISTRY.register(
+    Counter("bender_slack_rate_limited_total", "Slack Web API calls rejected with HTTP 429.")
+)
+ADMISSION_REJECTIONS = REGISTRY.register(
+    Counter(
+        "bender_admission_rejections_total", "Invocations turned away because the queue was full."
+    )
+)
+IDEMPOTENT_REPLAYS = REGISTRY.register(
+    Counter("bender_idempotent_replays_total", "API requests answered from an earlier run.")
+)
+WEBHOOK_FAILURES = REGISTRY.register(
+    Counter("bender_webhook_failures_total", "Completion webhooks abandoned after retries.")
+)
+SLACK_POST_SECONDS = REGISTRY.register(
+    Histogram("bender_slack_post_message_seconds", "Latency of Slack chat.postMessage calls.")
+)
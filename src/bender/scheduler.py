@@ -0,0 +1,210 @@
+"""Invocation scheduler — bounds how many Claude Code processes run at once."""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing, asynccontextmanager
+from pathlib import Path
+
+from bender.claude_code import (
+    DEFAULT_TIMEOUT_SECONDS,
+    ClaudeCodeError,
+    ClaudeEvent,
+    ClaudeResponse,
+    ResultEvent,
+    collect_response,
+    stream_claude,
+)
+from bender.metrics import (
+    ADMISSION_REJECTIONS,
+    ERROR_RESPONSES,
+    INVOCATION_SECONDS,
+    QUEUE_WAIT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Signature shared by stream_claude and any drop-in replacement backend
+StreamFn = Callable[..., AsyncIterator[ClaudeEvent]]
+
+# Called with the 1-based queue position when an invocation has to wait
+QueuedCallback = Callable[[int], Awaitable[None]]
+
+# Assumed run time before any invocation has completed
+DEFAULT_RUN_SECONDS = 30.0
+
+
+class SchedulerFullError(ClaudeCodeError):
+    """Raised when the invocation queue is full and new work is rejected.
+
+    ``retry_after`` estimates how many seconds until there is room again.
+    """
+
+    def __init__(self, message: str, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InvocationScheduler:
+    """Owns every Claude Code invocation and caps how many run concurrently.
+
+    At most ``max_concurrency`` invocations run at a time. Further requests
+    wait in FIFO order, up to ``max_queue`` of them; beyond that new work is
+    rejected with SchedulerFullError instead of spawning another process.
+    """
+
+    def __init__(
+        self,
+        workspace: Path,
+        max_concurrency: int = 4,
+        max_queue: int = 32,
+        timeout: int = DEFAULT_TIMEOUT_SECONDS,
+        stream_fn: StreamFn = stream_claude,
+    ) -> None:
+        self.workspace = workspace
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._stream_fn = stream_fn
+        # asyncio.Semaphore wakes waiters in FIFO order
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.in_flight = 0
+        self.queued = 0
+        self.started = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_queue_wait = 0.0
+        self.total_run_time = 0.0
+
+    @property
+    def is_full(self) -> bool:
+        """Whether every slot is busy and the queue is at its limit."""
+        return self._semaphore.locked() and self.queued >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Estimate the seconds until a newly queued invocation would start.
+
+        Based on the average run time so far and how many rounds of
+        ``max_concurrency`` invocations are ahead of it in the queue.
+        """
+        avg_run = self.total_run_time / self.completed if self.completed else DEFAULT_RUN_SECONDS
+        rounds = math.ceil((self.queued + 1) / self.max_concurrency)
+        return max(1, math.ceil(min(avg_run * rounds, self.timeout)))
+
+    def admit(self) -> None:
+        """Check there is room for another invocation, without reserving it.
+
+        Lets callers turn work away before doing anything visible for it.
+
+        Raises:
+            SchedulerFullError: If the queue is full.
+        """
+        if self.is_full:
+            self.rejected += 1
+            ADMISSION_REJECTIONS.inc()
+            raise SchedulerFullError(
+                f"Invocation queue is full ({self.queued} waiting)",
+                retry_after=self.retry_after(),
+            )
+
+    @asynccontextmanager
+    async def _slot(self, on_queued: QueuedCallback | None = None) -> AsyncIterator[None]:
+        """Wait for a free execution slot, recording queue and run time."""
+        self.admit()
+
+        enqueued_at = time.monotonic()
+        must_wait = self._semaphore.locked()
+        self.queued += 1
+        try:
+            if must_wait and on_queued is not None:
+                await on_queued(self.queued)
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        queue_wait = time.monotonic() - enqueued_at
+        self.total_queue_wait += queue_wait
+        QUEUE_WAIT_SECONDS.observe(queue_wait)
+        if queue_wait >= 1:
+            logger.info("Invocation waited %.1fs for a free slot", queue_wait)
+
+        self.started += 1
+        self.in_flight += 1
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            run_time = time.monotonic() - started_at
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_run_time += run_time
+            INVOCATION_SECONDS.observe(run_time)
+            self._semaphore.release()
+
+    async def stream(
+        self,
+        prompt: str,
+        session_id: str | None = None,
+        resume: bool = False,
+        on_queued: QueuedCallback | None = None,
+        thread_ts: str | None = None,
+    ) -> AsyncIterator[ClaudeEvent]:
+        """Run Claude Code once a slot is free, yielding its events.
+
+        The slot is held until the stream is exhausted or closed. If every
+        slot is busy, ``on_queued`` is awaited with the queue position
+        before waiting. ``thread_ts`` names the Slack thread the turn
+        belongs to, letting the backend keep a thread on one executor.
+
+        Raises:
+            SchedulerFullError: If the queue is full.
+            ClaudeCodeError: If the CLI invocation fails.
+        """
+        async with self._slot(on_queued):
+            events = self._stream_fn(
+                prompt,
+                self.workspace,
+                session_id=session_id,
+                resume=resume,
+                timeout=self.timeout,
+                thread_ts=thread_ts,
+            )
+            # Close the backend stream (and its process) before releasing the slot
+            async with aclosing(events):
+                async for event in events:
+                    if isinstance(event, ResultEvent) and event.response.is_error:
+                        ERROR_RESPONSES.inc()
+                    yield event
+
+    async def run(
+        self,
+        prompt: str,
+        session_id: str | None = None,
+        resume: bool = False,
+        thread_ts: str | None = None,
+    ) -> ClaudeResponse:
+        """Run Claude Code once a slot is free and return the final response."""
+        return await collect_response(
+            self.stream(prompt, session_id=session_id, resume=resume, thread_ts=thread_ts)
+        )
+
+    def stats(self) -> dict:
+        """Return a snapshot of queue and run-time accounting."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "started": self.started,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_queue_wait_seconds": (
+                self.total_queue_wait / self.started if self.started else 0.0
+            ),
+            "avg_run_time_seconds": (
+                self.total_run_time / self.completed if self.completed else 0.0
+            ),
+        }
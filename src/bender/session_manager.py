@@ -1,22 +1,185 @@
 """Session manager — maps Slack threads to Claude Code sessions."""
 
+import asyncio
 import logging
+import time
 import uuid
+import zlib
 from asyncio import Lock
+from collections import OrderedDict
+
+from bender.metrics import SESSION_LRU_EVICTIONS, SESSION_TTL_EVICTIONS
+from bender.session_store import SessionRecord, SessionStore
 
 logger = logging.getLogger(__name__)
 
 
+# Number of write locks; writes to different threads rarely share one
+DEFAULT_LOCK_STRIPES = 64
+
+# Seconds a thread missing from a shared store is not looked up again
+DEFAULT_MISS_TTL = 5.0
+
+# Most threads remembered as missing from a shared store
+MAX_CACHED_MISSES = 10000
+
+
 class SessionManager:
     """Thread-safe mapping between Slack thread timestamps and Claude Code session IDs.
 
     Each Slack thread maps to exactly one Claude Code session,
     enabling multi-turn conversations with context preserved.
+    Mappings are written through to an optional SessionStore so they
+    survive restarts; call ``start()`` to load them back.
+
+    The map is bounded: beyond ``max_entries`` the least recently used
+    thread is evicted, and threads idle for longer than ``idle_ttl``
+    seconds are removed by a background sweeper. Zero disables either limit.
+
+    Reads never take a lock: everything runs on one event loop and no
+    read or map mutation awaits in between, so lookups are atomic. Writes
+    are serialized per thread through a fixed set of striped locks, so
+    unrelated threads never wait on each other.
+
+    With ``read_through`` the store is shared by several replicas: a
+    thread missing from the map is looked up in the store, so a reply can
+    reach a replica other than the one that saw the mention. Evicting a
+    thread then only drops the local copy, and idle threads are pruned
+    from the store by their last turn rather than by local use. A thread
+    the store does not have is remembered as missing for ``miss_ttl``
+    seconds, so chatter in untracked threads does not query it each time.
     """
 
-    def __init__(self) -> None:
-        self._sessions: dict[str, str] = {}
-        self._lock = Lock()
+    def __init__(
+        self,
+        store: SessionStore | None = None,
+        max_entries: int = 0,
+        idle_ttl: float = 0,
+        sweep_interval: float = 60.0,
+        lock_stripes: int = DEFAULT_LOCK_STRIPES,
+        read_through: bool = False,
+        miss_ttl: float = DEFAULT_MISS_TTL,
+    ) -> None:
+        # Ordered least recently used first
+        self._sessions: OrderedDict[str, SessionRecord] = OrderedDict()
+        self._locks = [Lock() for _ in range(lock_stripes)]
+        self._store = store if store is not None else SessionStore()
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.read_through = read_through
+        self.miss_ttl = miss_ttl
+        # Threads known to be missing from the shared store, with when that expires
+        self._misses: OrderedDict[str, float] = OrderedDict()
+        self.evictions = {"lru": 0, "ttl": 0}
+        self._sweeper: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Load persisted sessions and start background writing and sweeping."""
+        loaded = await self._store.load()
+        # Sessions created before start() win over stale persisted ones
+        for thread_ts, record in self._sessions.items():
+            loaded.pop(thread_ts, None)
+            loaded[thread_ts] = record
+        self._sessions = OrderedDict(loaded)
+        self._evict_expired()
+        self._evict_overflow()
+        await self._store.start()
+        if self.idle_ttl > 0 and self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def close(self) -> None:
+        """Stop the sweeper, flush pending writes and close the store."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        await self._store.close()
+
+    def store_status(self) -> dict:
+        """Health of the persistence backend."""
+        return self._store.status()
+
+    def __len__(self) -> int:
+        """Number of tracked threads."""
+        return len(self._sessions)
+
+    def _lock_for(self, thread_ts: str) -> Lock:
+        """Return the write lock stripe guarding a thread."""
+        return self._locks[zlib.crc32(thread_ts.encode()) % len(self._locks)]
+
+    def _remove(self, thread_ts: str, reason: str) -> None:
+        del self._sessions[thread_ts]
+        if not self.read_through:
+            # A shared store still serves the thread to other replicas
+            self._store.delete(thread_ts)
+        self.evictions[reason] += 1
+        (SESSION_LRU_EVICTIONS if reason == "lru" else SESSION_TTL_EVICTIONS).inc()
+
+    def _evict_overflow(self) -> None:
+        if self.max_entries <= 0:
+            return
+        while len(self._sessions) > self.max_entries:
+            self._remove(next(iter(self._sessions)), "lru")
+
+    def _evict_expired(self) -> int:
+        if self.idle_ttl <= 0:
+            return 0
+        cutoff = time.time() - self.idle_ttl
+        expired = 0
+        # LRU order means expired entries are all at the front
+        while self._sessions:
+            thread_ts, record = next(iter(self._sessions.items()))
+            if record.last_used >= cutoff:
+                break
+            self._remove(thread_ts, "ttl")
+            expired += 1
+        return expired
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            expired = self._evict_expired()
+            if self.read_through:
+                expired += await self._store.prune(time.time() - self.idle_ttl)
+            if expired:
+                logger.info("Expired %d idle sessions", expired)
+
+    async def _lookup(self, thread_ts: str) -> SessionRecord | None:
+        """Record from the map, falling back to a shared store on a miss."""
+        record = self._sessions.get(thread_ts)
+        if record is not None or not self.read_through:
+            return record
+        missing_until = self._misses.get(thread_ts)
+        if missing_until is not None:
+            if missing_until > time.monotonic():
+                return None
+            del self._misses[thread_ts]
+        stored = await self._store.get(thread_ts)
+        expired = self.idle_ttl > 0 and stored is not None and (
+            stored.last_used < time.time() - self.idle_ttl
+        )
+        if expired:
+            # Idle past the TTL; the next prune deletes it
+            stored = None
+        # Another task may have created the thread while the store was read
+        record = self._sessions.get(thread_ts)
+        if record is None and stored is not None:
+            record = stored
+            self._sessions[thread_ts] = record
+            self._evict_overflow()
+        elif record is None and self.miss_ttl > 0:
+            self._misses[thread_ts] = time.monotonic() + self.miss_ttl
+            self._misses.move_to_end(thread_ts)
+            if len(self._misses) > MAX_CACHED_MISSES:
+                self._misses.popitem(last=False)
+        return record
+
+    def _store_record(self, thread_ts: str, record: SessionRecord) -> None:
+        self._misses.pop(thread_ts, None)
+        self._sessions[thread_ts] = record
+        self._sessions.move_to_end(thread_ts)
+        self._store.put(thread_ts, record)
+        self._evict_overflow()
 
     async def create_session(self, thread_ts: str) -> str:
         """Create a new session for a Slack thread.
@@ -28,8 +191,8 @@ class SessionManager:
             The newly generated session ID.
         """
         session_id = str(uuid.uuid4())
-        async with self._lock:
-            self._sessions[thread_ts] = session_id
+        async with self._lock_for(thread_ts):
+            self._store_record(thread_ts, SessionRecord(session_id))
         logger.info("Created session %s for thread %s", session_id, thread_ts)
         return session_id
 
@@ -42,8 +205,16 @@ class SessionManager:
         Returns:
             The session ID, or None if no session exists for this thread.
         """
-        async with self._lock:
-            return self._sessions.get(thread_ts)
+        record = await self._lookup(thread_ts)
+        if record is None:
+            return None
+        record.last_used = time.time()
+        self._sessions.move_to_end(thread_ts)
+        return record.session_id
+
+    async def get_record(self, thread_ts: str) -> SessionRecord | None:
+        """Get the full session record for a Slack thread, if one exists."""
+        return await self._lookup(thread_ts)
 
     async def has_session(self, thread_ts: str) -> bool:
         """Check whether a Slack thread has an existing session.
@@ -54,8 +225,7 @@ class SessionManager:
         Returns:
             True if the thread has an associated session.
         """
-        async with self._lock:
-            return thread_ts in self._sessions
+        return await self._lookup(thread_ts) is not None
 
     async def set_session(self, thread_ts: str, session_id: str) -> None:
         """Explicitly set the session ID for a thread (e.g., from API-created sessions).
@@ -64,6 +234,81 @@ class SessionManager:
             thread_ts: The Slack thread timestamp identifier.
             session_id: The Claude Code session ID to associate.
         """
-        async with self._lock:
-            self._sessions[thread_ts] = session_id
+        async with self._lock_for(thread_ts):
+            record = self._sessions.get(thread_ts)
+            if record is None:
+                record = SessionRecord(session_id)
+            else:
+                record.session_id = session_id
+                record.last_used = time.time()
+            self._store_record(thread_ts, record)
         logger.info("Set session %s for thread %s", session_id, thread_ts)
+
+    async def record_turn(self, thread_ts: str) -> None:
+        """Mark a turn in the thread: bump its turn count and last-used time.
+
+        Args:
+            thread_ts: The Slack thread timestamp identifier.
+        """
+        async with self._lock_for(thread_ts):
+            record = self._sessions.get(thread_ts)
+            if record is None:
+                return
+            record.turn_count += 1
+            record.last_used = time.time()
+            self._store_record(thread_ts, record)
+
+    async def get_worker(self, thread_ts: str) -> str | None:
+        """Get the executor that holds the thread's session transcript, if any.
+
+        Args:
+            thread_ts: The Slack thread timestamp identifier.
+        """
+        record = await self._lookup(thread_ts)
+        return None if record is None else record.worker
+
+    async def set_worker(self, thread_ts: str, worker: str) -> None:
+        """Record which executor holds the thread's session transcript.
+
+        Args:
+            thread_ts: The Slack thread timestamp identifier.
+            worker: The executor's identifier (its socket path).
+        """
+        async with self._lock_for(thread_ts):
+            record = self._sessions.get(thread_ts)
+            if record is None or record.worker == worker:
+                return
+            previous, record.worker = record.worker, worker
+            # Ownership is not a use of the thread, so LRU order stays as is
+            self._store.put(thread_ts, record)
+        if previous is not None:
+            logger.info("Moved thread %s from executor %s to %s", thread_ts, previous, worker)
+
+    async def set_transcript_lost(self, thread_ts: str, lost: bool = True) -> None:
+        """Record whether the thread's transcript was lost when it changed executor.
+
+        A lost transcript is persisted with the record, so the thread's next
+        turn starts a fresh conversation even after a restart.
+
+        Args:
+            thread_ts: The Slack thread timestamp identifier.
+            lost: Whether the next turn must start without resuming.
+        """
+        async with self._lock_for(thread_ts):
+            record = self._sessions.get(thread_ts)
+            if record is None or record.transcript_lost == lost:
+                return
+            record.transcript_lost = lost
+            self._store.put(thread_ts, record)
+
+    async def workers(self) -> set[str]:
+        """Executors that own at least one tracked thread."""
+        return {record.worker for record in self._sessions.values() if record.worker is not None}
+
+    async def threads_on_worker(self, worker: str) -> list[tuple[str, str]]:
+        """List the (thread_ts, session_id) pairs owned by an executor."""
+        return [
+            (thread_ts, record.session_id)
+            for thread_ts, record in self._sessions.items()
+            if record.worker == worker
+        ]
@@ -0,0 +1,280 @@
+"""Session storage backends — persist thread → session mappings across restarts."""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class SessionRecord:
+    """Compact per-thread session entry."""
+
+    __slots__ = (
+        "session_id", "created_at", "last_used", "turn_count", "worker", "transcript_lost"
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        created_at: float | None = None,
+        last_used: float | None = None,
+        turn_count: int = 0,
+        worker: str | None = None,
+        transcript_lost: bool = False,
+    ) -> None:
+        now = time.time()
+        self.session_id = session_id
+        self.created_at = now if created_at is None else created_at
+        self.last_used = self.created_at if last_used is None else last_used
+        self.turn_count = turn_count
+        # Executor holding this session's transcript, once one has run it
+        self.worker = worker
+        # The transcript did not survive a move, so the next turn cannot resume
+        self.transcript_lost = transcript_lost
+
+    def __repr__(self) -> str:
+        return (
+            f"SessionRecord(session_id={self.session_id!r}, created_at={self.created_at}, "
+            f"last_used={self.last_used}, turn_count={self.turn_count}, worker={self.worker!r}, "
+            f"transcript_lost={self.transcript_lost})"
+        )
+
+
+class SessionStore:
+    """Storage backend interface for SessionManager.
+
+    The base implementation keeps nothing, so sessions live only in memory.
+    Writes go through ``put``/``delete``, which must not block the event
+    loop; persistent backends are expected to buffer and write in the
+    background.
+    """
+
+    async def load(self) -> dict[str, SessionRecord]:
+        """Return all stored records, least recently used first."""
+        return {}
+
+    async def get(self, thread_ts: str) -> SessionRecord | None:
+        """Return one stored record, e.g. one written by another replica."""
+        return None
+
+    def put(self, thread_ts: str, record: SessionRecord) -> None:
+        """Record a mapping (buffered, non-blocking)."""
+
+    def delete(self, thread_ts: str) -> None:
+        """Forget a mapping (buffered, non-blocking)."""
+
+    async def prune(self, cutoff: float) -> int:
+        """Delete records last used before ``cutoff``; return how many went."""
+        return 0
+
+    async def start(self) -> None:
+        """Start any background work (e.g. write-behind flushing)."""
+
+    async def flush(self) -> None:
+        """Write out any buffered changes."""
+
+    async def close(self) -> None:
+        """Flush and release resources."""
+
+    def status(self) -> dict:
+        """Report backend health, e.g. for readiness checks."""
+        return {"backend": "memory", "ok": True}
+
+
+# Columns added after the first schema version, with their SQL definitions
+_MIGRATED_COLUMNS = {
+    "created_at": "REAL NOT NULL DEFAULT 0",
+    "last_used": "REAL NOT NULL DEFAULT 0",
+    "turn_count": "INTEGER NOT NULL DEFAULT 0",
+    "worker": "TEXT",
+    "transcript_lost": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed store in WAL mode with batched write-behind.
+
+    ``put``/``delete`` only record the change in memory; a background task
+    writes pending changes in a single transaction every ``flush_interval``
+    seconds, or sooner once ``batch_size`` changes are pending. Database
+    I/O runs in a worker thread so it never blocks the event loop. Single
+    lookups (``get``) use their own connection, so in WAL mode they never
+    wait behind a batch being written.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 1.0, batch_size: int = 500) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # None marks a pending delete
+        self._pending: dict[str, SessionRecord | None] = {}
+        self._wakeup = asyncio.Event()
+        self._io_lock = asyncio.Lock()
+        self._read_lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+        self._closed = False
+        # Message of the last failed background flush, cleared by the next success
+        self.last_error: str | None = None
+        self._conn = self._connect()
+        self._read_conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " thread_ts TEXT PRIMARY KEY,"
+            " session_id TEXT NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+        for column, definition in _MIGRATED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} {definition}")
+        return conn
+
+    def _read_all(self) -> dict[str, SessionRecord]:
+        rows = self._conn.execute(
+            "SELECT thread_ts, session_id, created_at, last_used, turn_count, worker,"
+            " transcript_lost FROM sessions ORDER BY last_used"
+        )
+        return {row[0]: self._record(row[1:]) for row in rows}
+
+    @staticmethod
+    def _record(row: tuple) -> SessionRecord:
+        session_id, created_at, last_used, turn_count, worker, transcript_lost = row
+        return SessionRecord(
+            session_id, created_at, last_used, turn_count, worker, bool(transcript_lost)
+        )
+
+    def _read_one(self, thread_ts: str) -> SessionRecord | None:
+        row = self._read_conn.execute(
+            "SELECT session_id, created_at, last_used, turn_count, worker, transcript_lost"
+            " FROM sessions WHERE thread_ts = ?",
+            (thread_ts,),
+        ).fetchone()
+        return None if row is None else self._record(row)
+
+    def _delete_idle(self, cutoff: float) -> int:
+        with self._conn:
+            return self._conn.execute(
+                "DELETE FROM sessions WHERE last_used < ?", (cutoff,)
+            ).rowcount
+
+    def _write_batch(
+        self,
+        upserts: list[tuple[str, str, float, float, int, str | None, int]],
+        deletes: list[tuple[str]],
+    ) -> None:
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sessions"
+                " (thread_ts, session_id, created_at, last_used, turn_count, worker,"
+                " transcript_lost) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                upserts,
+            )
+            self._conn.executemany("DELETE FROM sessions WHERE thread_ts = ?", deletes)
+
+    async def load(self) -> dict[str, SessionRecord]:
+        async with self._io_lock:
+            sessions = await asyncio.to_thread(self._read_all)
+        logger.info("Loaded %d sessions from %s", len(sessions), self.path)
+        return sessions
+
+    async def get(self, thread_ts: str) -> SessionRecord | None:
+        if thread_ts in self._pending:
+            return self._pending[thread_ts]
+        async with self._read_lock:
+            return await asyncio.to_thread(self._read_one, thread_ts)
+
+    async def prune(self, cutoff: float) -> int:
+        # Write pending turns first so their fresh last_used is what gets compared
+        await self.flush()
+        async with self._io_lock:
+            return await asyncio.to_thread(self._delete_idle, cutoff)
+
+    def _mark(self, thread_ts: str, record: SessionRecord | None) -> None:
+        self._pending[thread_ts] = record
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def put(self, thread_ts: str, record: SessionRecord) -> None:
+        self._mark(thread_ts, record)
+
+    def delete(self, thread_ts: str) -> None:
+        self._mark(thread_ts, None)
+
+    async def _flush_loop(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error as exc:
+                logger.error("Failed to persist sessions to %s: %s", self.path, exc)
+                self.last_error = str(exc)
+            else:
+                self.last_error = None
+
+    async def start(self) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = {}
+        # Snapshot record fields now; records keep changing in memory
+        upserts = [
+            (
+                ts,
+                rec.session_id,
+                rec.created_at,
+                rec.last_used,
+                rec.turn_count,
+                rec.worker,
+                int(rec.transcript_lost),
+            )
+            for ts, rec in batch.items()
+            if rec is not None
+        ]
+        deletes = [(ts,) for ts, rec in batch.items() if rec is None]
+        async with self._io_lock:
+            try:
+                await asyncio.to_thread(self._write_batch, upserts, deletes)
+            except sqlite3.Error:
+                # Put the batch back unless newer changes arrived meanwhile
+                for thread_ts, record in batch.items():
+                    self._pending.setdefault(thread_ts, record)
+                raise
+
+    def status(self) -> dict:
+        return {
+            "backend": "sqlite",
+            "ok": self.last_error is None,
+            "pending_writes": len(self._pending),
+            "error": self.last_error,
+        }
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._flusher is not None:
+            # Let the flusher finish its current write rather than cancelling mid-I/O
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+        await self.flush()
+        async with self._io_lock:
+            self._conn.close()
+        async with self._read_lock:
+            self._read_conn.close()
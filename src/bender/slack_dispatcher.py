@@ -0,0 +1,234 @@
+"""Outbound Slack dispatcher — rate-limited, ordered delivery of Web API calls."""
+
+import asyncio
+import logging
+import time
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
+
+from bender.metrics import SLACK_POST_SECONDS, SLACK_RATE_LIMITED
+from bender.slack_utils import SLACK_MSG_LIMIT, snippet_head, split_text
+
+logger = logging.getLogger(__name__)
+
+# Slack allows about one message per second per channel, with short bursts
+DEFAULT_CHANNEL_RATE = 1.0
+DEFAULT_CHANNEL_BURST = 3
+DEFAULT_MAX_BACKLOG = 1000
+DEFAULT_MAX_RETRIES = 3
+
+# Used when a 429 arrives without a usable Retry-After header
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+
+# Web API methods that accept thread_ts themselves
+_THREADED_METHODS = {"chat_postMessage", "files_upload_v2"}
+
+SNIPPET_FILENAME = "response.md"
+SNIPPET_TITLE = "Full response"
+
+
+class SlackBacklogFullError(Exception):
+    """Raised when too many outbound Slack calls are already waiting."""
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` (e.g. after a 429)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        # Waiters queue on the lock, so tokens are handed out in FIFO order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class SlackDispatcher:
+    """Single path for outbound Slack Web API calls.
+
+    Every call waits for a token from its channel's bucket, so bursts of
+    chunked messages are paced to Slack's per-channel limit. Calls for the
+    same thread are delivered strictly in submission order. A 429 pauses
+    the channel for the ``Retry-After`` period and the call is retried up
+    to ``max_retries`` times. At most ``max_backlog`` calls may be waiting;
+    beyond that ``SlackBacklogFullError`` is raised immediately.
+    """
+
+    def __init__(
+        self,
+        client: AsyncWebClient,
+        rate: float = DEFAULT_CHANNEL_RATE,
+        burst: int = DEFAULT_CHANNEL_BURST,
+        max_backlog: int = DEFAULT_MAX_BACKLOG,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ) -> None:
+        self.client = client
+        self.rate = rate
+        self.burst = burst
+        self.max_backlog = max_backlog
+        self.max_retries = max_retries
+        self._buckets: dict[str, TokenBucket] = {}
+        # Per-thread FIFO locks with a count of callers holding or waiting on each
+        self._threads: dict[tuple[str, str | None], tuple[asyncio.Lock, int]] = {}
+        self.backlog = 0
+        self.rate_limited = 0
+
+    def _bucket(self, channel: str) -> TokenBucket:
+        bucket = self._buckets.get(channel)
+        if bucket is None:
+            bucket = self._buckets[channel] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def call(
+        self, method: str, channel: str, thread_ts: str | None = None, **kwargs
+    ):
+        """Send a Web API call, paced and ordered per channel and thread.
+
+        Args:
+            method: AsyncWebClient method name, e.g. ``"chat_postMessage"``.
+            channel: Channel the call targets; selects the rate-limit bucket.
+            thread_ts: Thread the call belongs to; calls in one thread are
+                delivered in order. Only forwarded to methods that take it.
+            **kwargs: Remaining arguments for the client method.
+
+        Raises:
+            SlackBacklogFullError: If ``max_backlog`` calls are already waiting.
+            SlackApiError: If Slack rejects the call, or keeps rate limiting it.
+        """
+        if self.backlog >= self.max_backlog:
+            raise SlackBacklogFullError(
+                f"Outbound Slack backlog is full ({self.backlog} waiting)"
+            )
+        if method in _THREADED_METHODS and thread_ts is not None:
+            kwargs["thread_ts"] = thread_ts
+
+        key = (channel, thread_ts)
+        lock, users = self._threads.get(key, (asyncio.Lock(), 0))
+        self._threads[key] = (lock, users + 1)
+        self.backlog += 1
+        try:
+            async with lock:
+                return await self._send(method, channel, kwargs)
+        finally:
+            self.backlog -= 1
+            lock, users = self._threads[key]
+            if users == 1:
+                del self._threads[key]
+            else:
+                self._threads[key] = (lock, users - 1)
+
+    async def _send(self, method: str, channel: str, kwargs: dict):
+        bucket = self._bucket(channel)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            try:
+                request = getattr(self.client, method)(channel=channel, **kwargs)
+                if method != "chat_postMessage":
+                    return await request
+                # The latency histogram covers new messages only, not edits or uploads
+                with SLACK_POST_SECONDS.time():
+                    return await request
+            except SlackApiError as exc:
+                if exc.response.status_code != 429 or attempt == self.max_retries:
+                    raise
+                retry_after = _retry_after(exc)
+                self.rate_limited += 1
+                SLACK_RATE_LIMITED.inc()
+                logger.warning(
+                    "Slack rate limited %s in %s, retrying in %.1fs", method, channel, retry_after
+                )
+                bucket.pause(retry_after)
+
+    async def chat_postMessage(  # noqa: N802
+        self, channel: str, thread_ts: str | None = None, **kwargs
+    ):
+        """Post a message (in a thread, if ``thread_ts`` is given)."""
+        return await self.call("chat_postMessage", channel, thread_ts, **kwargs)
+
+    async def chat_update(self, channel: str, ts: str, thread_ts: str | None = None, **kwargs):
+        """Edit a message; ``thread_ts`` only orders it with the thread's other calls."""
+        return await self.call("chat_update", channel, thread_ts, ts=ts, **kwargs)
+
+    async def chat_delete(self, channel: str, ts: str, thread_ts: str | None = None, **kwargs):
+        """Delete a message; ``thread_ts`` only orders it with the thread's other calls."""
+        return await self.call("chat_delete", channel, thread_ts, ts=ts, **kwargs)
+
+    async def files_upload_v2(self, channel: str, thread_ts: str | None = None, **kwargs):
+        """Upload a file to the channel (in a thread, if ``thread_ts`` is given)."""
+        return await self.call("files_upload_v2", channel, thread_ts, **kwargs)
+
+    async def upload_snippet(self, channel: str, thread_ts: str, text: str) -> bool:
+        """Upload text as a snippet in the thread.
+
+        Returns:
+            True on success; False if Slack rejected the upload (e.g. the
+            app lacks ``files:write``), so the caller can fall back to messages.
+        """
+        try:
+            await self.files_upload_v2(
+                channel=channel,
+                thread_ts=thread_ts,
+                content=text,
+                filename=SNIPPET_FILENAME,
+                title=SNIPPET_TITLE,
+            )
+        except SlackApiError as exc:
+            logger.warning("Snippet upload failed, posting as messages: %s", exc)
+            return False
+        return True
+
+    async def post_text(
+        self,
+        channel: str,
+        thread_ts: str,
+        text: str,
+        snippet_threshold: int = 0,
+        limit: int = SLACK_MSG_LIMIT,
+    ) -> None:
+        """Post text in a thread, as a head plus snippet if longer than ``snippet_threshold``.
+
+        Below the threshold (or if it is 0) the text is split into messages.
+        """
+        if snippet_threshold and len(text) > snippet_threshold:
+            if await self.upload_snippet(channel, thread_ts, text):
+                await self.chat_postMessage(
+                    channel=channel, thread_ts=thread_ts, text=snippet_head(text, limit)
+                )
+                return
+        for chunk in split_text(text, limit):
+            await self.chat_postMessage(channel=channel, thread_ts=thread_ts, text=chunk)
+
+
+def _retry_after(exc: SlackApiError) -> float:
+    """Seconds to wait according to a 429 response's Retry-After header."""
+    headers = exc.response.headers or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
@@ -2,49 +2,132 @@
 
 import logging
 import re
+from contextlib import aclosing
 
 from slack_bolt.async_app import AsyncApp
+from slack_sdk.errors import SlackApiError
 
-from bender.claude_code import ClaudeCodeError, invoke_claude
+from bender.claude_code import ClaudeCodeError, ClaudeResponse, ResultEvent, TextDelta
 from bender.config import Settings
+from bender.event_dedup import EventDeduplicator, event_key
+from bender.scheduler import InvocationScheduler, SchedulerFullError
 from bender.session_manager import SessionManager
-from bender.slack_utils import SLACK_MSG_LIMIT, split_text
+from bender.slack_dispatcher import SlackBacklogFullError, SlackDispatcher
+from bender.slack_progress import ProgressiveReply
+from bender.slack_utils import TRUNCATED_NOTICE
+from bender.thread_queue import ThreadQueue
 
 logger = logging.getLogger(__name__)
 
+# Shown in place of the placeholder while a turn waits for a free slot
+QUEUED_TEXT = "_Busy, queued at position {position}..._"
 
-def register_handlers(app: AsyncApp, settings: Settings, sessions: SessionManager) -> None:
-    """Register Slack event handlers on the bolt app."""
+# Raised by the dispatcher when a reply cannot be delivered to Slack
+SLACK_ERRORS = (SlackBacklogFullError, SlackApiError)
+
+
+def register_handlers(
+    app: AsyncApp,
+    settings: Settings,
+    sessions: SessionManager,
+    scheduler: InvocationScheduler,
+    dedup: EventDeduplicator | None = None,
+    dispatcher: SlackDispatcher | None = None,
+) -> None:
+    """Register Slack event handlers on the bolt app.
+
+    All replies are sent through ``dispatcher`` rather than bolt's ``say``,
+    so they share the per-channel rate limits with the HTTP API.
+    """
+    threads = ThreadQueue()
+    dedup = dedup if dedup is not None else EventDeduplicator()
+    dispatcher = dispatcher or SlackDispatcher(app.client)
+
+    async def run_turn(channel: str, thread_ts: str, prompt: str, resume: bool) -> None:
+        """Invoke Claude Code for one turn, streaming its output into the thread.
+
+        Slack errors while replying are logged rather than raised, so they
+        never cost the thread its queued follow-up turns.
+        """
+        try:
+            scheduler.admit()
+        except SchedulerFullError as exc:
+            logger.warning("Rejecting Slack turn in thread=%s: %s", thread_ts, exc)
+            try:
+                await dispatcher.chat_postMessage(
+                    channel=channel, thread_ts=thread_ts, text=_busy_text(exc)
+                )
+            except SLACK_ERRORS as slack_exc:
+                logger.error("Could not post busy reply in thread=%s: %s", thread_ts, slack_exc)
+            return
+
+        reply = ProgressiveReply(
+            dispatcher,
+            channel,
+            thread_ts,
+            interval=settings.bender_stream_update_interval,
+            snippet_threshold=settings.bender_snippet_threshold,
+        )
+        try:
+            await reply.start()
+        except SLACK_ERRORS as exc:
+            # Run the turn anyway; the reply is posted fresh once there is output
+            logger.error("Could not post placeholder in thread=%s: %s", thread_ts, exc)
+        session_id = await sessions.get_session(thread_ts)
+        try:
+            try:
+                response = await _stream_turn(
+                    scheduler, reply, prompt, session_id, resume, thread_ts
+                )
+                if response.session_id and response.session_id != session_id:
+                    # The CLI (e.g. a warm pool worker) picked its own session ID
+                    await sessions.set_session(thread_ts, response.session_id)
+                await sessions.record_turn(thread_ts)
+                text = response.result
+                if response.truncated:
+                    text += TRUNCATED_NOTICE
+                await reply.finish(text)
+            except SchedulerFullError as exc:
+                logger.warning("Rejecting Slack turn in thread=%s: %s", thread_ts, exc)
+                await reply.fail(_busy_text(exc))
+            except ClaudeCodeError as exc:
+                logger.error("Claude Code invocation failed: %s", exc)
+                await reply.fail(f"Sorry, something went wrong: {exc}")
+        except SLACK_ERRORS as exc:
+            logger.error("Could not deliver reply in thread=%s: %s", thread_ts, exc)
 
     @app.event("app_mention")
-    async def handle_mention(event: dict, say) -> None:
+    async def handle_mention(event: dict, say, body: dict | None = None) -> None:
         """Handle new @Bender mentions — create session and invoke Claude Code."""
+        if dedup.is_duplicate(event_key(event, body)):
+            return
+
         text = _strip_mention(event.get("text", ""))
         thread_ts = event.get("ts", "")
         channel = event.get("channel", "")
 
         if not text.strip():
-            await say(text="How can I help?", thread_ts=thread_ts)
+            await dispatcher.chat_postMessage(
+                channel=channel, thread_ts=thread_ts, text="How can I help?"
+            )
             return
 
         logger.info("New mention in channel=%s thread=%s", channel, thread_ts)
 
-        session_id = await sessions.create_session(thread_ts)
+        await sessions.create_session(thread_ts)
 
-        try:
-            response = await invoke_claude(
-                prompt=text,
-                workspace=settings.bender_workspace,
-                session_id=session_id,
-            )
-            await _post_response(say, response.result, thread_ts)
-        except ClaudeCodeError as exc:
-            logger.error("Claude Code invocation failed: %s", exc)
-            await say(text=f"Sorry, something went wrong: {exc}", thread_ts=thread_ts)
+        await threads.submit(
+            thread_ts,
+            text,
+            lambda prompt, resume: run_turn(channel, thread_ts, prompt, resume),
+        )
 
     @app.event("message")
-    async def handle_message(event: dict, say) -> None:
+    async def handle_message(event: dict, say, body: dict | None = None) -> None:
         """Handle thread replies — resume existing session if one exists."""
+        if dedup.is_duplicate(event_key(event, body)):
+            return
+
         # Ignore bot messages to avoid loops
         if event.get("bot_id") or event.get("subtype"):
             return
@@ -54,8 +137,7 @@ def register_handlers(app: AsyncApp, settings: Settings, sessions: SessionManage
             # Not a thread reply, ignore
             return
 
-        session_id = await sessions.get_session(thread_ts)
-        if not session_id:
+        if not await sessions.has_session(thread_ts):
             # Thread not tracked by Bender, ignore
             return
 
@@ -66,17 +148,13 @@ def register_handlers(app: AsyncApp, settings: Settings, sessions: SessionManage
         channel = event.get("channel", "")
         logger.info("Thread reply in channel=%s thread=%s", channel, thread_ts)
 
-        try:
-            response = await invoke_claude(
-                prompt=text,
-                workspace=settings.bender_workspace,
-                session_id=session_id,
-                resume=True,
-            )
-            await _post_response(say, response.result, thread_ts)
-        except ClaudeCodeError as exc:
-            logger.error("Claude Code invocation failed: %s", exc)
-            await say(text=f"Sorry, something went wrong: {exc}", thread_ts=thread_ts)
+        # Replies that arrive while a turn is running are merged into one follow-up
+        await threads.submit(
+            thread_ts,
+            text,
+            lambda prompt, resume: run_turn(channel, thread_ts, prompt, resume),
+            resume=True,
+        )
 
 
 def _strip_mention(text: str) -> str:
@@ -84,12 +162,38 @@ def _strip_mention(text: str) -> str:
     return re.sub(r"<@[UBW][A-Z0-9]+>", "", text).strip()
 
 
-async def _post_response(say, text: str, thread_ts: str) -> None:
-    """Post a response in the thread, splitting if it exceeds Slack's limit."""
-    if len(text) <= SLACK_MSG_LIMIT:
-        await say(text=text, thread_ts=thread_ts)
-        return
+def _busy_text(exc: SchedulerFullError) -> str:
+    return f"Sorry, I'm busy right now ({exc}). Please try again in about {exc.retry_after}s."
 
-    chunks = split_text(text, SLACK_MSG_LIMIT)
-    for chunk in chunks:
-        await say(text=chunk, thread_ts=thread_ts)
+
+async def _stream_turn(
+    scheduler: InvocationScheduler,
+    reply: ProgressiveReply,
+    prompt: str,
+    session_id: str | None,
+    resume: bool,
+    thread_ts: str | None = None,
+) -> ClaudeResponse:
+    """Run one turn, forwarding streamed text to the reply, and return the result."""
+
+    async def on_queued(position: int) -> None:
+        try:
+            await reply.status(QUEUED_TEXT.format(position=position))
+        except SLACK_ERRORS as exc:
+            # Only cosmetic; the turn keeps its place in the queue
+            logger.warning("Could not show queue position in thread=%s: %s", thread_ts, exc)
+
+    events = scheduler.stream(
+        prompt=prompt,
+        session_id=session_id,
+        resume=resume,
+        on_queued=on_queued,
+        thread_ts=thread_ts,
+    )
+    async with aclosing(events):
+        async for event in events:
+            if isinstance(event, TextDelta):
+                await reply.append(event.text)
+            elif isinstance(event, ResultEvent):
+                return event.response
+    raise ClaudeCodeError("Claude Code finished without a result")
@@ -0,0 +1,150 @@
+"""Progressive Slack replies — a placeholder edited in place as output streams in."""
+
+import asyncio
+import logging
+import time
+
+from bender.slack_dispatcher import SlackDispatcher
+from bender.slack_utils import SLACK_MSG_LIMIT, snippet_head, split_text
+
+logger = logging.getLogger(__name__)
+
+# Posted in the thread as soon as a turn is accepted
+PLACEHOLDER_TEXT = "_Working on it..._"
+
+# Joins separate assistant text blocks while the run is still going
+PART_SEPARATOR = "\n\n"
+
+DEFAULT_UPDATE_INTERVAL = 1.0
+
+
+class ProgressiveReply:
+    """A thread reply that starts as a placeholder and grows as text streams in.
+
+    Streamed text is rendered with ``chat_update`` at most once every
+    ``interval`` seconds; text arriving sooner is rendered when the
+    interval is up, even if nothing else streams in by then. Rendering
+    streamed text happens in a background task, so ``append`` never waits
+    on Slack and a slow or rate-limited channel cannot stall reading the
+    CLI's output. All calls go through the dispatcher, which paces them per
+    channel and keeps them in thread order. Text beyond
+    ``limit`` characters rolls over into additional messages. ``finish``
+    replaces the streamed text with the final response, editing only the
+    messages whose content changed and deleting any it no longer needs.
+    A final response longer than ``snippet_threshold`` characters is
+    uploaded as a file snippet, leaving only its head in the thread.
+    """
+
+    def __init__(
+        self,
+        dispatcher: SlackDispatcher,
+        channel: str,
+        thread_ts: str,
+        interval: float = DEFAULT_UPDATE_INTERVAL,
+        limit: int = SLACK_MSG_LIMIT,
+        snippet_threshold: int = 0,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.channel = channel
+        self.thread_ts = thread_ts
+        self.interval = interval
+        self.limit = limit
+        self.snippet_threshold = snippet_threshold
+        self._parts: list[str] = []
+        # [ts, text] of each message posted so far, in thread order
+        self._messages: list[list[str]] = []
+        self._last_render = 0.0
+        # Deferred render of text that arrived inside the throttle interval
+        self._timer: asyncio.Task | None = None
+        self._render_lock = asyncio.Lock()
+        self._finished = False
+
+    @property
+    def text(self) -> str:
+        """Text streamed so far."""
+        return PART_SEPARATOR.join(self._parts)
+
+    async def start(self) -> None:
+        """Post the placeholder message."""
+        ts = await self._post(PLACEHOLDER_TEXT)
+        self._messages = [[ts, PLACEHOLDER_TEXT]]
+        self._last_render = time.monotonic()
+
+    async def status(self, text: str) -> None:
+        """Show a status line (e.g. queue position) until output arrives."""
+        if not self._parts:
+            await self._render(text)
+
+    async def append(self, text: str) -> None:
+        """Add streamed text and schedule a Slack update; never waits on Slack."""
+        if not text:
+            return
+        self._parts.append(text)
+        if self._timer is None:
+            wait = self._last_render + self.interval - time.monotonic()
+            self._timer = asyncio.create_task(self._render_later(max(wait, 0)))
+
+    async def _render_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            async with self._render_lock:
+                # Past this point the render runs to completion; finish() waits for
+                # it. Text appended from now on schedules the next render.
+                self._timer = None
+                if not self._finished:
+                    await self._write(self.text, final=False)
+        except Exception as exc:
+            logger.warning("Deferred update of reply in thread %s failed: %s", self.thread_ts, exc)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def finish(self, text: str) -> None:
+        """Replace the streamed output with the final text."""
+        self._cancel_timer()
+        if self.snippet_threshold and len(text) > self.snippet_threshold:
+            if await self.dispatcher.upload_snippet(self.channel, self.thread_ts, text):
+                text = snippet_head(text, self.limit)
+        await self._render(text, final=True)
+
+    async def fail(self, message: str) -> None:
+        """Finish with an error message, keeping any text already streamed."""
+        text = self.text
+        await self.finish(f"{text}{PART_SEPARATOR}{message}" if text else message)
+
+    async def _post(self, text: str) -> str:
+        result = await self.dispatcher.chat_postMessage(
+            channel=self.channel, thread_ts=self.thread_ts, text=text
+        )
+        return result["ts"]
+
+    async def _render(self, text: str, final: bool = False) -> None:
+        # One render at a time, so a deferred one cannot interleave with another
+        async with self._render_lock:
+            if self._finished:
+                return
+            self._finished = final
+            await self._write(text, final)
+
+    async def _write(self, text: str, final: bool) -> None:
+        chunks = split_text(text, self.limit) or [text]
+        for i, chunk in enumerate(chunks):
+            if i < len(self._messages):
+                message = self._messages[i]
+                if message[1] != chunk:
+                    await self.dispatcher.chat_update(
+                        channel=self.channel, ts=message[0], thread_ts=self.thread_ts, text=chunk
+                    )
+                    message[1] = chunk
+            else:
+                # Rolled past the last message's limit: continue in a new one
+                self._messages.append([await self._post(chunk), chunk])
+        if final:
+            for ts, _ in self._messages[len(chunks):]:
+                await self.dispatcher.chat_delete(
+                    channel=self.channel, ts=ts, thread_ts=self.thread_ts
+                )
+            del self._messages[len(chunks):]
+        self._last_render = time.monotonic()
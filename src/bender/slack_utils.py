@@ -1,18 +1,78 @@
 """Shared Slack utilities — message splitting and formatting."""
 
+import re
+from collections.abc import Iterator
+
 # Slack message character limit
 SLACK_MSG_LIMIT = 4000
 
+# Appended to responses whose output exceeded the configured byte cap
+TRUNCATED_NOTICE = "\n\n_(Output truncated: it exceeded the configured size limit.)_"
+
+# Ends the message shown above a response uploaded as a file snippet
+SNIPPET_NOTICE = "\n\n_(Full response attached as a snippet.)_"
+
+CODE_FENCE = "```"
+
+# A line opening or closing a Markdown code block, e.g. "```python"
+_FENCE_LINE = re.compile(r"^[ \t]*```[^\n]*", re.MULTILINE)
+
+
+def iter_chunks(text: str, max_length: int = SLACK_MSG_LIMIT) -> Iterator[str]:
+    """Yield chunks of at most ``max_length`` characters in a single pass.
+
+    Breaks at the last newline that fits, then at the last space or tab,
+    and only cuts mid-word when neither exists. Newlines at the start of a
+    chunk are dropped. A chunk that ends inside a ``` code block is closed
+    with a fence and the next chunk reopens it (with the same language tag),
+    so each message renders on its own.
+
+    The text is walked by index; only the emitted chunks are copied.
+    """
+    fences = [(m.start(), m.group().strip()) for m in _FENCE_LINE.finditer(text)]
+    closing = "\n" + CODE_FENCE
+    # Room kept for the closing fence whenever the text contains code blocks
+    reserve = len(closing) if fences else 0
+    next_fence = 0
+    open_fence: str | None = None
+    length = len(text)
+    pos = 0
+
+    while True:
+        while pos < length and text[pos] == "\n":
+            pos += 1
+        if pos >= length:
+            return
+
+        prefix = f"{open_fence}\n" if open_fence else ""
+        if length - pos <= max_length - len(prefix):
+            yield prefix + text[pos:]
+            return
+
+        end = pos + max(max_length - len(prefix) - reserve, 1)
+        split = text.rfind("\n", pos + 1, end)
+        resume = split
+        if split == -1:
+            split = max(text.rfind(" ", pos + 1, end), text.rfind("\t", pos + 1, end))
+            # Drop the space or tab the chunk was broken at
+            resume = split + 1
+        if split == -1:
+            split = resume = end
+
+        while next_fence < len(fences) and fences[next_fence][0] < split:
+            open_fence = None if open_fence else fences[next_fence][1]
+            next_fence += 1
+
+        yield prefix + text[pos:split] + (closing if open_fence else "")
+        pos = resume
+
 
 def split_text(text: str, max_length: int = SLACK_MSG_LIMIT) -> list[str]:
     """Split text into chunks, preferring to break at newlines."""
-    chunks: list[str] = []
-    while len(text) > max_length:
-        split_pos = text.rfind("\n", 0, max_length)
-        if split_pos == -1:
-            split_pos = max_length
-        chunks.append(text[:split_pos])
-        text = text[split_pos:].lstrip("\n")
-    if text:
-        chunks.append(text)
-    return chunks
+    return list(iter_chunks(text, max_length))
+
+
+def snippet_head(text: str, max_length: int = SLACK_MSG_LIMIT) -> str:
+    """First chunk of the text plus a pointer to the attached snippet."""
+    head = next(iter_chunks(text, max_length - len(SNIPPET_NOTICE)), "")
+    return head + SNIPPET_NOTICE
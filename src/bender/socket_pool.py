@@ -0,0 +1,64 @@
+"""Socket Mode connection pool — several WebSockets feeding one bolt app."""
+
+import asyncio
+import logging
+import time
+
+from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
+from slack_sdk.socket_mode.async_client import AsyncBaseSocketModeClient
+from slack_sdk.socket_mode.request import SocketModeRequest
+
+logger = logging.getLogger(__name__)
+
+
+class SocketModePool:
+    """Runs several Socket Mode connections for the same app token.
+
+    Slack spreads events across all open connections of an app, so while
+    one connection reconnects the others keep receiving, and intake is not
+    capped by a single WebSocket. Every handler dispatches into the same
+    bolt app, whose handlers share one EventDeduplicator; an event Slack
+    redelivers on a different connection is therefore still dropped.
+
+    Each connection's state and event count are tracked for ``/ready``.
+    """
+
+    def __init__(self, handlers: list[AsyncSocketModeHandler]) -> None:
+        self.handlers = handlers
+        self.events = [0] * len(handlers)
+        self.last_event_at: list[float | None] = [None] * len(handlers)
+        for index, handler in enumerate(handlers):
+            handler.client.socket_mode_request_listeners.append(self._counter(index))
+
+    def __len__(self) -> int:
+        """Number of connections."""
+        return len(self.handlers)
+
+    def _counter(self, index: int):
+        async def count(client: AsyncBaseSocketModeClient, request: SocketModeRequest) -> None:
+            self.events[index] += 1
+            self.last_event_at[index] = time.time()
+
+        return count
+
+    async def start_async(self) -> None:
+        """Open every connection and keep them running until cancelled."""
+        logger.info("Opening %d Slack Socket Mode connection(s)", len(self.handlers))
+        await asyncio.gather(*(handler.start_async() for handler in self.handlers))
+
+    async def close_async(self) -> None:
+        """Close every connection."""
+        for handler in self.handlers:
+            await handler.close_async()
+
+    async def status(self) -> list[dict]:
+        """Per-connection state: whether it is connected, and events received."""
+        return [
+            {
+                "index": index,
+                "connected": await handler.client.is_connected(),
+                "events": self.events[index],
+                "last_event_at": self.last_event_at[index],
+            }
+            for index, handler in enumerate(self.handlers)
+        ]
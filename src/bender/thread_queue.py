@@ -0,0 +1,97 @@
+"""Per-thread work queue — one Claude Code run per Slack thread at a time."""
+
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Separator used when several queued replies are merged into one prompt
+COALESCE_SEPARATOR = "\n\n"
+
+TurnFn = Callable[[str, bool], Awaitable[None]]
+
+
+class ThreadQueue:
+    """Serializes Claude Code turns per Slack thread and coalesces pending replies.
+
+    While a thread has a turn running, further messages for that thread are
+    buffered instead of starting a concurrent ``--resume`` against the same
+    session. When the running turn finishes, everything buffered is merged
+    into a single follow-up prompt, so N quick replies cost one extra run.
+    A turn that fails does not cost the thread its buffered replies: the
+    follow-up still runs, and the error is raised once the thread is idle.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, list[str]] = {}
+        self.coalesced = 0
+
+    def is_busy(self, thread_ts: str) -> bool:
+        """Check whether a turn is currently running for the thread."""
+        return thread_ts in self._pending
+
+    async def submit(
+        self,
+        thread_ts: str,
+        text: str,
+        run: TurnFn,
+        resume: bool = False,
+    ) -> bool:
+        """Run a turn for the thread, or buffer the text if one is already running.
+
+        Args:
+            thread_ts: The Slack thread timestamp identifier.
+            text: The message text for this turn.
+            run: Coroutine function called as ``run(prompt, resume)``.
+            resume: Whether the first turn resumes an existing session.
+                Follow-up turns always resume.
+
+        Returns:
+            True if this call ran the turn(s), False if the text was buffered
+            for the turn already running in the thread.
+
+        Raises:
+            Exception: The first error raised by ``run``, after every
+                buffered reply has had its turn.
+        """
+        if thread_ts in self._pending:
+            self._pending[thread_ts].append(text)
+            self.coalesced += 1
+            logger.info("Thread %s is busy, queued reply for the next turn", thread_ts)
+            return False
+
+        self._pending[thread_ts] = []
+        error: Exception | None = None
+        try:
+            prompt = text
+            while True:
+                try:
+                    await run(prompt, resume)
+                except Exception as exc:
+                    if self._pending[thread_ts]:
+                        logger.warning(
+                            "Turn for thread %s failed, running its queued replies: %s",
+                            thread_ts,
+                            exc,
+                        )
+                    error = error or exc
+                pending = self._pending[thread_ts]
+                if not pending:
+                    break
+                self._pending[thread_ts] = []
+                prompt = COALESCE_SEPARATOR.join(pending)
+                resume = True
+                logger.info(
+                    "Running follow-up turn for thread %s (%d coalesced replies)",
+                    thread_ts,
+                    len(pending),
+                )
+        finally:
+            dropped = self._pending.pop(thread_ts)
+            if dropped:
+                logger.warning(
+                    "Dropped %d queued replies for thread %s", len(dropped), thread_ts
+                )
+        if error is not None:
+            raise error
+        return True
@@ -0,0 +1,121 @@
+"""Completion webhooks — POST finished API jobs to caller-supplied URLs."""
+
+import asyncio
+import logging
+
+import aiohttp
+
+from bender.metrics import WEBHOOK_FAILURES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_SECONDS = 1.0
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_CLOSE_TIMEOUT_SECONDS = 30.0
+
+
+def _retryable(status: int) -> bool:
+    """Whether a response status is worth another attempt."""
+    return status == 429 or status >= 500
+
+
+class WebhookSender:
+    """Delivers JSON payloads over one shared, pooled aiohttp session.
+
+    At most ``concurrency`` requests are in flight at once (the
+    connector's pool is sized to match); a delivery waiting out its
+    backoff does not hold a slot. Connection errors, timeouts, 429s and
+    5xx responses are retried up to ``max_retries`` times with
+    exponential backoff starting at ``backoff`` seconds; other statuses
+    are final. ``close()`` waits up to ``close_timeout`` seconds for
+    pending deliveries and abandons the rest.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff: float = DEFAULT_BACKOFF_SECONDS,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        close_timeout: float = DEFAULT_CLOSE_TIMEOUT_SECONDS,
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.close_timeout = close_timeout
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self.delivered = 0
+        self.failed = 0
+
+    def _client(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _post(self, url: str, payload: dict) -> int:
+        """POST the payload once and return the HTTP status."""
+        async with self._client().post(url, json=payload) as response:
+            return response.status
+
+    async def deliver(self, url: str, payload: dict) -> bool:
+        """POST the payload, retrying with backoff.
+
+        Returns:
+            True if the endpoint accepted it (2xx/3xx), False otherwise.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Held per attempt only, so backoff sleeps leave the slot free
+                async with self._semaphore:
+                    status = await self._post(url, payload)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                outcome, retry = f"error: {exc}", True
+            else:
+                if status < 400:
+                    self.delivered += 1
+                    return True
+                outcome, retry = f"HTTP {status}", _retryable(status)
+            if not retry or attempt == self.max_retries:
+                break
+            delay = self.backoff * 2**attempt
+            logger.info("Webhook to %s failed (%s), retrying in %.1fs", url, outcome, delay)
+            await asyncio.sleep(delay)
+
+        self.failed += 1
+        WEBHOOK_FAILURES.inc()
+        logger.warning("Giving up on webhook to %s: %s", url, outcome)
+        return False
+
+    def submit(self, url: str, payload: dict) -> None:
+        """Deliver in the background; the task is kept until it finishes."""
+        task = asyncio.create_task(self.deliver(url, payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Wait for pending deliveries, then close the HTTP session.
+
+        Deliveries still pending after ``close_timeout`` seconds are
+        cancelled and counted as failed.
+        """
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=self.close_timeout)
+            if pending:
+                logger.warning("Abandoning %d webhook deliveries on shutdown", len(pending))
+                self.failed += len(pending)
+                WEBHOOK_FAILURES.inc(len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,299 @@
+"""Warm worker pool — pre-started Claude Code processes in streaming-input mode."""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from pathlib import Path
+
+from bender.claude_code import (
+    DEFAULT_MAX_OUTPUT_BYTES,
+    DEFAULT_MAX_STDERR_BYTES,
+    DEFAULT_TIMEOUT_SECONDS,
+    ClaudeCodeError,
+    ClaudeEvent,
+    ResultEvent,
+    StreamDecoder,
+    read_line,
+    stream_claude,
+)
+from bender.metrics import NONZERO_EXITS, PROCESSES_RUNNING, SPAWN_SECONDS, TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+# Bytes of stderr kept per worker for error messages
+STDERR_TAIL_BYTES = 4096
+
+
+class _Worker:
+    """A single long-lived ``claude`` process fed prompts over stdin."""
+
+    def __init__(
+        self, process: asyncio.subprocess.Process, session_id: str, max_output_bytes: int
+    ) -> None:
+        self.process = process
+        self.session_id = session_id
+        self.max_output_bytes = max_output_bytes
+        self.requests = 0
+        self._closed = False
+        self._stderr_tail = bytearray()
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def _drain_stderr(self) -> None:
+        while chunk := await self.process.stderr.read(STDERR_TAIL_BYTES):
+            self._stderr_tail += chunk
+            del self._stderr_tail[:-STDERR_TAIL_BYTES]
+
+    def _error_message(self) -> str:
+        return self._stderr_tail.decode(errors="replace").strip() or "Unknown error"
+
+    async def turn(self, prompt: str, timeout: int) -> AsyncIterator[ClaudeEvent]:
+        """Send one user message and yield events until its result arrives."""
+        self.requests += 1
+        message = {"type": "user", "message": {"role": "user", "content": prompt}}
+        try:
+            self.process.stdin.write(json.dumps(message).encode() + b"\n")
+            await self.process.stdin.drain()
+        except ConnectionError as exc:
+            # The process died after checkout (broken pipe / reset)
+            raise ClaudeCodeError(
+                f"Claude Code worker went away before the turn: {self._error_message()}"
+            ) from exc
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        decoder = StreamDecoder(self.session_id, self.max_output_bytes)
+        try:
+            while True:
+                try:
+                    chunk, complete = await asyncio.wait_for(
+                        read_line(self.process.stdout), max(deadline - loop.time(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    TIMEOUTS.inc()
+                    raise ClaudeCodeError(f"Claude Code timed out after {timeout}s")
+                if not chunk:
+                    await self.process.wait()
+                    if self.process.returncode != 0:
+                        NONZERO_EXITS.inc()
+                    raise ClaudeCodeError(
+                        f"Claude Code worker exited with code {self.process.returncode}: "
+                        f"{self._error_message()}"
+                    )
+                for event in decoder.feed(chunk, complete):
+                    yield event
+                    if isinstance(event, ResultEvent):
+                        return
+        finally:
+            decoder.close()
+
+    async def close(self, kill: bool = False) -> None:
+        """Stop the process, closing stdin first so it can exit cleanly."""
+        if self._closed:
+            return
+        self._closed = True
+        if self.alive and kill:
+            self.process.kill()
+            await self.process.wait()
+        elif self.alive:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        self._stderr_task.cancel()
+        PROCESSES_RUNNING.dec()
+
+
+class WorkerPool:
+    """Keeps Claude Code processes pre-started so new turns skip CLI bootstrap.
+
+    Up to ``size`` idle workers are kept warm, each already bound to a
+    fresh session ID. A new conversation takes an idle worker; the worker
+    then stays attached to that session so replies in the same thread
+    reuse the live process instead of paying for a ``--resume`` spawn.
+    Idle and attached workers together never exceed ``size``: an attached
+    worker takes the place of an idle one, and when the pool is over,
+    the least recently used attached worker is stopped first. Workers in
+    the middle of a turn are not counted. Workers are recycled after
+    ``max_requests`` turns or on any error. Requests that cannot be served
+    warm fall back to ``stream_claude``.
+    """
+
+    def __init__(
+        self,
+        workspace: Path,
+        size: int,
+        max_requests: int = 10,
+        max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+        max_stderr_bytes: int = DEFAULT_MAX_STDERR_BYTES,
+    ) -> None:
+        self.workspace = workspace
+        self.size = size
+        self.max_requests = max_requests
+        self.max_output_bytes = max_output_bytes
+        self.max_stderr_bytes = max_stderr_bytes
+        self._idle: list[_Worker] = []
+        self._attached: OrderedDict[str, _Worker] = OrderedDict()
+        self._spawning: set[asyncio.Task] = set()
+        self._closed = False
+
+        self.warm_hits = 0
+        self.cold_starts = 0
+        self.recycled = 0
+
+    async def _spawn(self) -> _Worker:
+        session_id = str(uuid.uuid4())
+        cmd = [
+            "claude",
+            "--print",
+            "--input-format", "stream-json",
+            "--output-format", "stream-json",
+            "--verbose",
+            "--session-id", session_id,
+        ]
+        try:
+            with SPAWN_SECONDS.time():
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=self.workspace,
+                    limit=self.max_output_bytes,
+                )
+        except FileNotFoundError:
+            raise ClaudeCodeError(
+                "Claude Code CLI not found. Ensure 'claude' is installed and in PATH."
+            )
+        PROCESSES_RUNNING.inc()
+        return _Worker(process, session_id, self.max_output_bytes)
+
+    async def _replenish(self) -> None:
+        try:
+            worker = await self._spawn()
+        except ClaudeCodeError as exc:
+            logger.error("Failed to start warm Claude Code worker: %s", exc)
+            return
+        if self._closed or self._warm() >= self.size:
+            await worker.close()
+        else:
+            self._idle.append(worker)
+
+    def _warm(self) -> int:
+        return len(self._idle) + len(self._attached)
+
+    def _schedule_replenish(self) -> None:
+        if self._closed or self._warm() + len(self._spawning) >= self.size:
+            return
+        task = asyncio.create_task(self._replenish())
+        self._spawning.add(task)
+        task.add_done_callback(self._spawning.discard)
+
+    async def start(self) -> None:
+        """Pre-start ``size`` idle workers."""
+        logger.info("Starting %d warm Claude Code workers", self.size)
+        for _ in range(self.size):
+            self._schedule_replenish()
+        await asyncio.gather(*self._spawning)
+
+    async def stop(self) -> None:
+        """Stop all workers, idle and attached."""
+        self._closed = True
+        for task in list(self._spawning):
+            task.cancel()
+        workers = self._idle + list(self._attached.values())
+        self._idle.clear()
+        self._attached.clear()
+        await asyncio.gather(*(worker.close() for worker in workers))
+
+    async def _checkout(self, session_id: str | None, resume: bool) -> _Worker | None:
+        if resume:
+            worker = self._attached.pop(session_id, None) if session_id else None
+        else:
+            worker = self._idle.pop() if self._idle else None
+            self._schedule_replenish()
+        if worker is not None and not worker.alive:
+            self.recycled += 1
+            # Reap it: stops its stderr reader and releases its process gauge
+            await worker.close()
+            return None
+        return worker
+
+    async def _checkin(self, worker: _Worker, healthy: bool) -> None:
+        if not healthy or not worker.alive or worker.requests >= self.max_requests:
+            self.recycled += 1
+            await worker.close(kill=not healthy)
+            self._schedule_replenish()
+            return
+        self._attached[worker.session_id] = worker
+        while self._warm() > self.size:
+            if len(self._attached) > 1:
+                _, evicted = self._attached.popitem(last=False)
+            elif self._idle:
+                evicted = self._idle.pop()
+            else:
+                del self._attached[worker.session_id]
+                evicted = worker
+            await evicted.close()
+
+    async def stream(
+        self,
+        prompt: str,
+        workspace: Path,
+        session_id: str | None = None,
+        resume: bool = False,
+        timeout: int = DEFAULT_TIMEOUT_SECONDS,
+        thread_ts: str | None = None,
+    ) -> AsyncIterator[ClaudeEvent]:
+        """Drop-in replacement for ``stream_claude`` that prefers warm workers.
+
+        A new conversation served by a warm worker reports the worker's own
+        session ID in its ResultEvent; callers must record that ID.
+        """
+        worker = await self._checkout(session_id, resume)
+        if worker is None:
+            self.cold_starts += 1
+            events = stream_claude(
+                prompt,
+                workspace,
+                session_id=session_id,
+                resume=resume,
+                timeout=timeout,
+                max_output_bytes=self.max_output_bytes,
+                max_stderr_bytes=self.max_stderr_bytes,
+                thread_ts=thread_ts,
+            )
+        else:
+            self.warm_hits += 1
+            events = worker.turn(prompt, timeout)
+
+        healthy = False
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    # Consumers may close the stream right after the result
+                    healthy = healthy or isinstance(event, ResultEvent)
+                    yield event
+        finally:
+            if worker is not None:
+                await self._checkin(worker, healthy)
+
+    def stats(self) -> dict:
+        """Return a snapshot of pool usage."""
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "attached": len(self._attached),
+            "warm_hits": self.warm_hits,
+            "cold_starts": self.cold_starts,
+            "recycled": self.recycled,
+        }
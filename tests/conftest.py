@@ -6,6 +6,7 @@ from unittest.mock import AsyncMock
 import pytest
 
 from bender.config import Settings
+from bender.scheduler import InvocationScheduler
 from bender.session_manager import SessionManager
 
 
@@ -28,6 +29,12 @@ def session_manager() -> SessionManager:
     return SessionManager()
 
 
+@pytest.fixture
+def scheduler(settings: Settings) -> InvocationScheduler:
+    """Create an InvocationScheduler bound to the test workspace."""
+    return InvocationScheduler(workspace=settings.bender_workspace)
+
+
 @pytest.fixture
 def mock_say() -> AsyncMock:
     """Create a mock Slack say function."""
@@ -1,6 +1,9 @@
 """Tests for the HTTP API endpoints module."""
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import FastAPI
@@ -9,9 +12,21 @@ from httpx import ASGITransport, AsyncClient
 from slack_sdk.errors import SlackApiError
 
 from bender.api import InvokeRequest, InvokeResponse, create_api
-from bender.claude_code import ClaudeCodeError, ClaudeResponse
+from bender.claude_code import (
+    ClaudeCodeError,
+    ClaudeEvent,
+    ClaudeResponse,
+    ResultEvent,
+    TextDelta,
+    ToolUse,
+)
 from bender.config import Settings
+from bender.idempotency import IdempotencyCache
+from bender.jobs import JobTable
+from bender.scheduler import InvocationScheduler, SchedulerFullError
 from bender.session_manager import SessionManager
+from bender.slack_dispatcher import SlackBacklogFullError
+from bender.socket_pool import SocketModePool
 
 
 @pytest.fixture
@@ -25,11 +40,12 @@ def settings_with_api_key(settings: Settings) -> Settings:
 def api_app(
     settings_with_api_key: Settings,
     session_manager: SessionManager,
+    scheduler: InvocationScheduler,
     mock_slack_client: AsyncMock,
 ):
     """Create a FastAPI app with API routes registered."""
     app = FastAPI()
-    create_api(app, mock_slack_client, settings_with_api_key, session_manager)
+    create_api(app, mock_slack_client, settings_with_api_key, session_manager, scheduler)
     return app
 
 
@@ -60,6 +76,134 @@ class TestHealthEndpoint:
         assert response.json() == {"status": "ok"}
 
 
+class TestReadyEndpoint:
+    """Tests for the GET /ready endpoint."""
+
+    @pytest.fixture
+    def socket_handlers(self) -> list[MagicMock]:
+        """Two Socket Mode handlers whose connection state the test controls."""
+        handlers = []
+        for _ in range(2):
+            handler = MagicMock()
+            handler.client.socket_mode_request_listeners = []
+            handler.client.is_connected = AsyncMock(return_value=True)
+            handlers.append(handler)
+        return handlers
+
+    @pytest.fixture
+    def ready_client(
+        self,
+        settings_with_api_key: Settings,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+        socket_handlers: list[MagicMock],
+    ) -> TestClient:
+        """Test client for an API that reports the mocked Socket Mode state."""
+        app = FastAPI()
+        create_api(
+            app,
+            mock_slack_client,
+            settings_with_api_key,
+            session_manager,
+            scheduler,
+            socket_pool=SocketModePool(socket_handlers),
+        )
+        return TestClient(app)
+
+    def test_ready_reports_components(self, ready_client: TestClient) -> None:
+        """An idle, connected replica is ready and reports each component."""
+        response = ready_client.get("/ready")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["slack"]["connected"] == 2
+        assert [c["connected"] for c in data["slack"]["connections"]] == [True, True]
+        assert data["invocations"]["in_flight"] == 0
+        assert data["invocations"]["queued"] == 0
+        assert data["session_store"]["ok"] is True
+
+    def test_ready_while_one_connection_reconnects(
+        self, ready_client: TestClient, socket_handlers: list[MagicMock]
+    ) -> None:
+        """One dropped connection is reported but the replica stays ready."""
+        socket_handlers[0].client.is_connected.return_value = False
+
+        response = ready_client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json()["slack"]["connected"] == 1
+        assert response.json()["slack"]["connections"][0]["connected"] is False
+
+    def test_not_ready_when_socket_disconnected(
+        self, ready_client: TestClient, socket_handlers: list[MagicMock]
+    ) -> None:
+        """With every Socket Mode connection down the replica is unready."""
+        for handler in socket_handlers:
+            handler.client.is_connected.return_value = False
+
+        response = ready_client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "not_ready"
+        assert response.json()["slack"]["connected"] == 0
+
+    def test_not_ready_when_saturated(
+        self, ready_client: TestClient, scheduler: InvocationScheduler
+    ) -> None:
+        """Every slot busy and the queue at its limit makes the replica unready."""
+        scheduler.in_flight = scheduler.max_concurrency
+        scheduler.queued = scheduler.max_queue
+
+        response = ready_client.get("/ready")
+
+        assert response.status_code == 503
+        assert "saturated" in response.json()["problems"][0]
+
+    def test_not_ready_when_store_failing(
+        self, ready_client: TestClient, session_manager: SessionManager
+    ) -> None:
+        """A session store that cannot persist makes the replica unready."""
+        with patch.object(
+            session_manager, "store_status", return_value={"backend": "sqlite", "ok": False}
+        ):
+            response = ready_client.get("/ready")
+
+        assert response.status_code == 503
+
+    def test_ready_without_socket_pool(self, client: TestClient) -> None:
+        """Without Socket Mode connections (HTTP events mode) the Slack check is skipped."""
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["slack"] is None
+
+
+class TestMetricsEndpoint:
+    """Tests for the GET /metrics endpoint."""
+
+    async def test_metrics_exposition(
+        self, client: TestClient, session_manager: SessionManager
+    ) -> None:
+        """Metrics endpoint renders the text format with the core series."""
+        await session_manager.create_session("1234567890.000001")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE bender_claude_invocation_seconds histogram" in body
+        assert "bender_scheduler_queue_wait_seconds_bucket" in body
+        assert "bender_slack_post_message_seconds_count" in body
+        assert "bender_claude_timeouts_total" in body
+        assert "bender_active_sessions 1" in body
+
+    def test_metrics_no_auth_required(self, client: TestClient) -> None:
+        """Metrics endpoint is readable without the API key, like /health."""
+        assert client.get("/metrics").status_code == 200
+
+
 class TestInvokeAuthentication:
     """Tests for the /api/invoke authentication."""
 
@@ -83,12 +227,13 @@ class TestInvokeAuthentication:
         self,
         settings: Settings,
         session_manager: SessionManager,
+        scheduler: InvocationScheduler,
         mock_slack_client: AsyncMock,
     ) -> None:
         """Returns 503 when server has no API key configured."""
         # Settings without bender_api_key (defaults to None)
         app = FastAPI()
-        create_api(app, mock_slack_client, settings, session_manager)
+        create_api(app, mock_slack_client, settings, session_manager, scheduler)
         client = TestClient(app)
 
         response = client.post(
@@ -106,13 +251,15 @@ class TestInvokeEndpoint:
         self,
         async_client: AsyncClient,
         session_manager: SessionManager,
+        scheduler: InvocationScheduler,
     ) -> None:
         """Successful invocation creates thread, calls Claude, posts response."""
         mock_claude_response = ClaudeResponse(
             result="Claude says hello", session_id="session-abc"
         )
-        with patch(
-            "bender.api.invoke_claude",
+        with patch.object(
+            scheduler,
+            "run",
             new_callable=AsyncMock,
             return_value=mock_claude_response,
         ):
@@ -126,16 +273,19 @@ class TestInvokeEndpoint:
         data = response.json()
         assert data["thread_ts"] == "1234567890.123456"
         assert data["response"] == "Claude says hello"
+        assert data["truncated"] is False
 
     async def test_invoke_creates_session(
         self,
         async_client: AsyncClient,
         session_manager: SessionManager,
+        scheduler: InvocationScheduler,
     ) -> None:
         """Invocation creates a session for the thread."""
         mock_claude_response = ClaudeResponse(result="ok", session_id="s1")
-        with patch(
-            "bender.api.invoke_claude",
+        with patch.object(
+            scheduler,
+            "run",
             new_callable=AsyncMock,
             return_value=mock_claude_response,
         ):
@@ -168,13 +318,38 @@ class TestInvokeEndpoint:
 
         assert response.status_code == 502
 
+    async def test_invoke_slack_backlog_full_returns_503(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """Returns 503 without invoking Claude Code when the Slack backlog is full."""
+        with (
+            patch(
+                "bender.api.SlackDispatcher.chat_postMessage",
+                new_callable=AsyncMock,
+                side_effect=SlackBacklogFullError("Outbound Slack backlog is full"),
+            ),
+            patch.object(scheduler, "run", new_callable=AsyncMock) as mock_run,
+        ):
+            response = await async_client.post(
+                "/api/invoke",
+                json={"channel": "C123", "message": "Test"},
+                headers=AUTH_HEADERS,
+            )
+
+        assert response.status_code == 503
+        mock_run.assert_not_called()
+
     async def test_invoke_claude_failure_returns_500(
         self,
         async_client: AsyncClient,
+        scheduler: InvocationScheduler,
     ) -> None:
         """Returns 500 when Claude Code invocation fails."""
-        with patch(
-            "bender.api.invoke_claude",
+        with patch.object(
+            scheduler,
+            "run",
             new_callable=AsyncMock,
             side_effect=ClaudeCodeError("Claude crashed"),
         ):
@@ -186,6 +361,51 @@ class TestInvokeEndpoint:
 
         assert response.status_code == 500
 
+    async def test_invoke_queue_full_returns_429(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Returns 429 and notifies the thread when the scheduler rejects work."""
+        with patch.object(
+            scheduler,
+            "run",
+            new_callable=AsyncMock,
+            side_effect=SchedulerFullError(
+                "Invocation queue is full (32 waiting)", retry_after=12
+            ),
+        ):
+            response = await async_client.post(
+                "/api/invoke",
+                json={"channel": "C123", "message": "Test"},
+                headers=AUTH_HEADERS,
+            )
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "12"
+        assert "capacity" in mock_slack_client.chat_postMessage.call_args[1]["text"]
+
+    async def test_invoke_rejected_before_posting_when_full(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """A full queue returns 429 without posting a trigger or creating a job."""
+        error = SchedulerFullError("Invocation queue is full (32 waiting)", retry_after=90)
+        with patch.object(scheduler, "admit", side_effect=error):
+            for mode in ("sync", "async"):
+                response = await async_client.post(
+                    "/api/invoke",
+                    json={"channel": "C123", "message": "Test", "mode": mode},
+                    headers=AUTH_HEADERS,
+                )
+                assert response.status_code == 429
+                assert response.headers["Retry-After"] == "90"
+
+        mock_slack_client.chat_postMessage.assert_not_called()
+
     def test_invoke_missing_channel_returns_422(self, client: TestClient) -> None:
         """Returns 422 when 'channel' field is missing."""
         response = client.post(
@@ -214,6 +434,513 @@ class TestInvokeEndpoint:
         assert response.status_code == 422
 
 
+class TestAsyncJobs:
+    """Tests for async-mode /api/invoke and GET /api/jobs/{job_id}."""
+
+    async def _wait_for_job(self, async_client: AsyncClient, job_id: str) -> dict:
+        for _ in range(100):
+            response = await async_client.get(f"/api/jobs/{job_id}", headers=AUTH_HEADERS)
+            data = response.json()
+            if data["status"] != "pending":
+                return data
+            await asyncio.sleep(0.01)
+        raise AssertionError("job did not finish")
+
+    async def test_async_invoke_returns_202_and_result(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """Async mode returns a job ID at once and the result once finished."""
+        mock_claude_response = ClaudeResponse(result="done later", session_id="s1")
+        with patch.object(
+            scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+        ):
+            response = await async_client.post(
+                "/api/invoke",
+                json={"channel": "C123", "message": "Test", "mode": "async"},
+                headers=AUTH_HEADERS,
+            )
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+            data = await self._wait_for_job(async_client, job_id)
+
+        assert data["status"] == "succeeded"
+        assert data["result"]["response"] == "done later"
+        assert data["result"]["thread_ts"] == "1234567890.123456"
+
+    async def test_async_invoke_records_failure(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """A failed job reports the error and the status sync mode would return."""
+        with patch.object(
+            scheduler,
+            "run",
+            new_callable=AsyncMock,
+            side_effect=ClaudeCodeError("Claude crashed"),
+        ):
+            response = await async_client.post(
+                "/api/invoke",
+                json={"channel": "C123", "message": "Test", "mode": "async"},
+                headers=AUTH_HEADERS,
+            )
+            data = await self._wait_for_job(async_client, response.json()["job_id"])
+
+        assert data["status"] == "failed"
+        assert data["error_status"] == 500
+
+    async def test_callback_url_receives_finished_job(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """A callback_url makes the call async and POSTs the finished job to it."""
+        mock_claude_response = ClaudeResponse(result="done", session_id="s1")
+        with (
+            patch.object(
+                scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+            ),
+            patch("bender.api.WebhookSender.submit") as submit,
+        ):
+            response = await async_client.post(
+                "/api/invoke",
+                json={
+                    "channel": "C123",
+                    "message": "Test",
+                    "callback_url": "https://ci.example.test/hook",
+                },
+                headers=AUTH_HEADERS,
+            )
+            assert response.status_code == 202
+            await self._wait_for_job(async_client, response.json()["job_id"])
+
+        url, payload = submit.call_args.args
+        assert url == "https://ci.example.test/hook"
+        assert payload["status"] == "succeeded"
+        assert payload["result"]["response"] == "done"
+
+    @pytest.mark.parametrize("url", ["not a url", "ftp://ci.example.test/hook", "/relative"])
+    def test_invalid_callback_url_rejected(self, client: TestClient, url: str) -> None:
+        """callback_url must be an absolute http(s) URL; anything else is a 422."""
+        response = client.post(
+            "/api/invoke",
+            json={"channel": "C123", "message": "Test", "callback_url": url},
+            headers=AUTH_HEADERS,
+        )
+        assert response.status_code == 422
+
+    def test_callback_host_must_be_allowed(
+        self, client: TestClient, settings_with_api_key: Settings
+    ) -> None:
+        """With BENDER_WEBHOOK_ALLOWED_HOSTS set, other hosts are rejected up front."""
+        settings_with_api_key.bender_webhook_allowed_hosts = "ci.example.test"
+        response = client.post(
+            "/api/invoke",
+            json={
+                "channel": "C123",
+                "message": "Test",
+                "callback_url": "http://169.254.169.254/latest",
+            },
+            headers=AUTH_HEADERS,
+        )
+        assert response.status_code == 422
+        assert "not allowed" in response.json()["detail"]
+
+    async def test_empty_configured_job_table_is_used(
+        self,
+        settings_with_api_key: Settings,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """A JobTable passed to create_api is used even while it holds no jobs."""
+        jobs = JobTable(max_jobs=1)
+        assert len(jobs) == 0
+        app = FastAPI()
+        create_api(
+            app, mock_slack_client, settings_with_api_key, session_manager, scheduler, jobs=jobs
+        )
+        release = asyncio.Event()
+
+        async def slow_run(**kwargs) -> ClaudeResponse:
+            await release.wait()
+            return ClaudeResponse(result="done", session_id="s1")
+
+        body = {"channel": "C123", "message": "Test", "mode": "async"}
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            with patch.object(scheduler, "run", side_effect=slow_run):
+                first = await client.post("/api/invoke", json=body, headers=AUTH_HEADERS)
+                second = await client.post("/api/invoke", json=body, headers=AUTH_HEADERS)
+                release.set()
+                await self._wait_for_job(client, first.json()["job_id"])
+
+        assert first.status_code == 202
+        assert second.status_code == 503
+        assert len(jobs) == 1
+
+    async def test_unknown_job_returns_404(self, async_client: AsyncClient) -> None:
+        """Unknown or expired job IDs return 404."""
+        response = await async_client.get("/api/jobs/nope", headers=AUTH_HEADERS)
+        assert response.status_code == 404
+
+    def test_jobs_require_auth(self, client: TestClient) -> None:
+        """Job polling requires the API key."""
+        response = client.get("/api/jobs/anything")
+        assert response.status_code == 401
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    """Split a text/event-stream body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestInvokeStream:
+    """Tests for the POST /api/invoke/stream endpoint."""
+
+    async def test_streams_text_tools_and_result(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Events arrive in order and the result is also posted to Slack."""
+
+        async def fake_stream(**kwargs) -> AsyncIterator[ClaudeEvent]:
+            yield TextDelta("Checking")
+            yield ToolUse(name="Bash", input={"command": "ls"}, tool_use_id="t1")
+            yield ResultEvent(ClaudeResponse(result="All good", session_id="s1"))
+
+        with patch.object(scheduler, "stream", fake_stream):
+            response = await async_client.post(
+                "/api/invoke/stream",
+                json={"channel": "C123", "message": "Check"},
+                headers=AUTH_HEADERS,
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(response.text)
+        assert [name for name, _ in events] == ["started", "text", "tool_use", "result"]
+        assert events[0][1]["thread_ts"] == "1234567890.123456"
+        assert events[2][1]["name"] == "Bash"
+        assert events[3][1]["response"] == "All good"
+        assert mock_slack_client.chat_postMessage.call_args[1]["text"] == "All good"
+
+    async def test_stream_error_event(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """A failed run ends the stream with an error event."""
+
+        async def fake_stream(**kwargs) -> AsyncIterator[ClaudeEvent]:
+            raise SchedulerFullError("Invocation queue is full (32 waiting)")
+            yield  # pragma: no cover
+
+        with patch.object(scheduler, "stream", fake_stream):
+            response = await async_client.post(
+                "/api/invoke/stream",
+                json={"channel": "C123", "message": "Check"},
+                headers=AUTH_HEADERS,
+            )
+
+        name, data = _parse_sse(response.text)[-1]
+        assert name == "error"
+        assert data["status"] == 429
+
+    async def test_stream_slack_failure_returns_502(
+        self,
+        async_client: AsyncClient,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Failing to create the thread is a plain HTTP error, before streaming."""
+        mock_slack_client.chat_postMessage = AsyncMock(
+            side_effect=SlackApiError(message="Slack down", response=AsyncMock())
+        )
+        response = await async_client.post(
+            "/api/invoke/stream",
+            json={"channel": "C123", "message": "Check"},
+            headers=AUTH_HEADERS,
+        )
+        assert response.status_code == 502
+
+
+class TestBatchInvoke:
+    """Tests for the POST /api/invoke/batch endpoint."""
+
+    async def test_batch_runs_each_item_in_own_thread(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Every item gets a trigger message, a run and a per-item result."""
+        mock_claude_response = ClaudeResponse(result="ok", session_id="s1")
+        with patch.object(
+            scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+        ) as mock_run:
+            response = await async_client.post(
+                "/api/invoke/batch",
+                json={"items": [{"channel": "C1", "message": f"svc {i}"} for i in range(3)]},
+                headers=AUTH_HEADERS,
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["status"] for item in data["items"]] == ["succeeded"] * 3
+        assert [item["index"] for item in data["items"]] == [0, 1, 2]
+        assert mock_run.call_count == 3
+        assert data["parent_ts"] is None
+
+    async def test_batch_under_parent_message(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """With parent_channel, one parent is posted and each result is a reply."""
+        mock_claude_response = ClaudeResponse(result="ok", session_id="s1")
+        with patch.object(
+            scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+        ):
+            response = await async_client.post(
+                "/api/invoke/batch",
+                json={
+                    "items": [{"message": "a"}, {"message": "b"}],
+                    "parent_channel": "C9",
+                },
+                headers=AUTH_HEADERS,
+            )
+
+        data = response.json()
+        assert data["parent_ts"] == "1234567890.123456"
+        calls = mock_slack_client.chat_postMessage.call_args_list
+        # One parent plus one reply per item
+        assert len(calls) == 3
+        assert all(call[1]["thread_ts"] == "1234567890.123456" for call in calls[1:])
+
+    async def test_batch_item_failure_is_per_item(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """A failing item is reported without failing the batch."""
+        results = [ClaudeResponse(result="ok", session_id="s1"), ClaudeCodeError("boom")]
+        with patch.object(scheduler, "run", new_callable=AsyncMock, side_effect=results):
+            response = await async_client.post(
+                "/api/invoke/batch",
+                json={
+                    "items": [{"channel": "C1", "message": "a"}, {"channel": "C1", "message": "b"}]
+                },
+                headers=AUTH_HEADERS,
+            )
+
+        assert response.status_code == 200
+        statuses = sorted(item["status"] for item in response.json()["items"])
+        assert statuses == ["failed", "succeeded"]
+
+    async def test_batch_async_returns_job_ids(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """Async mode returns 202 with one job ID per item."""
+        mock_claude_response = ClaudeResponse(result="ok", session_id="s1")
+        with patch.object(
+            scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+        ):
+            response = await async_client.post(
+                "/api/invoke/batch",
+                json={"items": [{"channel": "C1", "message": "a"}], "mode": "async"},
+                headers=AUTH_HEADERS,
+            )
+            await asyncio.sleep(0.05)
+
+        assert response.status_code == 202
+        job_id = response.json()["items"][0]["job_id"]
+        job = await async_client.get(f"/api/jobs/{job_id}", headers=AUTH_HEADERS)
+        assert job.json()["status"] == "succeeded"
+
+    async def test_batch_requires_channel_without_parent(
+        self, async_client: AsyncClient
+    ) -> None:
+        """Items without a channel are rejected unless parent_channel is set."""
+        response = await async_client.post(
+            "/api/invoke/batch",
+            json={"items": [{"message": "a"}]},
+            headers=AUTH_HEADERS,
+        )
+        assert response.status_code == 422
+
+    async def test_batch_rejects_too_many_items(
+        self, async_client: AsyncClient, settings_with_api_key: Settings
+    ) -> None:
+        """Batches beyond BENDER_BATCH_MAX_ITEMS are rejected."""
+        settings_with_api_key.bender_batch_max_items = 2
+        response = await async_client.post(
+            "/api/invoke/batch",
+            json={"items": [{"channel": "C1", "message": "a"}] * 3},
+            headers=AUTH_HEADERS,
+        )
+        assert response.status_code == 422
+
+
+class TestIdempotencyKey:
+    """Tests for the Idempotency-Key header on /api/invoke."""
+
+    async def test_retry_replays_cached_response(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """A retried request gets the first response without running again."""
+        headers = {**AUTH_HEADERS, "Idempotency-Key": "cron-42"}
+        body = {"channel": "C123", "message": "Nightly report"}
+        mock_claude_response = ClaudeResponse(result="report", session_id="s1")
+        with patch.object(
+            scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+        ) as mock_run:
+            first = await async_client.post("/api/invoke", json=body, headers=headers)
+            second = await async_client.post("/api/invoke", json=body, headers=headers)
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert "Idempotent-Replayed" not in first.headers
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert mock_run.call_count == 1
+
+    async def test_empty_configured_cache_is_used(
+        self,
+        settings_with_api_key: Settings,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """An IdempotencyCache passed to create_api is used even while it is empty."""
+        cache = IdempotencyCache()
+        assert len(cache) == 0
+        app = FastAPI()
+        create_api(
+            app,
+            mock_slack_client,
+            settings_with_api_key,
+            session_manager,
+            scheduler,
+            idempotency=cache,
+        )
+        headers = {**AUTH_HEADERS, "Idempotency-Key": "cron-43"}
+        body = {"channel": "C123", "message": "Nightly report"}
+        mock_claude_response = ClaudeResponse(result="report", session_id="s1")
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            with patch.object(
+                scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+            ):
+                response = await client.post("/api/invoke", json=body, headers=headers)
+
+        assert response.status_code == 200
+        assert len(cache) == 1
+
+    async def test_concurrent_duplicates_share_one_run(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """Duplicates sent while the first is running attach to it."""
+        headers = {**AUTH_HEADERS, "Idempotency-Key": "hook-7"}
+        body = {"channel": "C123", "message": "Deploy finished"}
+        gate = asyncio.Event()
+        calls = 0
+
+        async def slow_run(**kwargs) -> ClaudeResponse:
+            nonlocal calls
+            calls += 1
+            await gate.wait()
+            return ClaudeResponse(result="ack", session_id="s1")
+
+        with patch.object(scheduler, "run", side_effect=slow_run):
+            requests = [
+                asyncio.create_task(async_client.post("/api/invoke", json=body, headers=headers))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            gate.set()
+            responses = await asyncio.gather(*requests)
+
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert {r.json()["response"] for r in responses} == {"ack"}
+        assert calls == 1
+
+    async def test_async_mode_replays_job_id(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """In async mode a retry gets the same job instead of a new one."""
+        headers = {**AUTH_HEADERS, "Idempotency-Key": "job-1"}
+        body = {"channel": "C123", "message": "Test", "mode": "async"}
+        mock_claude_response = ClaudeResponse(result="later", session_id="s1")
+        with patch.object(
+            scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+        ):
+            first = await async_client.post("/api/invoke", json=body, headers=headers)
+            second = await async_client.post("/api/invoke", json=body, headers=headers)
+
+        assert first.status_code == second.status_code == 202
+        assert first.json()["job_id"] == second.json()["job_id"]
+
+    async def test_failed_run_is_retried(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """Errors are not cached, so a retry after a failure runs again."""
+        headers = {**AUTH_HEADERS, "Idempotency-Key": "retry-me"}
+        body = {"channel": "C123", "message": "Test"}
+        with patch.object(
+            scheduler,
+            "run",
+            new_callable=AsyncMock,
+            side_effect=[
+                ClaudeCodeError("boom"),
+                ClaudeResponse(result="second time", session_id="s1"),
+            ],
+        ):
+            first = await async_client.post("/api/invoke", json=body, headers=headers)
+            second = await async_client.post("/api/invoke", json=body, headers=headers)
+
+        assert first.status_code == 500
+        assert second.status_code == 200
+        assert second.json()["response"] == "second time"
+
+    async def test_key_reused_with_different_body_returns_422(
+        self,
+        async_client: AsyncClient,
+        scheduler: InvocationScheduler,
+    ) -> None:
+        """Reusing a key for a different request is rejected."""
+        headers = {**AUTH_HEADERS, "Idempotency-Key": "dup"}
+        mock_claude_response = ClaudeResponse(result="ok", session_id="s1")
+        with patch.object(
+            scheduler, "run", new_callable=AsyncMock, return_value=mock_claude_response
+        ):
+            await async_client.post(
+                "/api/invoke", json={"channel": "C1", "message": "a"}, headers=headers
+            )
+            response = await async_client.post(
+                "/api/invoke", json={"channel": "C1", "message": "b"}, headers=headers
+            )
+
+        assert response.status_code == 422
+
+
 class TestInvokeRequestModel:
     """Tests for the InvokeRequest Pydantic model."""
 
@@ -1,9 +1,16 @@
 """Tests for the main application module."""
 
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+from fastapi.testclient import TestClient
+
 from bender.app import BenderApp, create_app
 from bender.config import Settings
+from bender.session_manager import SessionManager
+from bender.session_store import SQLiteSessionStore
+from bender.socket_pool import SocketModePool
+from bender.worker_pool import WorkerPool
 
 
 class TestCreateApp:
@@ -42,6 +49,47 @@ class TestCreateApp:
         routes = [r.path for r in app.fastapi_app.routes]
         assert "/api/invoke" in routes
 
+    @patch("bender.app.AsyncSocketModeHandler")
+    def test_metrics_endpoint_registered(self, mock_handler_cls, settings: Settings) -> None:
+        """Metrics endpoint is registered on the FastAPI app."""
+        app = create_app(settings)
+        routes = [r.path for r in app.fastapi_app.routes]
+        assert "/metrics" in routes
+
+    @patch("bender.app.AsyncSocketModeHandler")
+    def test_session_db_enables_sqlite_store(
+        self, mock_handler_cls, settings: Settings, tmp_path
+    ) -> None:
+        """Configuring a session DB backs the SessionManager with SQLite."""
+        settings.bender_session_db = tmp_path / "sessions.db"
+        app = create_app(settings)
+        assert isinstance(app.sessions._store, SQLiteSessionStore)
+
+    def test_empty_session_manager_is_kept(self, settings: Settings, tmp_path) -> None:
+        """A configured SessionManager is used even while it tracks no threads."""
+        sessions = SessionManager(SQLiteSessionStore(tmp_path / "sessions.db"))
+        assert len(sessions) == 0
+
+        app = BenderApp(MagicMock(), MagicMock(), None, settings, sessions=sessions)
+
+        assert app.sessions is sessions
+
+    @patch("bender.app.AsyncSocketModeHandler")
+    def test_worker_pool_disabled_by_default(self, mock_handler_cls, settings: Settings) -> None:
+        """No warm worker pool is created unless configured."""
+        app = create_app(settings)
+        assert app.worker_pool is None
+
+    @patch("bender.app.AsyncSocketModeHandler")
+    def test_worker_pool_created_when_sized(self, mock_handler_cls, settings: Settings) -> None:
+        """A positive pool size creates a WorkerPool with the configured limits."""
+        settings.bender_worker_pool_size = 3
+        settings.bender_worker_max_requests = 5
+        app = create_app(settings)
+        assert isinstance(app.worker_pool, WorkerPool)
+        assert app.worker_pool.size == 3
+        assert app.worker_pool.max_requests == 5
+
     @patch("bender.app.AsyncSocketModeHandler")
     def test_socket_handler_created_with_app_token(
         self, mock_handler_cls, settings: Settings
@@ -51,3 +99,52 @@ class TestCreateApp:
         mock_handler_cls.assert_called_once()
         call_args = mock_handler_cls.call_args
         assert call_args[0][1] == settings.slack_app_token
+
+    @patch("bender.app.AsyncSocketModeHandler")
+    def test_http_mode_mounts_events_route(self, mock_handler_cls, settings: Settings) -> None:
+        """HTTP events mode serves Slack events from FastAPI instead of a socket."""
+        settings.bender_slack_mode = "http"
+        settings.slack_signing_secret = "signing-secret"
+        settings.slack_app_token = None
+        app = create_app(settings)
+
+        mock_handler_cls.assert_not_called()
+        assert app.socket_pool is None
+        routes = [r.path for r in app.fastapi_app.routes]
+        assert "/slack/events" in routes
+
+    @patch("bender.app.AsyncSocketModeHandler")
+    def test_http_mode_verifies_signatures(self, mock_handler_cls, settings: Settings) -> None:
+        """Requests to the events route without a valid signature are rejected."""
+        settings.bender_slack_mode = "http"
+        settings.slack_signing_secret = "signing-secret"
+        app = create_app(settings)
+
+        response = TestClient(app.fastapi_app).post(
+            "/slack/events",
+            json={"type": "event_callback", "event": {"type": "app_mention"}},
+            headers={"X-Slack-Request-Timestamp": "0", "X-Slack-Signature": "v0=bad"},
+        )
+        assert response.status_code == 401
+
+    @patch("bender.app.AsyncSocketModeHandler")
+    def test_socket_connections_share_bolt_app(self, mock_handler_cls, settings: Settings) -> None:
+        """BENDER_SLACK_SOCKET_CONNECTIONS opens that many handlers for one bolt app."""
+        settings.bender_slack_socket_connections = 3
+        app = create_app(settings)
+
+        assert isinstance(app.socket_pool, SocketModePool)
+        assert len(app.socket_pool) == 3
+        assert mock_handler_cls.call_count == 3
+        assert {c[0][0] for c in mock_handler_cls.call_args_list} == {app.bolt_app}
+
+    @patch("bender.app.AsyncSocketModeHandler")
+    def test_executor_sockets_replace_local_backend(
+        self, mock_handler_cls, settings: Settings
+    ) -> None:
+        """With executor sockets configured, no local worker pool is started."""
+        settings.bender_executor_sockets = "/run/bender/ex1.sock"
+        settings.bender_worker_pool_size = 3
+        app = create_app(settings)
+        assert app.worker_pool is None
+        assert app.executors.paths == [Path("/run/bender/ex1.sock")]
@@ -10,11 +10,59 @@ import pytest
 from bender.claude_code import (
     ClaudeCodeError,
     ClaudeResponse,
+    OutputCapture,
+    ResultEvent,
+    TextDelta,
+    ToolUse,
     _parse_response,
+    _parse_stream_line,
     invoke_claude,
+    stream_claude,
 )
 
 
+def _mock_process(
+    stdout_lines: list[dict | str],
+    stderr: bytes = b"",
+    returncode: int = 0,
+    eof: bool = True,
+    limit: int = 2**16,
+) -> MagicMock:
+    """Create a mock subprocess whose stdout emits the given stream-json lines."""
+    process = MagicMock()
+    process.returncode = None
+
+    process.stdout = asyncio.StreamReader(limit=limit)
+    for line in stdout_lines:
+        raw = line if isinstance(line, str) else json.dumps(line)
+        process.stdout.feed_data(raw.encode() + b"\n")
+    if eof:
+        process.stdout.feed_eof()
+
+    process.stderr = asyncio.StreamReader()
+    process.stderr.feed_data(stderr)
+    process.stderr.feed_eof()
+
+    async def wait() -> int:
+        process.returncode = returncode
+        return returncode
+
+    process.wait = AsyncMock(side_effect=wait)
+    process.kill = MagicMock()
+    return process
+
+
+def _result_line(result: str, session_id: str = "s1", is_error: bool = False) -> dict:
+    """Build a stream-json result event."""
+    return {
+        "type": "result",
+        "subtype": "success",
+        "result": result,
+        "session_id": session_id,
+        "is_error": is_error,
+    }
+
+
 class TestClaudeResponse:
     """Tests for the ClaudeResponse dataclass."""
 
@@ -80,17 +128,246 @@ class TestParseResponse:
         assert response.session_id == "fallback-id"
 
 
+class TestParseResponseBytes:
+    """Tests for _parse_response on undecoded output."""
+
+    def test_bytes_json_response(self) -> None:
+        """Parses JSON given as bytes."""
+        raw = json.dumps({"result": "Hello", "session_id": "s1"}).encode()
+        response = _parse_response(raw, "fallback-id")
+        assert response.result == "Hello"
+        assert response.session_id == "s1"
+
+    def test_bytes_raw_text_stripped(self) -> None:
+        """Non-JSON bytes are stripped and decoded."""
+        response = _parse_response(b"  plain output \n", "fallback-id")
+        assert response.result == "plain output"
+
+    def test_non_object_json_uses_raw(self) -> None:
+        """JSON that is not an object is treated as raw text."""
+        response = _parse_response("42\n", "fallback-id")
+        assert response.result == "42"
+
+
+class TestOutputCapture:
+    """Tests for the OutputCapture byte sink."""
+
+    def test_under_limit_stays_in_memory(self) -> None:
+        """Output within the limit is kept in memory without a spill file."""
+        capture = OutputCapture(10, "test")
+        capture.write(b"hello")
+        assert capture.head() == b"hello"
+        assert capture.truncated is False
+        assert capture.spill_path is None
+
+    def test_over_limit_spills_to_file(self) -> None:
+        """Output past the limit goes to a temp file holding everything."""
+        capture = OutputCapture(4, "test")
+        capture.write(b"abc")
+        capture.write(b"defgh")
+        capture._file.flush()
+
+        assert capture.truncated is True
+        assert capture.head() == b"abcd"
+        assert capture.total == 8
+        assert capture.spill_path.read_bytes() == b"abcdefgh"
+        capture.close()
+
+    def test_close_deletes_file(self) -> None:
+        """close() removes the spill file."""
+        capture = OutputCapture(1, "test")
+        capture.write(b"abc")
+        path = capture.spill_path
+        capture.close()
+        assert not path.exists()
+
+    def test_spill_log_reports_size_reached(self, caplog: pytest.LogCaptureFixture) -> None:
+        """The spill warning gives the bytes written, not the (possibly zero) limit."""
+        capture = OutputCapture(0, "result")
+        capture.write(b"abc")
+        capture.close()
+        assert "result reached 3 bytes" in caplog.text
+
+
+class TestParseStreamLine:
+    """Tests for the _parse_stream_line function."""
+
+    def test_assistant_text_block(self) -> None:
+        """Assistant text blocks become TextDelta events."""
+        line = json.dumps({
+            "type": "assistant",
+            "message": {"content": [{"type": "text", "text": "Looking..."}]},
+        }).encode()
+        assert _parse_stream_line(line, "s1") == [TextDelta(text="Looking...")]
+
+    def test_assistant_tool_use_block(self) -> None:
+        """Assistant tool_use blocks become ToolUse events."""
+        line = json.dumps({
+            "type": "assistant",
+            "message": {
+                "content": [
+                    {"type": "tool_use", "id": "tu1", "name": "Bash", "input": {"command": "ls"}}
+                ]
+            },
+        }).encode()
+        events = _parse_stream_line(line, "s1")
+        assert events == [ToolUse(name="Bash", input={"command": "ls"}, tool_use_id="tu1")]
+
+    def test_result_line(self) -> None:
+        """Result lines become a ResultEvent carrying the response."""
+        line = json.dumps(_result_line("done", session_id="s2", is_error=True)).encode()
+        events = _parse_stream_line(line, "fallback")
+        assert events == [
+            ResultEvent(ClaudeResponse(result="done", session_id="s2", is_error=True))
+        ]
+
+    def test_result_line_without_session_uses_fallback(self) -> None:
+        """Result lines without a session_id use the fallback."""
+        line = json.dumps({"type": "result", "result": "done"}).encode()
+        events = _parse_stream_line(line, "fallback")
+        assert events[0].response.session_id == "fallback"
+
+    def test_unsurfaced_event_types_ignored(self) -> None:
+        """System and user (tool result) events produce no events."""
+        assert _parse_stream_line(b'{"type": "system", "subtype": "init"}', "s1") == []
+        assert _parse_stream_line(b'{"type": "user", "message": {}}', "s1") == []
+
+    def test_non_json_line_returns_none(self) -> None:
+        """Non-JSON lines are reported as raw output."""
+        assert _parse_stream_line(b"plain text\n", "s1") is None
+
+    def test_blank_line_ignored(self) -> None:
+        """Blank lines produce no events."""
+        assert _parse_stream_line(b"\n", "s1") == []
+
+
+class TestStreamClaude:
+    """Tests for the stream_claude async generator."""
+
+    async def test_yields_events_in_order(self, tmp_path: Path) -> None:
+        """Yields text, tool use and the final result in emission order."""
+        lines = [
+            {"type": "system", "subtype": "init", "session_id": "s1"},
+            {"type": "assistant", "message": {"content": [{"type": "text", "text": "Hi"}]}},
+            {
+                "type": "assistant",
+                "message": {"content": [{"type": "tool_use", "id": "t", "name": "Read"}]},
+            },
+            _result_line("Hi there"),
+        ]
+        with patch(
+            "bender.claude_code.asyncio.create_subprocess_exec",
+            return_value=_mock_process(lines),
+        ):
+            events = [event async for event in stream_claude("hello", tmp_path)]
+
+        assert events[0] == TextDelta(text="Hi")
+        assert isinstance(events[1], ToolUse)
+        assert events[1].name == "Read"
+        assert isinstance(events[2], ResultEvent)
+        assert events[2].response.result == "Hi there"
+        assert events[2].response.session_id == "s1"
+        assert events[2].response.truncated is False
+
+    async def test_uses_stream_json_output(self, tmp_path: Path) -> None:
+        """Runs the CLI with stream-json output."""
+        with patch(
+            "bender.claude_code.asyncio.create_subprocess_exec",
+            return_value=_mock_process([_result_line("ok")]),
+        ) as mock_exec:
+            [event async for event in stream_claude("hello", tmp_path)]
+
+        cmd_args = mock_exec.call_args[0]
+        assert cmd_args[cmd_args.index("--output-format") + 1] == "stream-json"
+        assert "--verbose" in cmd_args
+
+    async def test_plain_text_output_falls_back_to_raw(self, tmp_path: Path) -> None:
+        """Non-JSON output becomes the result text when no result event arrives."""
+        with patch(
+            "bender.claude_code.asyncio.create_subprocess_exec",
+            return_value=_mock_process(["plain answer"]),
+        ):
+            events = [event async for event in stream_claude("hello", tmp_path, session_id="s9")]
+
+        assert len(events) == 1
+        assert events[0].response.result == "plain answer"
+        assert events[0].response.session_id == "s9"
+
+    async def test_oversized_result_line_is_truncated(self, tmp_path: Path) -> None:
+        """A result line over the cap yields a truncated response; the spill is removed."""
+        lines = [
+            {"type": "assistant", "message": {"content": [{"type": "text", "text": "head"}]}},
+            _result_line("x" * 5000),
+        ]
+        spills = tmp_path / "spills"
+        spills.mkdir()
+        with (
+            patch("bender.claude_code.tempfile.tempdir", str(spills)),
+            patch(
+                "bender.claude_code.asyncio.create_subprocess_exec",
+                side_effect=lambda *a, **kw: _mock_process(lines, limit=kw["limit"]),
+            ),
+        ):
+            events = []
+            async for event in stream_claude("hello", tmp_path, max_output_bytes=1024):
+                events.append(event)
+                if isinstance(event, ResultEvent):
+                    assert [path.name[:14] for path in spills.iterdir()] == ["bender-result-"]
+
+        response = events[-1].response
+        assert response.truncated is True
+        assert response.result == "head"
+        assert response.output_bytes > 5000
+        assert list(spills.iterdir()) == []
+
+    async def test_stderr_is_capped(self, tmp_path: Path) -> None:
+        """Only the head of a huge stderr ends up in the error message."""
+        process = _mock_process([], stderr=b"e" * 10_000, returncode=1)
+        spills = tmp_path / "spills"
+        spills.mkdir()
+        with (
+            patch("bender.claude_code.tempfile.tempdir", str(spills)),
+            patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=process),
+        ):
+            with pytest.raises(ClaudeCodeError) as exc_info:
+                [e async for e in stream_claude("hello", tmp_path, max_stderr_bytes=100)]
+
+        message = str(exc_info.value)
+        assert "e" * 100 in message
+        assert "e" * 101 not in message
+        assert "stderr truncated, 10000 bytes in total" in message
+        # Failed runs leave no spill files behind either
+        assert list(spills.iterdir()) == []
+
+    async def test_result_withheld_on_nonzero_exit(self, tmp_path: Path) -> None:
+        """No ResultEvent is yielded when the process exits with an error."""
+        process = _mock_process([_result_line("partial")], stderr=b"boom", returncode=2)
+        received = []
+        with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=process):
+            with pytest.raises(ClaudeCodeError, match="exited with code 2: boom"):
+                async for event in stream_claude("hello", tmp_path):
+                    received.append(event)
+
+        assert received == []
+
+    async def test_early_close_kills_process(self, tmp_path: Path) -> None:
+        """Closing the generator before the end kills the subprocess."""
+        lines = [{"type": "assistant", "message": {"content": [{"type": "text", "text": "a"}]}}]
+        process = _mock_process(lines, eof=False)
+        with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=process):
+            stream = stream_claude("hello", tmp_path)
+            assert await anext(stream) == TextDelta(text="a")
+            await stream.aclose()
+
+        process.kill.assert_called_once()
+
+
 class TestInvokeClaude:
     """Tests for the invoke_claude function."""
 
     async def test_basic_invocation(self, tmp_path: Path) -> None:
         """Invokes Claude Code with correct base arguments."""
-        json_output = json.dumps({"result": "response text", "session_id": "s1"})
-        mock_process = AsyncMock()
-        mock_process.communicate = AsyncMock(
-            return_value=(json_output.encode(), b"")
-        )
-        mock_process.returncode = 0
+        mock_process = _mock_process([_result_line("response text")])
 
         with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=mock_process) as mock_exec:
             result = await invoke_claude("hello", tmp_path)
@@ -100,19 +377,14 @@ class TestInvokeClaude:
         assert cmd_args[0] == "claude"
         assert "--print" in cmd_args
         assert "--output-format" in cmd_args
-        assert "json" in cmd_args
+        assert "stream-json" in cmd_args
         assert "--" in cmd_args
         assert "hello" in cmd_args
         assert result.result == "response text"
 
     async def test_invocation_with_session_id(self, tmp_path: Path) -> None:
         """Passes --session-id when provided."""
-        json_output = json.dumps({"result": "ok"})
-        mock_process = AsyncMock()
-        mock_process.communicate = AsyncMock(
-            return_value=(json_output.encode(), b"")
-        )
-        mock_process.returncode = 0
+        mock_process = _mock_process([_result_line("ok")])
 
         with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=mock_process) as mock_exec:
             await invoke_claude("hello", tmp_path, session_id="my-session")
@@ -124,12 +396,7 @@ class TestInvokeClaude:
 
     async def test_invocation_with_resume(self, tmp_path: Path) -> None:
         """Passes --resume and --session-id when resume=True."""
-        json_output = json.dumps({"result": "resumed"})
-        mock_process = AsyncMock()
-        mock_process.communicate = AsyncMock(
-            return_value=(json_output.encode(), b"")
-        )
-        mock_process.returncode = 0
+        mock_process = _mock_process([_result_line("resumed")])
 
         with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=mock_process) as mock_exec:
             await invoke_claude(
@@ -143,12 +410,7 @@ class TestInvokeClaude:
 
     async def test_resume_without_session_id_ignored(self, tmp_path: Path) -> None:
         """resume=True without session_id does not add --resume flag."""
-        json_output = json.dumps({"result": "ok"})
-        mock_process = AsyncMock()
-        mock_process.communicate = AsyncMock(
-            return_value=(json_output.encode(), b"")
-        )
-        mock_process.returncode = 0
+        mock_process = _mock_process([_result_line("ok")])
 
         with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=mock_process) as mock_exec:
             await invoke_claude("hello", tmp_path, resume=True)
@@ -159,12 +421,7 @@ class TestInvokeClaude:
 
     async def test_workspace_passed_as_cwd(self, tmp_path: Path) -> None:
         """Workspace is passed as cwd to subprocess."""
-        json_output = json.dumps({"result": "ok"})
-        mock_process = AsyncMock()
-        mock_process.communicate = AsyncMock(
-            return_value=(json_output.encode(), b"")
-        )
-        mock_process.returncode = 0
+        mock_process = _mock_process([_result_line("ok")])
 
         with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=mock_process) as mock_exec:
             await invoke_claude("hello", tmp_path)
@@ -173,11 +430,7 @@ class TestInvokeClaude:
 
     async def test_nonzero_exit_code_raises(self, tmp_path: Path) -> None:
         """Raises ClaudeCodeError on non-zero exit code."""
-        mock_process = AsyncMock()
-        mock_process.communicate = AsyncMock(
-            return_value=(b"", b"Something went wrong")
-        )
-        mock_process.returncode = 1
+        mock_process = _mock_process([], stderr=b"Something went wrong", returncode=1)
 
         with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=mock_process):
             with pytest.raises(ClaudeCodeError, match="exited with code 1"):
@@ -185,9 +438,7 @@ class TestInvokeClaude:
 
     async def test_nonzero_exit_code_empty_stderr(self, tmp_path: Path) -> None:
         """Raises ClaudeCodeError with 'Unknown error' when stderr is empty."""
-        mock_process = AsyncMock()
-        mock_process.communicate = AsyncMock(return_value=(b"", b""))
-        mock_process.returncode = 1
+        mock_process = _mock_process([], returncode=1)
 
         with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=mock_process):
             with pytest.raises(ClaudeCodeError, match="Unknown error"):
@@ -195,10 +446,7 @@ class TestInvokeClaude:
 
     async def test_timeout_raises(self, tmp_path: Path) -> None:
         """Raises ClaudeCodeError when execution times out."""
-        mock_process = AsyncMock()
-        mock_process.communicate = AsyncMock(side_effect=asyncio.TimeoutError)
-        mock_process.kill = MagicMock()
-        mock_process.wait = AsyncMock()
+        mock_process = _mock_process([], eof=False)
 
         with patch("bender.claude_code.asyncio.create_subprocess_exec", return_value=mock_process):
             with pytest.raises(ClaudeCodeError, match="timed out"):
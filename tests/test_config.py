@@ -39,6 +39,44 @@ class TestSettings:
         assert s.bender_api_port == 8080
         assert s.log_level == "info"
 
+    def test_settings_process_limit_defaults(self) -> None:
+        """Settings bounds Claude Code concurrency and queue depth by default."""
+        s = Settings(
+            slack_bot_token="xoxb-test",
+            slack_app_token="xapp-test",
+            anthropic_api_key="sk-ant-test",
+        )
+        assert s.bender_max_concurrency == 4
+        assert s.bender_max_queue == 32
+        assert s.bender_max_output_bytes == 8 * 1024 * 1024
+        assert s.bender_max_stderr_bytes == 64 * 1024
+        assert s.bender_session_db is None
+        assert s.bender_session_read_through is False
+        assert s.bender_session_miss_ttl == 5.0
+        assert s.bender_session_max_entries == 10000
+        assert s.bender_session_idle_ttl == 7 * 24 * 3600
+        assert s.bender_session_sweep_interval == 300
+        assert s.bender_slack_channel_rate == 1.0
+        assert s.bender_slack_channel_burst == 3
+        assert s.bender_slack_max_backlog == 1000
+        assert s.bender_max_jobs == 1000
+        assert s.bender_job_ttl == 3600
+        assert s.bender_webhook_concurrency == 8
+        assert s.bender_webhook_max_retries == 5
+        assert s.bender_webhook_close_timeout == 30.0
+        assert s.bender_idempotency_ttl == 86400.0
+        assert s.bender_ready_queue_threshold == 1.0
+        assert s.bender_slack_socket_connections == 1
+        assert s.bender_idempotency_max_entries == 10000
+        assert s.bender_batch_max_items == 500
+        assert s.bender_batch_concurrency == 4
+        assert s.bender_snippet_threshold == 12000
+        assert s.bender_stream_update_interval == 1.0
+        assert s.bender_event_dedup_ttl == 600
+        assert s.bender_event_dedup_max_entries == 10000
+        assert s.bender_worker_pool_size == 0
+        assert s.bender_worker_max_requests == 10
+
     def test_settings_auth_with_api_key(self) -> None:
         """Settings accepts ANTHROPIC_API_KEY as auth method."""
         s = Settings(
@@ -78,6 +116,51 @@ class TestSettings:
         with pytest.raises(ValueError, match="At least one authentication method"):
             s.validate_auth()
 
+    def test_socket_mode_requires_app_token(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Socket Mode (the default) needs SLACK_APP_TOKEN."""
+        monkeypatch.delenv("SLACK_APP_TOKEN", raising=False)
+        s = Settings(slack_bot_token="xoxb-test", anthropic_api_key="sk-ant-test")
+        assert s.bender_slack_mode == "socket"
+        with pytest.raises(ValueError, match="SLACK_APP_TOKEN"):
+            s.validate_slack()
+
+    def test_http_mode_requires_signing_secret(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """HTTP events mode needs SLACK_SIGNING_SECRET but no app token."""
+        monkeypatch.delenv("SLACK_SIGNING_SECRET", raising=False)
+        s = Settings(
+            slack_bot_token="xoxb-test",
+            anthropic_api_key="sk-ant-test",
+            bender_slack_mode="http",
+        )
+        with pytest.raises(ValueError, match="SLACK_SIGNING_SECRET"):
+            s.validate_slack()
+        s.slack_signing_secret = "signing-secret"
+        s.validate_slack()  # Should not raise
+
+    def test_executor_socket_paths(self) -> None:
+        """BENDER_EXECUTOR_SOCKETS is a comma-separated list of paths."""
+        s = Settings(slack_bot_token="xoxb-test", slack_app_token="xapp-test")
+        assert s.executor_socket_paths() == []
+        s.bender_executor_sockets = "/run/a.sock, /run/b.sock"
+        assert s.executor_socket_paths() == [Path("/run/a.sock"), Path("/run/b.sock")]
+        assert s.bender_executor_retry_interval == 30.0
+
+    def test_webhook_allowed_hosts(self) -> None:
+        """BENDER_WEBHOOK_ALLOWED_HOSTS is a comma-separated, case-insensitive host list."""
+        s = Settings(slack_bot_token="xoxb-test", slack_app_token="xapp-test")
+        assert s.webhook_allowed_hosts() == set()
+        s.bender_webhook_allowed_hosts = "CI.example.test, hooks.example.test"
+        assert s.webhook_allowed_hosts() == {"ci.example.test", "hooks.example.test"}
+
+    def test_invocation_slots_scale_with_executors(self) -> None:
+        """With executors the front allows their combined concurrency."""
+        s = Settings(slack_bot_token="xoxb-test", slack_app_token="xapp-test")
+        assert s.invocation_slots() == 4
+        s.bender_executor_sockets = "/run/a.sock,/run/b.sock,/run/c.sock"
+        assert s.invocation_slots() == 12
+        s.bender_executor_concurrency = 8
+        assert s.invocation_slots() == 24
+
     def test_settings_from_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
         """Settings loads from environment variables."""
         monkeypatch.setenv("SLACK_BOT_TOKEN", "xoxb-from-env")
@@ -0,0 +1,63 @@
+"""Tests for the Slack event deduplication module."""
+
+from unittest.mock import patch
+
+from bender.event_dedup import EventDeduplicator, event_key
+
+
+class TestEventKey:
+    """Tests for the event_key helper."""
+
+    def test_prefers_event_id(self) -> None:
+        """The envelope's event_id is used when present."""
+        event = {"type": "app_mention", "channel": "C1", "ts": "1.0"}
+        assert event_key(event, {"event_id": "Ev123"}) == "Ev123"
+
+    def test_falls_back_to_channel_and_ts(self) -> None:
+        """Without an event_id the key is type, channel and ts."""
+        event = {"type": "message", "channel": "C1", "ts": "1.0"}
+        assert event_key(event) == "message:C1:1.0"
+
+    def test_type_separates_mention_and_message(self) -> None:
+        """A mention and the message for the same post get different keys."""
+        mention = {"type": "app_mention", "channel": "C1", "ts": "1.0"}
+        message = {"type": "message", "channel": "C1", "ts": "1.0"}
+        assert event_key(mention) != event_key(message)
+
+    def test_no_identity_returns_none(self) -> None:
+        """Events with neither event_id nor ts have no key."""
+        assert event_key({"type": "message"}) is None
+
+
+class TestEventDeduplicator:
+    """Tests for the EventDeduplicator class."""
+
+    def test_first_sighting_is_not_duplicate(self) -> None:
+        """A new key passes and is remembered."""
+        dedup = EventDeduplicator()
+        assert dedup.is_duplicate("Ev1") is False
+        assert dedup.is_duplicate("Ev1") is True
+        assert dedup.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_none_key_never_duplicate(self) -> None:
+        """Events without a key are always processed."""
+        dedup = EventDeduplicator()
+        assert dedup.is_duplicate(None) is False
+        assert dedup.is_duplicate(None) is False
+        assert len(dedup) == 0
+
+    def test_keys_expire_after_ttl(self) -> None:
+        """A key is forgotten once the window has passed."""
+        dedup = EventDeduplicator(ttl=10)
+        with patch("bender.event_dedup.time.monotonic", return_value=100.0):
+            dedup.is_duplicate("Ev1")
+        with patch("bender.event_dedup.time.monotonic", return_value=111.0):
+            assert dedup.is_duplicate("Ev1") is False
+
+    def test_bounded_by_max_entries(self) -> None:
+        """The oldest keys are dropped beyond max_entries."""
+        dedup = EventDeduplicator(max_entries=2)
+        for key in ("Ev1", "Ev2", "Ev3"):
+            dedup.is_duplicate(key)
+        assert len(dedup) == 2
+        assert dedup.is_duplicate("Ev1") is False
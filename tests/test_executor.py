@@ -0,0 +1,464 @@
+"""Tests for the executor worker process module."""
+
+import asyncio
+import struct
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from bender.claude_code import (
+    ClaudeCodeError,
+    ClaudeResponse,
+    ResultEvent,
+    TextDelta,
+    ToolUse,
+    collect_response,
+)
+from bender.executor import (
+    MAX_FRAME_BYTES,
+    ExecutorClient,
+    ExecutorProtocolError,
+    ExecutorServer,
+    decode_event,
+    encode_event,
+    read_frame,
+    transcript_dir,
+    write_frame,
+)
+from bender.metrics import PROCESS_METRICS, TIMEOUTS
+from bender.scheduler import InvocationScheduler, SchedulerFullError
+from bender.session_manager import SessionManager
+
+THREAD = "1234567890.123456"
+
+
+def _reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def _frame(payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + payload
+
+
+class FakeBackend:
+    """Stream function stand-in recording calls; optionally blocks or fails."""
+
+    def __init__(self, error: Exception | None = None, block: bool = False) -> None:
+        self.error = error
+        self.block = block
+        self.calls: list[dict] = []
+        self.cancelled = asyncio.Event()
+
+    async def __call__(self, prompt: str, workspace: Path, **kwargs):
+        self.calls.append({"prompt": prompt, **kwargs})
+        yield TextDelta(text="thinking")
+        yield ToolUse(name="Bash", input={"command": "ls"}, tool_use_id="t1")
+        if self.block:
+            try:
+                await asyncio.Event().wait()
+            finally:
+                self.cancelled.set()
+        if self.error is not None:
+            raise self.error
+        yield ResultEvent(ClaudeResponse(result=f"done: {prompt}", session_id="s1"))
+
+
+@pytest.fixture
+async def executor(tmp_path: Path):
+    """Start an executor on a socket in tmp_path; yields (server, backend)."""
+    servers = []
+
+    async def start(backend: FakeBackend, path: Path | None = None, **kwargs) -> ExecutorServer:
+        scheduler = InvocationScheduler(tmp_path, stream_fn=backend, **kwargs)
+        name = f"ex{len(servers)}"
+        server = ExecutorServer(
+            path or tmp_path / f"{name}.sock", scheduler, transcripts=tmp_path / name
+        )
+        await server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        await server.close()
+
+
+class TestFrames:
+    """Tests for the length-prefixed frame helpers."""
+
+    async def test_reads_frames_until_eof(self) -> None:
+        """Frames decode in order and a clean EOF returns None."""
+        reader = _reader(_frame(b'{"a": 1}') + _frame(b'{"b": 2}'))
+        assert await read_frame(reader) == {"a": 1}
+        assert await read_frame(reader) == {"b": 2}
+        assert await read_frame(reader) is None
+
+    async def test_truncated_frame_raises(self) -> None:
+        """EOF in the middle of a frame is a protocol error."""
+        with pytest.raises(ExecutorProtocolError):
+            await read_frame(_reader(_frame(b'{"a": 1}')[:-2]))
+
+    async def test_oversized_frame_raises(self) -> None:
+        """Frames over the size limit are rejected before reading them."""
+        with pytest.raises(ExecutorProtocolError, match="exceeds"):
+            await read_frame(_reader(struct.pack(">I", MAX_FRAME_BYTES + 1)))
+
+    async def test_invalid_json_raises(self) -> None:
+        """A frame that is not JSON is a protocol error."""
+        with pytest.raises(ExecutorProtocolError, match="Invalid frame"):
+            await read_frame(_reader(_frame(b"not json")))
+
+
+class TestEventCodec:
+    """Tests for encode_event / decode_event."""
+
+    @pytest.mark.parametrize(
+        "event",
+        [
+            TextDelta(text="hello"),
+            ToolUse(name="Read", input={"path": "a.py"}, tool_use_id="t1"),
+            ResultEvent(ClaudeResponse(result="hi", session_id="s1", truncated=True)),
+            ResultEvent(ClaudeResponse(result="hi", session_id="s1", output_bytes=42)),
+        ],
+    )
+    def test_round_trip(self, event) -> None:
+        """Events survive the wire form unchanged."""
+        assert decode_event(encode_event(event)) == event
+
+    def test_error_frames_raise(self) -> None:
+        """Error frames become ClaudeCodeError, or SchedulerFullError when full."""
+        with pytest.raises(ClaudeCodeError, match="boom"):
+            decode_event({"type": "error", "error": "boom"})
+        with pytest.raises(SchedulerFullError) as excinfo:
+            decode_event({"type": "error", "error": "full", "full": True, "retry_after": 7})
+        assert excinfo.value.retry_after == 7
+
+
+class TestExecutor:
+    """End-to-end tests of ExecutorClient against ExecutorServer."""
+
+    async def test_streams_events_from_executor(self, executor) -> None:
+        """The client yields the executor's events and passes the request through."""
+        backend = FakeBackend()
+        server = await executor(backend)
+        client = ExecutorClient([server.path])
+
+        events = [
+            event
+            async for event in client.stream("hi", Path("/unused"), session_id="s1", resume=True)
+        ]
+
+        assert events[0] == TextDelta(text="thinking")
+        assert events[1].name == "Bash"
+        assert events[-1].response.result == "done: hi"
+        assert backend.calls[0]["session_id"] == "s1"
+        assert backend.calls[0]["resume"] is True
+        assert client.in_flight == {server.path: 0}
+
+    async def test_failure_is_raised_in_front(self, executor) -> None:
+        """A failing run surfaces as ClaudeCodeError on the client."""
+        server = await executor(FakeBackend(error=ClaudeCodeError("exit 1")))
+        client = ExecutorClient([server.path])
+
+        with pytest.raises(ClaudeCodeError, match="exit 1"):
+            await collect_response(client.stream("hi", Path("/unused")))
+
+    async def test_full_executor_raises_scheduler_full(self, executor) -> None:
+        """An executor with no room answers with SchedulerFullError."""
+        backend = FakeBackend(block=True)
+        server = await executor(backend, max_concurrency=1, max_queue=0)
+        client = ExecutorClient([server.path])
+
+        running = client.stream("first", Path("/unused"))
+        await running.__anext__()
+        with pytest.raises(SchedulerFullError):
+            await collect_response(client.stream("second", Path("/unused")))
+        await running.aclose()
+
+    async def test_closing_stream_cancels_remote_run(self, executor) -> None:
+        """Closing the client stream cancels the run in the executor."""
+        backend = FakeBackend(block=True)
+        server = await executor(backend)
+        client = ExecutorClient([server.path])
+
+        stream = client.stream("hi", Path("/unused"))
+        await stream.__anext__()
+        await stream.aclose()
+
+        await asyncio.wait_for(backend.cancelled.wait(), 1)
+
+    async def test_skips_unreachable_executor(self, executor, tmp_path: Path) -> None:
+        """Unreachable sockets are skipped; none reachable is an error."""
+        server = await executor(FakeBackend())
+        missing = tmp_path / "missing.sock"
+
+        client = ExecutorClient([missing, server.path])
+        response = await collect_response(client.stream("hi", Path("/unused")))
+        assert response.result == "done: hi"
+
+        with pytest.raises(ClaudeCodeError, match="No executor reachable"):
+            await collect_response(ExecutorClient([missing]).stream("hi", Path("/unused")))
+
+    async def test_prefers_least_busy_executor(self, executor) -> None:
+        """New invocations go to the executor with the fewest in flight."""
+        busy, idle = FakeBackend(block=True), FakeBackend()
+        busy_server = await executor(busy)
+        idle_server = await executor(idle)
+        client = ExecutorClient([busy_server.path, idle_server.path])
+
+        running = client.stream("first", Path("/unused"))
+        await running.__anext__()
+        await collect_response(client.stream("second", Path("/unused")))
+        await running.aclose()
+
+        assert [call["prompt"] for call in busy.calls] == ["first"]
+        assert [call["prompt"] for call in idle.calls] == ["second"]
+
+
+    async def test_silent_executor_hits_deadline(self, executor) -> None:
+        """A run with no result past timeout plus the margin fails and is cancelled."""
+        backend = FakeBackend(block=True)
+        server = await executor(backend)
+        client = ExecutorClient([server.path])
+
+        with patch("bender.executor.READ_MARGIN_SECONDS", 0.05):
+            with pytest.raises(ClaudeCodeError, match="no result within 0s"):
+                await collect_response(client.stream("hi", Path("/unused"), timeout=0))
+
+        await asyncio.wait_for(backend.cancelled.wait(), 1)
+        assert client.in_flight == {server.path: 0}
+
+    async def test_collects_process_metrics(self, executor, tmp_path: Path) -> None:
+        """Each reachable executor reports its process metrics; others are skipped."""
+        server = await executor(FakeBackend())
+        client = ExecutorClient([server.path, tmp_path / "missing.sock"])
+
+        snapshots = await client.metrics()
+
+        assert len(snapshots) == 1
+        assert set(snapshots[0]) == set(PROCESS_METRICS)
+        assert snapshots[0][TIMEOUTS.name] == TIMEOUTS.value
+
+
+async def _request(path: Path, message: dict) -> dict | None:
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        await write_frame(writer, message)
+        return await read_frame(reader)
+    finally:
+        writer.close()
+
+
+class TestTranscripts:
+    """Tests for moving session transcripts in and out of an executor."""
+
+    def test_transcript_dir_follows_cli_layout(self, tmp_path: Path) -> None:
+        """Transcripts live under ~/.claude/projects in a dir named after the workspace."""
+        assert transcript_dir(Path("/srv/agent.work"), home=tmp_path) == (
+            tmp_path / ".claude" / "projects" / "-srv-agent-work"
+        )
+
+    async def test_export_and_import(self, executor) -> None:
+        """An imported transcript can be exported again; unknown sessions export null."""
+        server = await executor(FakeBackend())
+
+        missing = await _request(server.path, {"type": "export_session", "session_id": "s1"})
+        assert missing == {"type": "session", "session_id": "s1", "transcript": None}
+
+        imported = await _request(
+            server.path,
+            {"type": "import_session", "session_id": "s1", "transcript": '{"a": 1}\n'},
+        )
+        assert imported == {"type": "ok"}
+        assert (server.transcripts / "s1.jsonl").read_text() == '{"a": 1}\n'
+        exported = await _request(server.path, {"type": "export_session", "session_id": "s1"})
+        assert exported["transcript"] == '{"a": 1}\n'
+
+    async def test_rejects_path_like_session_ids(self, executor) -> None:
+        """Session IDs cannot reach outside the transcript directory."""
+        server = await executor(FakeBackend())
+
+        reply = await _request(server.path, {"type": "export_session", "session_id": "../x"})
+
+        assert reply["type"] == "error"
+
+
+async def _wait_for(condition, timeout: float = 1.0) -> None:
+    """Poll until ``condition()`` holds, for work done in background tasks."""
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+class TestThreadAffinity:
+    """Tests for keeping a thread's turns on the executor holding its transcript."""
+
+    async def test_thread_stays_on_ring_owner(self, executor) -> None:
+        """Every turn of a tracked thread goes to its consistent-hash owner."""
+        backends = [FakeBackend(), FakeBackend()]
+        servers = [await executor(backend) for backend in backends]
+        sessions = SessionManager()
+        session_id = await sessions.create_session(THREAD)
+        client = ExecutorClient([server.path for server in servers], sessions)
+
+        for _ in range(3):
+            await collect_response(
+                client.stream("hi", Path("/unused"), session_id, resume=True, thread_ts=THREAD)
+            )
+
+        owner = client.ring.node_for(THREAD)
+        assert await sessions.get_worker(THREAD) == owner
+        owner_backend = backends[[str(server.path) for server in servers].index(owner)]
+        assert len(owner_backend.calls) == 3
+        assert owner_backend.calls[0]["thread_ts"] == THREAD
+
+    async def test_departed_executor_hands_over_transcript(self, executor) -> None:
+        """A thread owned by an executor no longer configured moves with its transcript."""
+        old_server = await executor(FakeBackend())
+        new_backend = FakeBackend()
+        new_server = await executor(new_backend)
+        sessions = SessionManager()
+        session_id = await sessions.create_session(THREAD)
+        await sessions.set_worker(THREAD, str(old_server.path))
+        old_server.transcripts.mkdir()
+        (old_server.transcripts / f"{session_id}.jsonl").write_text("history\n")
+        client = ExecutorClient([new_server.path], sessions)
+
+        await collect_response(
+            client.stream("hi", Path("/unused"), session_id, resume=True, thread_ts=THREAD)
+        )
+
+        assert (new_server.transcripts / f"{session_id}.jsonl").read_text() == "history\n"
+        assert await sessions.get_worker(THREAD) == str(new_server.path)
+        assert new_backend.calls[0]["resume"] is True
+        assert client.migrations == {"moved": 1, "lost": 0}
+
+    async def test_unreachable_owner_keeps_thread_until_grace_ends(self, executor) -> None:
+        """A restarting owner fails the thread's turns but keeps its transcript."""
+        owner = await executor(FakeBackend())
+        other_backend = FakeBackend()
+        other = await executor(other_backend)
+        sessions = SessionManager()
+        session_id = await sessions.create_session(THREAD)
+        await sessions.set_worker(THREAD, str(owner.path))
+        client = ExecutorClient([owner.path, other.path], sessions, retry_interval=60)
+        await owner.close()
+
+        for _ in range(2):
+            with pytest.raises(ClaudeCodeError, match="unreachable"):
+                await collect_response(
+                    client.stream("hi", Path("/unused"), session_id, resume=True, thread_ts=THREAD)
+                )
+        assert await sessions.get_worker(THREAD) == str(owner.path)
+        assert str(owner.path) not in client.ring
+        assert client.migrations == {"moved": 0, "lost": 0}
+
+        backend = FakeBackend()
+        await executor(backend, path=owner.path)
+        await collect_response(
+            client.stream("hi", Path("/unused"), session_id, resume=True, thread_ts=THREAD)
+        )
+
+        assert backend.calls[0]["resume"] is True
+        assert str(owner.path) in client.ring
+        assert other_backend.calls == []
+        await client.close()
+
+    async def test_unreachable_owner_starts_thread_afresh(self, executor) -> None:
+        """If the owner stays down past the grace period, the thread starts over elsewhere."""
+        dead_server = await executor(FakeBackend())
+        backend = FakeBackend()
+        server = await executor(backend)
+        sessions = SessionManager()
+        session_id = await sessions.create_session(THREAD)
+        await sessions.set_worker(THREAD, str(dead_server.path))
+        client = ExecutorClient([dead_server.path, server.path], sessions, retry_interval=0.01)
+        await dead_server.close()
+
+        with pytest.raises(ClaudeCodeError, match="unreachable"):
+            await collect_response(
+                client.stream("hi", Path("/unused"), session_id, resume=True, thread_ts=THREAD)
+            )
+        await _wait_for(lambda: client.migrations["lost"] == 1)
+        for _ in range(2):
+            await collect_response(
+                client.stream("hi", Path("/unused"), session_id, resume=True, thread_ts=THREAD)
+            )
+
+        assert str(dead_server.path) not in client.ring
+        assert await sessions.get_worker(THREAD) == str(server.path)
+        assert [call["resume"] for call in backend.calls] == [False, True]
+        assert client.migrations == {"moved": 0, "lost": 1}
+
+    async def test_concurrent_removals_move_threads_once(self, executor) -> None:
+        """Removing the same executor twice at once migrates each thread once."""
+        old_server = await executor(FakeBackend())
+        new_server = await executor(FakeBackend())
+        sessions = SessionManager()
+        session_id = await sessions.create_session(THREAD)
+        await sessions.set_worker(THREAD, str(old_server.path))
+        old_server.transcripts.mkdir()
+        (old_server.transcripts / f"{session_id}.jsonl").write_text("history\n")
+        client = ExecutorClient([old_server.path, new_server.path], sessions)
+
+        await asyncio.gather(
+            client.remove_executor(old_server.path), client.remove_executor(old_server.path)
+        )
+
+        assert client.migrations == {"moved": 1, "lost": 0}
+        assert await sessions.get_worker(THREAD) == str(new_server.path)
+
+    async def test_start_moves_threads_off_unconfigured_executors(self, executor) -> None:
+        """Threads of an executor dropped from the config move in the background."""
+        old_server = await executor(FakeBackend())
+        new_server = await executor(FakeBackend())
+        sessions = SessionManager()
+        session_id = await sessions.create_session(THREAD)
+        await sessions.set_worker(THREAD, str(old_server.path))
+        old_server.transcripts.mkdir()
+        (old_server.transcripts / f"{session_id}.jsonl").write_text("history\n")
+        client = ExecutorClient([new_server.path], sessions)
+
+        await client.start()
+        await _wait_for(lambda: client.migrations["moved"] == 1)
+
+        assert (new_server.transcripts / f"{session_id}.jsonl").read_text() == "history\n"
+        assert await sessions.get_worker(THREAD) == str(new_server.path)
+
+    async def test_lost_transcript_survives_restart(self, executor) -> None:
+        """A thread marked lost starts afresh even under a new client (front restart)."""
+        backend = FakeBackend()
+        server = await executor(backend)
+        sessions = SessionManager()
+        session_id = await sessions.create_session(THREAD)
+        await sessions.set_worker(THREAD, str(server.path))
+        await sessions.set_transcript_lost(THREAD)
+        client = ExecutorClient([server.path], sessions)
+
+        for _ in range(2):
+            await collect_response(
+                client.stream("hi", Path("/unused"), session_id, resume=True, thread_ts=THREAD)
+            )
+
+        assert [call["resume"] for call in backend.calls] == [False, True]
+        assert (await sessions.get_record(THREAD)).transcript_lost is False
+
+    async def test_executor_rejoins_ring(self, executor, tmp_path: Path) -> None:
+        """An executor that comes back is probed and put back on the ring."""
+        first = await executor(FakeBackend())
+        second = await executor(FakeBackend())
+        client = ExecutorClient([first.path, second.path], retry_interval=0)
+        await first.close()
+
+        await collect_response(client.stream("hi", Path("/unused")))
+        await collect_response(client.stream("hi", Path("/unused")))
+        assert str(first.path) not in client.ring
+
+        await executor(FakeBackend(), path=first.path)
+        await collect_response(client.stream("hi", Path("/unused")))
+
+        assert str(first.path) in client.ring
@@ -0,0 +1,54 @@
+"""Tests for the consistent hash ring module."""
+
+from bender.hash_ring import HashRing
+
+KEYS = [f"1700000000.{i:06d}" for i in range(2000)]
+
+
+class TestHashRing:
+    """Tests for the HashRing class."""
+
+    def test_empty_ring_has_no_owner(self) -> None:
+        """Keys have no node until one is added."""
+        ring = HashRing()
+        assert ring.node_for("1234567890.123456") is None
+        assert len(ring) == 0
+
+    def test_assignment_is_stable(self) -> None:
+        """The same nodes give the same owner, whatever order they were added in."""
+        first = HashRing(["a", "b", "c"])
+        second = HashRing(["c", "a", "b"])
+        assert all(first.node_for(key) == second.node_for(key) for key in KEYS)
+
+    def test_keys_spread_over_nodes(self) -> None:
+        """Every node gets a reasonable share of keys."""
+        ring = HashRing(["a", "b", "c", "d"])
+        counts = {node: 0 for node in ring.nodes}
+        for key in KEYS:
+            counts[ring.node_for(key)] += 1
+        assert min(counts.values()) > len(KEYS) / 4 / 2
+
+    def test_removing_node_only_moves_its_keys(self) -> None:
+        """Keys owned by the remaining nodes keep their owner."""
+        ring = HashRing(["a", "b", "c"])
+        before = {key: ring.node_for(key) for key in KEYS}
+
+        ring.remove("b")
+
+        assert "b" not in ring
+        for key, owner in before.items():
+            if owner != "b":
+                assert ring.node_for(key) == owner
+            else:
+                assert ring.node_for(key) in ("a", "c")
+
+    def test_adding_node_only_takes_keys(self) -> None:
+        """A new node takes over some keys; no key moves between old nodes."""
+        ring = HashRing(["a", "b"])
+        before = {key: ring.node_for(key) for key in KEYS}
+
+        ring.add("c")
+
+        moved = [key for key in KEYS if ring.node_for(key) != before[key]]
+        assert moved
+        assert all(ring.node_for(key) == "c" for key in moved)
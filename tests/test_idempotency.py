@@ -0,0 +1,126 @@
+"""Tests for the idempotency key cache module."""
+
+import asyncio
+import time
+
+import pytest
+
+from bender.idempotency import IdempotencyCache, IdempotencyKeyReusedError
+
+
+class TestIdempotencyCache:
+    """Tests for the IdempotencyCache class."""
+
+    async def test_first_run_is_not_replayed(self) -> None:
+        """A new key runs the work and reports it as fresh."""
+        cache = IdempotencyCache()
+
+        async def work() -> str:
+            return "result"
+
+        assert await cache.run("k1", "body", work) == ("result", False)
+        assert len(cache) == 1
+
+    async def test_finished_result_is_replayed(self) -> None:
+        """A repeated key returns the cached result without running again."""
+        cache = IdempotencyCache()
+        calls = 0
+
+        async def work() -> int:
+            nonlocal calls
+            calls += 1
+            return calls
+
+        await cache.run("k1", "body", work)
+        assert await cache.run("k1", "body", work) == (1, True)
+        assert calls == 1
+        assert cache.replays == 1
+
+    async def test_concurrent_requests_share_one_run(self) -> None:
+        """Requests arriving while the first is in flight await its result."""
+        cache = IdempotencyCache()
+        gate = asyncio.Event()
+        calls = 0
+
+        async def work() -> str:
+            nonlocal calls
+            calls += 1
+            await gate.wait()
+            return "shared"
+
+        first = asyncio.create_task(cache.run("k1", "body", work))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.run("k1", "body", work))
+        await asyncio.sleep(0)
+        gate.set()
+
+        assert await first == ("shared", False)
+        assert await second == ("shared", True)
+        assert calls == 1
+
+    async def test_cancelled_caller_does_not_cancel_shared_run(self) -> None:
+        """A caller going away leaves the run going for the others."""
+        cache = IdempotencyCache()
+        gate = asyncio.Event()
+
+        async def work() -> str:
+            await gate.wait()
+            return "finished"
+
+        first = asyncio.create_task(cache.run("k1", "body", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+
+        assert await cache.run("k1", "body", work) == ("finished", True)
+
+    async def test_failures_are_not_cached(self) -> None:
+        """After a failed run the same key runs again."""
+        cache = IdempotencyCache()
+
+        async def fail() -> str:
+            raise RuntimeError("boom")
+
+        async def work() -> str:
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await cache.run("k1", "body", fail)
+        assert await cache.run("k1", "body", work) == ("ok", False)
+
+    async def test_key_reused_with_different_body_raises(self) -> None:
+        """The same key with another request body is rejected."""
+        cache = IdempotencyCache()
+
+        async def work() -> str:
+            return "ok"
+
+        await cache.run("k1", "body", work)
+        with pytest.raises(IdempotencyKeyReusedError):
+            await cache.run("k1", "other body", work)
+
+    async def test_results_expire_after_ttl(self) -> None:
+        """Finished results are forgotten once the TTL has passed."""
+        cache = IdempotencyCache(ttl=60)
+
+        async def work() -> str:
+            return "ok"
+
+        await cache.run("k1", "body", work)
+        cache._entries["k1"].finished_at = time.monotonic() - 120
+
+        assert await cache.run("k1", "body", work) == ("ok", False)
+
+    async def test_oldest_results_dropped_over_max_entries(self) -> None:
+        """Beyond max_entries the oldest finished results are dropped."""
+        cache = IdempotencyCache(max_entries=2)
+
+        async def work() -> str:
+            return "ok"
+
+        for key in ("k1", "k2", "k3"):
+            await cache.run(key, "body", work)
+
+        assert len(cache) == 2
+        assert "k1" not in cache._entries
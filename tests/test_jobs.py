@@ -0,0 +1,63 @@
+"""Tests for the async job table module."""
+
+import time
+
+import pytest
+
+from bender.jobs import FAILED, PENDING, SUCCEEDED, JobTable, JobTableFullError
+
+
+class TestJobTable:
+    """Tests for the JobTable class."""
+
+    def test_create_and_get(self) -> None:
+        """New jobs are pending and can be looked up by ID."""
+        jobs = JobTable()
+        job = jobs.create()
+        assert job.status == PENDING
+        assert jobs.get(job.job_id) is job
+
+    def test_unknown_job_returns_none(self) -> None:
+        """Unknown IDs return None."""
+        assert JobTable().get("missing") is None
+
+    def test_succeed_and_fail_record_outcome(self) -> None:
+        """Finishing a job records its result or error and the finish time."""
+        jobs = JobTable()
+        ok, bad = jobs.create(), jobs.create()
+        ok.succeed({"response": "hi"})
+        bad.fail("boom", 502)
+
+        assert (ok.status, ok.result) == (SUCCEEDED, {"response": "hi"})
+        assert (bad.status, bad.error, bad.error_status) == (FAILED, "boom", 502)
+        assert ok.finished_at is not None
+
+    def test_finished_jobs_expire_after_ttl(self) -> None:
+        """Finished jobs are dropped once the TTL has passed."""
+        jobs = JobTable(ttl=60)
+        job = jobs.create()
+        job.succeed({})
+        job.finished_at = time.time() - 120
+        assert jobs.get(job.job_id) is None
+
+    def test_pending_jobs_never_expire(self) -> None:
+        """Jobs still running are kept regardless of age."""
+        jobs = JobTable(ttl=0)
+        job = jobs.create()
+        assert jobs.get(job.job_id) is job
+
+    def test_full_table_drops_oldest_finished(self) -> None:
+        """At capacity, the oldest finished job makes room."""
+        jobs = JobTable(max_jobs=2)
+        first, second = jobs.create(), jobs.create()
+        first.succeed({})
+        jobs.create()
+        assert jobs.get(first.job_id) is None
+        assert jobs.get(second.job_id) is second
+
+    def test_full_of_pending_rejects(self) -> None:
+        """A table full of running jobs rejects new ones."""
+        jobs = JobTable(max_jobs=1)
+        jobs.create()
+        with pytest.raises(JobTableFullError):
+            jobs.create()
@@ -0,0 +1,103 @@
+"""Tests for the in-process metrics module."""
+
+import pytest
+
+from bender.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestCounter:
+    """Tests for the Counter metric."""
+
+    def test_inc(self) -> None:
+        """inc() adds to the value."""
+        counter = Counter("c_total", "A counter.")
+        counter.inc()
+        counter.inc(2)
+        assert counter.samples() == ["c_total 3"]
+
+
+class TestGauge:
+    """Tests for the Gauge metric."""
+
+    def test_inc_dec(self) -> None:
+        """Gauges go up and down."""
+        gauge = Gauge("g", "A gauge.")
+        gauge.inc(5)
+        gauge.dec(2)
+        assert gauge.get() == 3
+
+    def test_set_function(self) -> None:
+        """A callback gauge is read at render time."""
+        items = [1, 2]
+        gauge = Gauge("g", "A gauge.")
+        gauge.set_function(lambda: len(items))
+        items.append(3)
+        assert gauge.samples() == ["g 3"]
+
+
+class TestHistogram:
+    """Tests for the Histogram metric."""
+
+    def test_cumulative_buckets(self) -> None:
+        """Bucket counts are cumulative and end with +Inf."""
+        histogram = Histogram("h_seconds", "A histogram.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        assert histogram.samples() == [
+            'h_seconds_bucket{le="0.1"} 1',
+            'h_seconds_bucket{le="1"} 2',
+            'h_seconds_bucket{le="+Inf"} 3',
+            "h_seconds_sum 5.55",
+            "h_seconds_count 3",
+        ]
+
+    def test_time_observes_duration(self) -> None:
+        """time() records one observation for the enclosed block."""
+        histogram = Histogram("h_seconds", "A histogram.")
+        with histogram.time():
+            pass
+        assert histogram.count == 1
+
+
+class TestRegistry:
+    """Tests for the Registry class."""
+
+    def test_render_exposition_format(self) -> None:
+        """render() emits HELP and TYPE lines before the samples."""
+        registry = Registry()
+        registry.register(Counter("c_total", "A counter.")).inc()
+
+        assert registry.render() == (
+            "# HELP c_total A counter.\n"
+            "# TYPE c_total counter\n"
+            "c_total 1\n"
+        )
+
+    def test_render_adds_remote_snapshots(self) -> None:
+        """Snapshots from other processes are summed into the local values."""
+        registry = Registry()
+        registry.register(Counter("c_total", "A counter.")).inc()
+        registry.register(Gauge("g", "A gauge.")).set(1)
+        registry.register(Histogram("h_seconds", "A histogram.", buckets=(1.0,))).observe(0.5)
+        remote = Registry()
+        remote.register(Counter("c_total", "A counter.")).inc(2)
+        remote.register(Gauge("g", "A gauge.")).set(3)
+        remote.register(Histogram("h_seconds", "A histogram.", buckets=(1.0,))).observe(5.0)
+        snapshot = remote.snapshot(("c_total", "g", "h_seconds"))
+
+        body = registry.render([snapshot, {"c_total": 1}])
+
+        assert "c_total 4\n" in body
+        assert "g 4\n" in body
+        assert 'h_seconds_bucket{le="1"} 1\n' in body
+        assert 'h_seconds_bucket{le="+Inf"} 2\n' in body
+        assert "h_seconds_sum 5.5\n" in body
+        assert "h_seconds_count 2\n" in body
+
+    def test_duplicate_name_rejected(self) -> None:
+        """Registering two metrics with the same name raises."""
+        registry = Registry()
+        registry.register(Counter("c_total", "A counter."))
+        with pytest.raises(ValueError, match="already registered"):
+            registry.register(Gauge("c_total", "A gauge."))
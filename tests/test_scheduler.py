@@ -0,0 +1,206 @@
+"""Tests for the invocation scheduler module."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from bender.claude_code import ClaudeCodeError, ClaudeResponse, ResultEvent, TextDelta
+from bender.scheduler import InvocationScheduler, SchedulerFullError
+
+
+class FakeBackend:
+    """Stream function stand-in that blocks until released."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.running = 0
+        self.max_running = 0
+        self.calls: list[dict] = []
+
+    async def __call__(self, prompt: str, workspace: Path, **kwargs):
+        self.calls.append({"prompt": prompt, "workspace": workspace, **kwargs})
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            yield TextDelta(text="working")
+            await self.release.wait()
+            yield ResultEvent(ClaudeResponse(result=f"done: {prompt}", session_id="s1"))
+        finally:
+            self.running -= 1
+
+
+class TestInvocationScheduler:
+    """Tests for the InvocationScheduler class."""
+
+    async def test_run_returns_response(self, tmp_path: Path) -> None:
+        """run() drains the backend stream and returns the final response."""
+        backend = FakeBackend()
+        backend.release.set()
+        scheduler = InvocationScheduler(tmp_path, stream_fn=backend)
+
+        response = await scheduler.run("hello", session_id="abc", resume=True)
+
+        assert response.result == "done: hello"
+        assert backend.calls[0]["workspace"] == tmp_path
+        assert backend.calls[0]["session_id"] == "abc"
+        assert backend.calls[0]["resume"] is True
+        assert backend.calls[0]["thread_ts"] is None
+        assert scheduler.completed == 1
+
+    async def test_stream_passes_thread_to_backend(self, tmp_path: Path) -> None:
+        """The thread a turn belongs to reaches the backend for routing."""
+        backend = FakeBackend()
+        backend.release.set()
+        scheduler = InvocationScheduler(tmp_path, stream_fn=backend)
+
+        await scheduler.run("hello", session_id="abc", thread_ts="1234567890.123456")
+
+        assert backend.calls[0]["thread_ts"] == "1234567890.123456"
+
+    async def test_stream_yields_backend_events(self, tmp_path: Path) -> None:
+        """stream() passes backend events through unchanged."""
+        backend = FakeBackend()
+        backend.release.set()
+        scheduler = InvocationScheduler(tmp_path, stream_fn=backend)
+
+        events = [event async for event in scheduler.stream("hi")]
+
+        assert events[0] == TextDelta(text="working")
+        assert isinstance(events[-1], ResultEvent)
+
+    async def test_concurrency_is_bounded(self, tmp_path: Path) -> None:
+        """No more than max_concurrency invocations run at once."""
+        backend = FakeBackend()
+        scheduler = InvocationScheduler(tmp_path, max_concurrency=2, stream_fn=backend)
+
+        tasks = [asyncio.create_task(scheduler.run(f"p{i}")) for i in range(5)]
+        await asyncio.sleep(0.01)
+        assert scheduler.in_flight == 2
+        assert scheduler.queued == 3
+
+        backend.release.set()
+        await asyncio.gather(*tasks)
+        assert backend.max_running == 2
+        assert scheduler.completed == 5
+        assert scheduler.in_flight == 0
+
+    async def test_queue_is_fifo(self, tmp_path: Path) -> None:
+        """Queued invocations start in arrival order."""
+        backend = FakeBackend()
+        scheduler = InvocationScheduler(tmp_path, max_concurrency=1, stream_fn=backend)
+
+        tasks = [asyncio.create_task(scheduler.run(f"p{i}")) for i in range(4)]
+        await asyncio.sleep(0.01)
+        backend.release.set()
+        await asyncio.gather(*tasks)
+
+        assert [call["prompt"] for call in backend.calls] == ["p0", "p1", "p2", "p3"]
+
+    async def test_rejects_when_queue_full(self, tmp_path: Path) -> None:
+        """Raises SchedulerFullError instead of queueing past max_queue."""
+        backend = FakeBackend()
+        scheduler = InvocationScheduler(
+            tmp_path, max_concurrency=1, max_queue=1, stream_fn=backend
+        )
+
+        running = asyncio.create_task(scheduler.run("running"))
+        waiting = asyncio.create_task(scheduler.run("waiting"))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(SchedulerFullError, match="queue is full"):
+            await scheduler.run("rejected")
+        assert scheduler.rejected == 1
+
+        backend.release.set()
+        await asyncio.gather(running, waiting)
+        assert len(backend.calls) == 2
+
+    async def test_admit_checks_without_reserving(self, tmp_path: Path) -> None:
+        """admit() rejects only once the queue is full, with a retry estimate."""
+        backend = FakeBackend()
+        scheduler = InvocationScheduler(
+            tmp_path, max_concurrency=1, max_queue=1, stream_fn=backend
+        )
+        scheduler.admit()
+        assert scheduler.queued == scheduler.in_flight == 0
+
+        running = asyncio.create_task(scheduler.run("running"))
+        waiting = asyncio.create_task(scheduler.run("waiting"))
+        await asyncio.sleep(0.01)
+
+        assert scheduler.is_full
+        with pytest.raises(SchedulerFullError) as excinfo:
+            scheduler.admit()
+        assert excinfo.value.retry_after >= 1
+
+        backend.release.set()
+        await asyncio.gather(running, waiting)
+        assert not scheduler.is_full
+
+    async def test_retry_after_scales_with_queue(self, tmp_path: Path) -> None:
+        """The estimate is the average run time times rounds of queued work."""
+        scheduler = InvocationScheduler(tmp_path, max_concurrency=2, timeout=600)
+        scheduler.completed, scheduler.total_run_time = 4, 40.0
+        assert scheduler.retry_after() == 10
+        scheduler.queued = 3
+        assert scheduler.retry_after() == 20
+
+    async def test_on_queued_reports_position(self, tmp_path: Path) -> None:
+        """Invocations that must wait are told their queue position."""
+        backend = FakeBackend()
+        scheduler = InvocationScheduler(tmp_path, max_concurrency=1, stream_fn=backend)
+        positions: list[tuple[str, int]] = []
+
+        def run(prompt: str):
+            async def on_queued(position: int) -> None:
+                positions.append((prompt, position))
+
+            async def consume() -> None:
+                async for _ in scheduler.stream(prompt, on_queued=on_queued):
+                    pass
+
+            return asyncio.create_task(consume())
+
+        tasks = [run(f"p{i}") for i in range(3)]
+        await asyncio.sleep(0.01)
+        backend.release.set()
+        await asyncio.gather(*tasks)
+
+        assert positions == [("p1", 1), ("p2", 2)]
+
+    async def test_queue_full_error_is_claude_code_error(self) -> None:
+        """SchedulerFullError is handled by existing ClaudeCodeError handlers."""
+        assert issubclass(SchedulerFullError, ClaudeCodeError)
+
+    async def test_slot_released_on_failure(self, tmp_path: Path) -> None:
+        """A failing invocation frees its slot."""
+
+        async def failing(prompt: str, workspace: Path, **kwargs):
+            raise ClaudeCodeError("boom")
+            yield  # pragma: no cover
+
+        scheduler = InvocationScheduler(tmp_path, max_concurrency=1, stream_fn=failing)
+        for _ in range(2):
+            with pytest.raises(ClaudeCodeError, match="boom"):
+                await scheduler.run("hello")
+
+        assert scheduler.in_flight == 0
+        assert scheduler.completed == 2
+
+    async def test_stats_tracks_queue_wait_and_run_time(self, tmp_path: Path) -> None:
+        """stats() reports counts and average queue-wait/run-time."""
+        backend = FakeBackend()
+        scheduler = InvocationScheduler(tmp_path, max_concurrency=1, stream_fn=backend)
+
+        tasks = [asyncio.create_task(scheduler.run(f"p{i}")) for i in range(2)]
+        await asyncio.sleep(0.05)
+        backend.release.set()
+        await asyncio.gather(*tasks)
+
+        stats = scheduler.stats()
+        assert stats["completed"] == 2
+        assert stats["in_flight"] == 0
+        assert stats["queued"] == 0
+        assert stats["avg_run_time_seconds"] > 0
+        assert stats["avg_queue_wait_seconds"] > 0
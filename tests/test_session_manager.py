@@ -1,8 +1,14 @@
 """Tests for the session manager module."""
 
+import asyncio
+import time
+from pathlib import Path
+from unittest.mock import patch
+
 import pytest
 
 from bender.session_manager import SessionManager
+from bender.session_store import SessionRecord, SQLiteSessionStore
 
 
 class TestSessionManager:
@@ -65,6 +71,28 @@ class TestSessionManager:
         result = await session_manager.get_session(thread_ts)
         assert result == new_id
 
+    async def test_len_counts_threads(self, session_manager: SessionManager) -> None:
+        """len() returns the number of tracked threads."""
+        assert len(session_manager) == 0
+        await session_manager.create_session("1234567890.000001")
+        await session_manager.create_session("1234567890.000002")
+        assert len(session_manager) == 2
+
+    async def test_sessions_survive_restart(self, tmp_path: Path) -> None:
+        """Sessions persisted by one manager are loaded by the next."""
+        path = tmp_path / "sessions.db"
+        manager = SessionManager(SQLiteSessionStore(path))
+        await manager.start()
+        session_id = await manager.create_session("1234567890.000001")
+        await manager.set_session("1234567890.000002", "explicit")
+        await manager.close()
+
+        restarted = SessionManager(SQLiteSessionStore(path))
+        await restarted.start()
+        assert await restarted.get_session("1234567890.000001") == session_id
+        assert await restarted.get_session("1234567890.000002") == "explicit"
+        await restarted.close()
+
     async def test_multiple_threads_independent(
         self, session_manager: SessionManager
     ) -> None:
@@ -80,3 +108,237 @@ class TestSessionManager:
         assert await session_manager.get_session(ts1) == id1
         assert await session_manager.get_session(ts2) == id2
         assert await session_manager.get_session(ts3) == id3
+
+    async def test_worker_ownership(self, session_manager: SessionManager) -> None:
+        """Threads record the executor that owns them and can be listed by it."""
+        ts1 = "1234567890.000001"
+        ts2 = "1234567890.000002"
+        id1 = await session_manager.create_session(ts1)
+        await session_manager.create_session(ts2)
+
+        assert await session_manager.get_worker(ts1) is None
+        await session_manager.set_worker(ts1, "/run/ex1.sock")
+        await session_manager.set_worker(ts2, "/run/ex2.sock")
+
+        assert await session_manager.get_worker(ts1) == "/run/ex1.sock"
+        assert await session_manager.threads_on_worker("/run/ex1.sock") == [(ts1, id1)]
+
+    async def test_set_worker_ignores_untracked_thread(
+        self, session_manager: SessionManager
+    ) -> None:
+        """Ownership is only recorded for threads with a session."""
+        await session_manager.set_worker("1234567890.000001", "/run/ex1.sock")
+
+        assert await session_manager.get_worker("1234567890.000001") is None
+        assert len(session_manager) == 0
+
+    async def test_transcript_lost_survives_restart(self, tmp_path: Path) -> None:
+        """A lost transcript is persisted until it is cleared."""
+        path = tmp_path / "sessions.db"
+        thread_ts = "1234567890.000001"
+        manager = SessionManager(SQLiteSessionStore(path))
+        await manager.start()
+        await manager.create_session(thread_ts)
+        await manager.set_transcript_lost(thread_ts)
+        await manager.close()
+
+        restarted = SessionManager(SQLiteSessionStore(path))
+        await restarted.start()
+        assert (await restarted.get_record(thread_ts)).transcript_lost is True
+        await restarted.set_transcript_lost(thread_ts, False)
+        assert (await restarted.get_record(thread_ts)).transcript_lost is False
+        await restarted.close()
+
+
+class TestSessionEviction:
+    """Tests for the LRU and idle-TTL bounds on the session map."""
+
+    async def test_lru_eviction_over_max_entries(self) -> None:
+        """The least recently used thread is evicted beyond max_entries."""
+        manager = SessionManager(max_entries=2)
+        await manager.create_session("t1")
+        await manager.create_session("t2")
+        await manager.get_session("t1")  # t2 is now least recently used
+        await manager.create_session("t3")
+
+        assert len(manager) == 2
+        assert await manager.has_session("t1")
+        assert not await manager.has_session("t2")
+        assert manager.evictions == {"lru": 1, "ttl": 0}
+
+    async def test_record_turn_updates_record(self) -> None:
+        """record_turn() bumps the turn count and last-used time."""
+        manager = SessionManager()
+        await manager.create_session("t1")
+        record = await manager.get_record("t1")
+        before = record.last_used
+
+        await manager.record_turn("t1")
+        await manager.record_turn("t1")
+        assert record.turn_count == 2
+        assert record.last_used >= before
+
+    async def test_record_turn_unknown_thread_is_noop(self) -> None:
+        """record_turn() ignores threads without a session."""
+        manager = SessionManager()
+        await manager.record_turn("missing")
+        assert len(manager) == 0
+
+    async def test_sweeper_expires_idle_sessions(self) -> None:
+        """The background sweeper removes sessions idle beyond the TTL."""
+        manager = SessionManager(idle_ttl=60, sweep_interval=0.01)
+        await manager.start()
+        await manager.create_session("fresh")
+        await manager.create_session("stale")
+        (await manager.get_record("stale")).last_used = time.time() - 120
+        # Restore LRU order to match the backdated timestamp
+        manager._sessions.move_to_end("stale", last=False)
+        await asyncio.sleep(0.05)
+
+        assert await manager.has_session("fresh")
+        assert not await manager.has_session("stale")
+        assert manager.evictions["ttl"] == 1
+        await manager.close()
+
+    async def test_expired_sessions_dropped_on_load(self, tmp_path: Path) -> None:
+        """Persisted sessions past the TTL are not loaded and are deleted."""
+        path = tmp_path / "sessions.db"
+        store = SQLiteSessionStore(path)
+        store.put("old", SessionRecord("s1", last_used=time.time() - 3600))
+        store.put("new", SessionRecord("s2"))
+        await store.close()
+
+        manager = SessionManager(SQLiteSessionStore(path), idle_ttl=60)
+        await manager.start()
+        assert await manager.get_session("new") == "s2"
+        assert await manager.get_session("old") is None
+        await manager.close()
+
+        reopened = SQLiteSessionStore(path)
+        assert list(await reopened.load()) == ["new"]
+        await reopened.close()
+
+    async def test_limits_disabled_by_zero(self) -> None:
+        """With both limits at zero nothing is ever evicted."""
+        manager = SessionManager(max_entries=0, idle_ttl=0)
+        for i in range(50):
+            await manager.create_session(f"t{i}")
+        assert len(manager) == 50
+        assert manager.evictions == {"lru": 0, "ttl": 0}
+
+
+class TestSessionLocking:
+    """Tests for the lock-free read path and striped write locks."""
+
+    async def test_reads_do_not_wait_on_write_lock(self) -> None:
+        """Lookups succeed while the thread's write lock is held."""
+        manager = SessionManager()
+        session_id = await manager.create_session("t1")
+        async with manager._lock_for("t1"):
+            result = await asyncio.wait_for(manager.get_session("t1"), timeout=0.1)
+            assert await asyncio.wait_for(manager.has_session("t1"), timeout=0.1)
+        assert result == session_id
+
+    async def test_writes_to_other_stripes_proceed(self) -> None:
+        """A held stripe does not block writes that hash to another one."""
+        manager = SessionManager(lock_stripes=64)
+        other = next(
+            f"t{i}" for i in range(1000)
+            if manager._lock_for(f"t{i}") is not manager._lock_for("t0")
+        )
+        async with manager._lock_for("t0"):
+            await asyncio.wait_for(manager.create_session(other), timeout=0.1)
+        assert await manager.has_session(other)
+
+    async def test_same_thread_is_stable_stripe(self) -> None:
+        """A thread always maps to the same lock."""
+        manager = SessionManager()
+        assert manager._lock_for("1234567890.000001") is manager._lock_for("1234567890.000001")
+
+
+class TestSharedSessions:
+    """Tests for replicas sharing one session store via read-through."""
+
+    async def test_replica_finds_thread_from_store(self, tmp_path: Path) -> None:
+        """A thread created on one replica is found by another on a map miss."""
+        path = tmp_path / "sessions.db"
+        first = SessionManager(SQLiteSessionStore(path), read_through=True)
+        second = SessionManager(SQLiteSessionStore(path), read_through=True)
+        await first.start()
+        await second.start()
+
+        session_id = await first.create_session("t1")
+        await first._store.flush()
+
+        assert await second.has_session("t1")
+        assert await second.get_session("t1") == session_id
+        assert len(second) == 1
+        await first.close()
+        await second.close()
+
+    async def test_without_read_through_misses_stay_local(self, tmp_path: Path) -> None:
+        """By default only the map is consulted after startup."""
+        path = tmp_path / "sessions.db"
+        first = SessionManager(SQLiteSessionStore(path))
+        second = SessionManager(SQLiteSessionStore(path))
+        await first.start()
+        await second.start()
+
+        await first.create_session("t1")
+        await first._store.flush()
+
+        assert not await second.has_session("t1")
+        await first.close()
+        await second.close()
+
+    async def test_eviction_keeps_shared_row(self, tmp_path: Path) -> None:
+        """LRU eviction drops only the local copy; the thread comes back from the store."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        manager = SessionManager(store, max_entries=1, read_through=True)
+        first = await manager.create_session("t1")
+        await manager.create_session("t2")
+        await store.flush()
+
+        assert manager.evictions["lru"] == 1
+        assert await manager.get_session("t1") == first
+        await store.close()
+
+    async def test_missing_thread_is_looked_up_once(self, tmp_path: Path) -> None:
+        """A thread the store lacks is not queried again until the miss expires."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        manager = SessionManager(store, read_through=True, miss_ttl=0.05)
+        with patch.object(store, "get", wraps=store.get) as get:
+            assert not await manager.has_session("t1")
+            assert not await manager.has_session("t1")
+            assert get.call_count == 1
+
+            await asyncio.sleep(0.06)
+            assert not await manager.has_session("t1")
+            assert get.call_count == 2
+        await store.close()
+
+    async def test_created_thread_clears_miss(self, tmp_path: Path) -> None:
+        """Creating a thread locally overrides a cached miss."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        manager = SessionManager(store, read_through=True)
+        assert not await manager.has_session("t1")
+
+        session_id = await manager.create_session("t1")
+        assert await manager.get_session("t1") == session_id
+        assert manager._misses == {}
+        await store.close()
+
+    async def test_idle_store_rows_are_not_revived(self, tmp_path: Path) -> None:
+        """Rows idle past the TTL are ignored on lookup and pruned by the sweeper."""
+        path = tmp_path / "sessions.db"
+        store = SQLiteSessionStore(path)
+        store.put("old", SessionRecord("s1", last_used=time.time() - 3600))
+        await store.flush()
+
+        manager = SessionManager(store, idle_ttl=60, sweep_interval=0.01, read_through=True)
+        await manager.start()
+        assert not await manager.has_session("old")
+        await asyncio.sleep(0.05)
+        await manager.close()
+
+        assert await SQLiteSessionStore(path).load() == {}
@@ -0,0 +1,227 @@
+"""Tests for the session storage backends module."""
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+from bender.session_store import SessionRecord, SessionStore, SQLiteSessionStore
+
+
+def _ids(records: dict[str, SessionRecord]) -> dict[str, str]:
+    return {ts: record.session_id for ts, record in records.items()}
+
+
+class TestSessionStore:
+    """Tests for the in-memory (no-op) base store."""
+
+    async def test_load_returns_empty(self) -> None:
+        """The base store never has anything to load."""
+        store = SessionStore()
+        store.put("t1", SessionRecord("s1"))
+        assert await store.load() == {}
+
+    def test_status_is_ok(self) -> None:
+        """The in-memory store is always healthy."""
+        assert SessionStore().status() == {"backend": "memory", "ok": True}
+
+
+class TestSQLiteSessionStore:
+    """Tests for the SQLiteSessionStore class."""
+
+    async def test_round_trip(self, tmp_path: Path) -> None:
+        """Flushed mappings are loaded by a new store on the same file."""
+        path = tmp_path / "sessions.db"
+        store = SQLiteSessionStore(path)
+        store.put("t1", SessionRecord("s1"))
+        store.put("t2", SessionRecord("s2"))
+        await store.close()
+
+        reopened = SQLiteSessionStore(path)
+        assert _ids(await reopened.load()) == {"t1": "s1", "t2": "s2"}
+        await reopened.close()
+
+    async def test_uses_wal_journal(self, tmp_path: Path) -> None:
+        """The database is opened in WAL mode."""
+        path = tmp_path / "sessions.db"
+        store = SQLiteSessionStore(path)
+        await store.close()
+
+        conn = sqlite3.connect(path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    async def test_put_is_buffered_until_flush(self, tmp_path: Path) -> None:
+        """put() does not touch the database until flushed."""
+        path = tmp_path / "sessions.db"
+        store = SQLiteSessionStore(path)
+        store.put("t1", SessionRecord("s1"))
+
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+        await store.flush()
+        assert conn.execute("SELECT session_id FROM sessions").fetchone()[0] == "s1"
+        conn.close()
+        await store.close()
+
+    async def test_latest_value_wins_within_batch(self, tmp_path: Path) -> None:
+        """Repeated puts for a thread collapse to the latest session."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("t1", SessionRecord("old"))
+        store.put("t1", SessionRecord("new"))
+        await store.flush()
+        assert _ids(await store.load()) == {"t1": "new"}
+        await store.close()
+
+    async def test_background_flush(self, tmp_path: Path) -> None:
+        """The write-behind task flushes on its interval."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db", flush_interval=0.01)
+        await store.start()
+        store.put("t1", SessionRecord("s1"))
+        await asyncio.sleep(0.1)
+
+        assert _ids(await store.load()) == {"t1": "s1"}
+        await store.close()
+
+    async def test_status_reports_failed_flush(self, tmp_path: Path) -> None:
+        """A failing background flush shows in status() until one succeeds."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db", flush_interval=0.01)
+        await store.start()
+        error = sqlite3.OperationalError("disk full")
+        with patch.object(store, "_write_batch", side_effect=error):
+            store.put("t1", SessionRecord("s1"))
+            await asyncio.sleep(0.05)
+            status = store.status()
+            assert status["ok"] is False
+            assert status["error"] == "disk full"
+            assert status["pending_writes"] == 1
+
+        await asyncio.sleep(0.05)
+        assert store.status()["ok"] is True
+        await store.close()
+
+    async def test_batch_size_triggers_early_flush(self, tmp_path: Path) -> None:
+        """Reaching batch_size wakes the flusher before the interval."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db", flush_interval=60, batch_size=2)
+        await store.start()
+        store.put("t1", SessionRecord("s1"))
+        store.put("t2", SessionRecord("s2"))
+        await asyncio.sleep(0.1)
+
+        assert len(await store.load()) == 2
+        await store.close()
+
+    async def test_record_fields_round_trip(self, tmp_path: Path) -> None:
+        """Timestamps and turn counts are persisted with the session ID."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("t1", SessionRecord("s1", created_at=10.0, last_used=20.0, turn_count=3))
+        await store.flush()
+
+        record = (await store.load())["t1"]
+        assert (record.created_at, record.last_used, record.turn_count) == (10.0, 20.0, 3)
+        await store.close()
+
+    async def test_worker_round_trip(self, tmp_path: Path) -> None:
+        """The owning executor is persisted, and may be unset."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("t1", SessionRecord("s1", worker="/run/ex1.sock"))
+        store.put("t2", SessionRecord("s2"))
+        await store.flush()
+
+        records = await store.load()
+        assert records["t1"].worker == "/run/ex1.sock"
+        assert records["t2"].worker is None
+        await store.close()
+
+    async def test_transcript_lost_round_trip(self, tmp_path: Path) -> None:
+        """A lost transcript is persisted, both when loading all and one record."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("t1", SessionRecord("s1", worker="/run/ex2.sock", transcript_lost=True))
+        store.put("t2", SessionRecord("s2"))
+        await store.flush()
+
+        records = await store.load()
+        assert records["t1"].transcript_lost is True
+        assert records["t2"].transcript_lost is False
+        assert (await store.get("t1")).transcript_lost is True
+        await store.close()
+
+    async def test_load_orders_by_last_used(self, tmp_path: Path) -> None:
+        """Records come back least recently used first."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("newer", SessionRecord("s1", last_used=200.0))
+        store.put("older", SessionRecord("s2", last_used=100.0))
+        await store.flush()
+
+        assert list(await store.load()) == ["older", "newer"]
+        await store.close()
+
+    async def test_delete_removes_row(self, tmp_path: Path) -> None:
+        """delete() removes a flushed mapping and cancels a pending one."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("t1", SessionRecord("s1"))
+        await store.flush()
+        store.delete("t1")
+        store.put("t2", SessionRecord("s2"))
+        store.delete("t2")
+        await store.flush()
+
+        assert await store.load() == {}
+        await store.close()
+
+    async def test_get_reads_one_record(self, tmp_path: Path) -> None:
+        """get() sees pending changes first, then the database."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("t1", SessionRecord("s1", turn_count=2))
+        assert (await store.get("t1")).session_id == "s1"
+        await store.flush()
+        store.delete("t1")
+        assert await store.get("t1") is None
+
+        other = SQLiteSessionStore(tmp_path / "sessions.db")
+        assert (await other.get("t1")).turn_count == 2
+        assert await other.get("missing") is None
+        await store.close()
+        await other.close()
+
+    async def test_get_does_not_wait_for_writes(self, tmp_path: Path) -> None:
+        """get() reads on its own connection while a batch holds the write lock."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("t1", SessionRecord("s1"))
+        await store.flush()
+
+        async with store._io_lock:
+            record = await asyncio.wait_for(store.get("t1"), timeout=1.0)
+        assert record.session_id == "s1"
+        await store.close()
+
+    async def test_prune_deletes_idle_rows(self, tmp_path: Path) -> None:
+        """prune() deletes rows last used before the cutoff, pending ones included."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        store.put("old", SessionRecord("s1", last_used=100.0))
+        await store.flush()
+        store.put("pending", SessionRecord("s2", last_used=100.0))
+        store.put("new", SessionRecord("s3", last_used=300.0))
+
+        assert await store.prune(200.0) == 2
+        assert list(await store.load()) == ["new"]
+        await store.close()
+
+    async def test_migrates_old_schema(self, tmp_path: Path) -> None:
+        """A database from before the record columns is upgraded in place."""
+        path = tmp_path / "sessions.db"
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE sessions (thread_ts TEXT PRIMARY KEY, session_id TEXT NOT NULL)"
+            " WITHOUT ROWID"
+        )
+        conn.execute("INSERT INTO sessions VALUES ('t1', 's1')")
+        conn.commit()
+        conn.close()
+
+        store = SQLiteSessionStore(path)
+        records = await store.load()
+        assert _ids(records) == {"t1": "s1"}
+        assert records["t1"].turn_count == 0
+        assert records["t1"].worker is None
+        await store.close()
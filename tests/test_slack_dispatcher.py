@@ -0,0 +1,200 @@
+"""Tests for the outbound Slack dispatcher module."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from bender.metrics import SLACK_POST_SECONDS
+from bender.slack_dispatcher import SlackBacklogFullError, SlackDispatcher, TokenBucket
+from bender.slack_utils import SLACK_MSG_LIMIT, SNIPPET_NOTICE
+
+
+def _rate_limited(retry_after: str | None = "0") -> SlackApiError:
+    """Build the error slack_sdk raises for an HTTP 429."""
+    response = MagicMock()
+    response.status_code = 429
+    response.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return SlackApiError("ratelimited", response)
+
+
+class TestTokenBucket:
+    """Tests for the TokenBucket class."""
+
+    async def test_burst_is_immediate(self) -> None:
+        """Up to burst tokens are handed out without waiting."""
+        bucket = TokenBucket(rate=1, burst=3)
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        assert time.monotonic() - start < 0.05
+
+    async def test_waits_for_refill(self) -> None:
+        """Past the burst, acquire waits for the refill rate."""
+        bucket = TokenBucket(rate=20, burst=1)
+        await bucket.acquire()
+        start = time.monotonic()
+        await bucket.acquire()
+        assert time.monotonic() - start >= 0.04
+
+    async def test_pause_blocks_tokens(self) -> None:
+        """pause() holds back tokens for the given time."""
+        bucket = TokenBucket(rate=1000, burst=10)
+        bucket.pause(0.05)
+        start = time.monotonic()
+        await bucket.acquire()
+        assert time.monotonic() - start >= 0.04
+
+
+class TestSlackDispatcher:
+    """Tests for the SlackDispatcher class."""
+
+    async def test_forwards_call(self, mock_slack_client: AsyncMock) -> None:
+        """Calls reach the client with thread_ts only for chat_postMessage."""
+        dispatcher = SlackDispatcher(mock_slack_client)
+        result = await dispatcher.chat_postMessage(channel="C1", thread_ts="1.0", text="hi")
+        await dispatcher.chat_update(channel="C1", ts="2.0", thread_ts="1.0", text="edit")
+
+        assert result == {"ts": "1234567890.123456"}
+        mock_slack_client.chat_postMessage.assert_called_once_with(
+            channel="C1", thread_ts="1.0", text="hi"
+        )
+        mock_slack_client.chat_update.assert_called_once_with(channel="C1", ts="2.0", text="edit")
+
+    async def test_post_latency_only_times_post_message(
+        self, mock_slack_client: AsyncMock
+    ) -> None:
+        """SLACK_POST_SECONDS observes chat.postMessage, not edits or deletes."""
+        dispatcher = SlackDispatcher(mock_slack_client)
+        before = SLACK_POST_SECONDS.count
+
+        await dispatcher.chat_update(channel="C1", ts="1.1", text="edit")
+        await dispatcher.chat_delete(channel="C1", ts="1.1")
+        assert SLACK_POST_SECONDS.count == before
+
+        await dispatcher.chat_postMessage(channel="C1", text="hi")
+        assert SLACK_POST_SECONDS.count == before + 1
+
+    async def test_retries_after_429(self, mock_slack_client: AsyncMock) -> None:
+        """A rate-limited call is retried after Retry-After."""
+        mock_slack_client.chat_postMessage.side_effect = [_rate_limited("0"), {"ts": "1.1"}]
+        dispatcher = SlackDispatcher(mock_slack_client, rate=1000)
+
+        result = await dispatcher.chat_postMessage(channel="C1", text="hi")
+        assert result == {"ts": "1.1"}
+        assert mock_slack_client.chat_postMessage.call_count == 2
+        assert dispatcher.rate_limited == 1
+
+    async def test_honors_retry_after(self, mock_slack_client: AsyncMock) -> None:
+        """The channel is paused for the Retry-After period."""
+        mock_slack_client.chat_postMessage.side_effect = [_rate_limited("7"), {"ts": "1.1"}]
+        dispatcher = SlackDispatcher(mock_slack_client)
+
+        with patch.object(TokenBucket, "pause") as pause:
+            await dispatcher.chat_postMessage(channel="C1", text="hi")
+        pause.assert_called_once_with(7.0)
+
+    async def test_gives_up_after_max_retries(self, mock_slack_client: AsyncMock) -> None:
+        """Persistent 429s surface as SlackApiError."""
+        mock_slack_client.chat_postMessage.side_effect = _rate_limited("0")
+        dispatcher = SlackDispatcher(mock_slack_client, rate=1000, max_retries=2)
+
+        with pytest.raises(SlackApiError):
+            await dispatcher.chat_postMessage(channel="C1", text="hi")
+        assert mock_slack_client.chat_postMessage.call_count == 3
+
+    async def test_other_errors_not_retried(self, mock_slack_client: AsyncMock) -> None:
+        """Errors other than 429 are raised immediately."""
+        response = MagicMock(status_code=200, headers={})
+        mock_slack_client.chat_postMessage.side_effect = SlackApiError(
+            "channel_not_found", response
+        )
+        dispatcher = SlackDispatcher(mock_slack_client)
+
+        with pytest.raises(SlackApiError):
+            await dispatcher.chat_postMessage(channel="C1", text="hi")
+        mock_slack_client.chat_postMessage.assert_called_once()
+
+    async def test_thread_order_preserved(self, mock_slack_client: AsyncMock) -> None:
+        """Calls for one thread are delivered in submission order."""
+        sent: list[str] = []
+
+        async def post(**kwargs) -> dict:
+            # Earlier calls take longer, so only the ordering keeps them in sequence
+            await asyncio.sleep(0.01 * (3 - len(sent)))
+            sent.append(kwargs["text"])
+            return {"ts": "1.1"}
+
+        mock_slack_client.chat_postMessage.side_effect = post
+        dispatcher = SlackDispatcher(mock_slack_client, burst=10)
+        await asyncio.gather(
+            *(dispatcher.chat_postMessage(channel="C1", thread_ts="1.0", text=t) for t in "abc")
+        )
+        assert sent == ["a", "b", "c"]
+
+    async def test_backlog_bounded(self, mock_slack_client: AsyncMock) -> None:
+        """Calls beyond max_backlog are rejected immediately."""
+        release = asyncio.Event()
+
+        async def post(**kwargs) -> dict:
+            await release.wait()
+            return {"ts": "1.1"}
+
+        mock_slack_client.chat_postMessage.side_effect = post
+        dispatcher = SlackDispatcher(mock_slack_client, max_backlog=1)
+        first = asyncio.create_task(dispatcher.chat_postMessage(channel="C1", text="a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(SlackBacklogFullError):
+            await dispatcher.chat_postMessage(channel="C1", text="b")
+        release.set()
+        await first
+        assert dispatcher.backlog == 0
+
+
+class TestPostText:
+    """Tests for SlackDispatcher.post_text and snippet uploads."""
+
+    async def test_short_text_posted_as_messages(self, mock_slack_client: AsyncMock) -> None:
+        """Text under the threshold is split into thread messages."""
+        dispatcher = SlackDispatcher(mock_slack_client, burst=10)
+        await dispatcher.post_text("C1", "1.0", "a" * 25, snippet_threshold=100, limit=10)
+
+        assert mock_slack_client.chat_postMessage.call_count == 3
+        mock_slack_client.files_upload_v2.assert_not_called()
+
+    async def test_long_text_uploaded_as_snippet(self, mock_slack_client: AsyncMock) -> None:
+        """Text over the threshold becomes one snippet plus one head message."""
+        dispatcher = SlackDispatcher(mock_slack_client)
+        text = "line\n" * 20_000
+        await dispatcher.post_text("C1", "1.0", text, snippet_threshold=12_000)
+
+        mock_slack_client.files_upload_v2.assert_called_once()
+        upload = mock_slack_client.files_upload_v2.call_args[1]
+        assert upload["content"] == text
+        assert upload["thread_ts"] == "1.0"
+        mock_slack_client.chat_postMessage.assert_called_once()
+        head = mock_slack_client.chat_postMessage.call_args[1]["text"]
+        assert head.endswith(SNIPPET_NOTICE)
+        assert len(head) <= SLACK_MSG_LIMIT
+
+    async def test_upload_failure_falls_back_to_messages(
+        self, mock_slack_client: AsyncMock
+    ) -> None:
+        """A rejected upload (e.g. missing files:write) is posted as messages instead."""
+        response = MagicMock(status_code=200, headers={})
+        mock_slack_client.files_upload_v2.side_effect = SlackApiError("missing_scope", response)
+        dispatcher = SlackDispatcher(mock_slack_client, burst=10)
+        await dispatcher.post_text("C1", "1.0", "a" * 25, snippet_threshold=20, limit=10)
+
+        assert mock_slack_client.chat_postMessage.call_count == 3
+
+    async def test_threshold_zero_disables_snippets(self, mock_slack_client: AsyncMock) -> None:
+        """With no threshold every response is posted as messages."""
+        dispatcher = SlackDispatcher(mock_slack_client, rate=1000, burst=1000)
+        await dispatcher.post_text("C1", "1.0", "a" * 50, snippet_threshold=0, limit=10)
+
+        mock_slack_client.files_upload_v2.assert_not_called()
+        assert mock_slack_client.chat_postMessage.call_count == 5
@@ -1,13 +1,21 @@
 """Tests for the Slack event handlers module."""
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+from collections.abc import AsyncIterator
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from slack_sdk.errors import SlackApiError
 
-from bender.claude_code import ClaudeCodeError, ClaudeResponse
+from bender.claude_code import ClaudeCodeError, ClaudeEvent, ClaudeResponse, ResultEvent, TextDelta
 from bender.config import Settings
+from bender.event_dedup import EventDeduplicator
+from bender.scheduler import InvocationScheduler, SchedulerFullError
 from bender.session_manager import SessionManager
+from bender.slack_dispatcher import SlackDispatcher
 from bender.slack_handler import _strip_mention, register_handlers
+from bender.slack_progress import PLACEHOLDER_TEXT
+from bender.slack_utils import TRUNCATED_NOTICE
 
 
 class TestStripMention:
@@ -42,29 +50,73 @@ class TestStripMention:
         assert _strip_mention("<@W12345ABC> hello") == "hello"
 
 
-class TestHandleMention:
-    """Tests for the app_mention event handler."""
+def _fake_stream(*events: ClaudeEvent, error: Exception | None = None, gate=None):
+    """Build a scheduler.stream replacement that yields events, then raises error."""
+    calls: list[dict] = []
 
-    @pytest.fixture
-    def setup_handler(self, settings: Settings, session_manager: SessionManager):
-        """Set up a mock bolt app and register handlers."""
-        mock_app = AsyncMock()
-        handlers = {}
+    async def stream(**kwargs) -> AsyncIterator[ClaudeEvent]:
+        calls.append(kwargs)
+        if gate is not None:
+            await gate.wait()
+        for event in events:
+            yield event
+        if error is not None:
+            raise error
 
-        def capture_event(event_type):
-            def decorator(func):
-                handlers[event_type] = func
-                return func
-            return decorator
+    stream.calls = calls
+    return stream
 
-        mock_app.event = capture_event
-        register_handlers(mock_app, settings, session_manager)
-        return handlers
+
+def _result(text: str, session_id: str = "s1", **kwargs) -> ResultEvent:
+    return ResultEvent(ClaudeResponse(result=text, session_id=session_id, **kwargs))
+
+
+def _slack_error(status: int = 500) -> SlackApiError:
+    return SlackApiError("internal_error", MagicMock(status_code=status))
+
+
+def _final_text(client: AsyncMock) -> str:
+    """Text of the last edit made to the placeholder."""
+    return client.chat_update.call_args[1]["text"]
+
+
+@pytest.fixture
+def setup_handler(
+    settings: Settings,
+    session_manager: SessionManager,
+    scheduler: InvocationScheduler,
+    mock_slack_client: AsyncMock,
+):
+    """Set up a mock bolt app and register handlers."""
+    mock_app = AsyncMock()
+    mock_app.client = mock_slack_client
+    handlers = {}
+
+    def capture_event(event_type):
+        def decorator(func):
+            handlers[event_type] = func
+            return func
+        return decorator
+
+    mock_app.event = capture_event
+    # Unthrottled so tests never wait on the per-channel token bucket
+    dispatcher = SlackDispatcher(mock_slack_client, rate=1000, burst=1000)
+    register_handlers(mock_app, settings, session_manager, scheduler, dispatcher=dispatcher)
+    return handlers
+
+
+class TestHandleMention:
+    """Tests for the app_mention event handler."""
 
     async def test_mention_creates_session_and_invokes(
-        self, setup_handler, session_manager: SessionManager, mock_say: AsyncMock
+        self,
+        setup_handler,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
     ) -> None:
-        """New mention creates session and invokes Claude Code."""
+        """New mention creates session, posts a placeholder and fills it in."""
         handler = setup_handler["app_mention"]
         event = {
             "text": "<@U12345> check the logs",
@@ -72,54 +124,360 @@ class TestHandleMention:
             "channel": "C123",
         }
 
-        mock_response = ClaudeResponse(result="Logs look fine", session_id="s1")
-        with patch("bender.slack_handler.invoke_claude", new_callable=AsyncMock, return_value=mock_response):
+        with patch.object(scheduler, "stream", _fake_stream(_result("Logs look fine"))):
             await handler(event=event, say=mock_say)
 
         # Session should be created
         session_id = await session_manager.get_session("1234567890.000001")
         assert session_id is not None
 
-        # Response should be posted
-        mock_say.assert_called_once_with(text="Logs look fine", thread_ts="1234567890.000001")
+        # Placeholder posted in the thread, then edited with the response
+        mock_slack_client.chat_postMessage.assert_called_once_with(
+            channel="C123", thread_ts="1234567890.000001", text=PLACEHOLDER_TEXT
+        )
+        mock_slack_client.chat_update.assert_called_once_with(
+            channel="C123", ts="1234567890.123456", text="Logs look fine"
+        )
+
+    async def test_streamed_text_updates_placeholder(
+        self,
+        setup_handler,
+        settings: Settings,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Text streamed before the result is shown in the placeholder."""
+        settings.bender_stream_update_interval = 0
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> go", "ts": "1234567890.000001", "channel": "C123"}
+
+        async def stream(**kwargs):
+            yield TextDelta("Looking...")
+            # Updates are rendered in the background while the CLI keeps running
+            await asyncio.sleep(0.01)
+            yield _result("All done")
+
+        with patch.object(scheduler, "stream", stream):
+            await handler(event=event, say=mock_say)
+
+        texts = [call[1]["text"] for call in mock_slack_client.chat_update.call_args_list]
+        assert texts == ["Looking...", "All done"]
+
+    async def test_redelivered_mention_ignored(
+        self,
+        setup_handler,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """A retried event with the same event_id starts only one run."""
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> deploy", "ts": "1234567890.000001", "channel": "C123"}
+
+        stream = _fake_stream(_result("Deployed"))
+        with patch.object(scheduler, "stream", stream):
+            await handler(event=event, say=mock_say, body={"event_id": "Ev1"})
+            await handler(event=event, say=mock_say, body={"event_id": "Ev1", "retry_num": 1})
+
+        assert len(stream.calls) == 1
+        mock_slack_client.chat_postMessage.assert_called_once()
+
+    async def test_mention_records_reported_session_id(
+        self,
+        setup_handler,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+    ) -> None:
+        """The session ID reported by the CLI replaces the generated one."""
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> hi", "ts": "1234567890.000001", "channel": "C123"}
+
+        with patch.object(
+            scheduler, "stream", _fake_stream(_result("hello", session_id="worker-session"))
+        ):
+            await handler(event=event, say=mock_say)
+
+        assert await session_manager.get_session("1234567890.000001") == "worker-session"
+
+    async def test_mention_truncated_response_flagged(
+        self,
+        setup_handler,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """A truncated response is posted with a truncation notice."""
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> cat the log", "ts": "1234567890.000001", "channel": "C123"}
+
+        with patch.object(scheduler, "stream", _fake_stream(_result("head", truncated=True))):
+            await handler(event=event, say=mock_say)
+
+        assert _final_text(mock_slack_client) == "head" + TRUNCATED_NOTICE
 
     async def test_mention_empty_text_responds_help(
-        self, setup_handler, mock_say: AsyncMock
+        self, setup_handler, mock_say: AsyncMock, mock_slack_client: AsyncMock
     ) -> None:
         """Empty mention text gets a help response."""
         handler = setup_handler["app_mention"]
         event = {"text": "<@U12345>", "ts": "1234567890.000001", "channel": "C123"}
 
         await handler(event=event, say=mock_say)
-        mock_say.assert_called_once_with(text="How can I help?", thread_ts="1234567890.000001")
+        mock_slack_client.chat_postMessage.assert_called_once_with(
+            channel="C123", thread_ts="1234567890.000001", text="How can I help?"
+        )
 
     async def test_mention_claude_error_posts_error(
-        self, setup_handler, mock_say: AsyncMock
+        self,
+        setup_handler,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Replaces the placeholder with an error when Claude Code fails."""
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> do something", "ts": "1234567890.000001", "channel": "C123"}
+
+        with patch.object(
+            scheduler, "stream", _fake_stream(error=ClaudeCodeError("CLI crashed"))
+        ):
+            await handler(event=event, say=mock_say)
+
+        text = _final_text(mock_slack_client)
+        assert "Sorry, something went wrong" in text
+        assert "CLI crashed" in text
+
+    async def test_mention_error_keeps_streamed_text(
+        self,
+        setup_handler,
+        settings: Settings,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Output streamed before a failure stays above the error message."""
+        settings.bender_stream_update_interval = 0
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> do something", "ts": "1234567890.000001", "channel": "C123"}
+
+        stream = _fake_stream(TextDelta("partial"), error=ClaudeCodeError("timed out"))
+        with patch.object(scheduler, "stream", stream):
+            await handler(event=event, say=mock_say)
+
+        text = _final_text(mock_slack_client)
+        assert text.startswith("partial")
+        assert "timed out" in text
+
+    async def test_mention_queue_full_posts_error(
+        self,
+        setup_handler,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Posts an error instead of spawning when the scheduler rejects work."""
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> do something", "ts": "1234567890.000001", "channel": "C123"}
+
+        error = SchedulerFullError("Invocation queue is full (32 waiting)")
+        with patch.object(scheduler, "stream", _fake_stream(error=error)):
+            await handler(event=event, say=mock_say)
+
+        assert "queue is full" in _final_text(mock_slack_client)
+
+    async def test_mention_rejected_before_placeholder_when_full(
+        self,
+        setup_handler,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
     ) -> None:
-        """Posts error message when Claude Code invocation fails."""
+        """A full scheduler gets a busy reply, without a placeholder or a run."""
         handler = setup_handler["app_mention"]
         event = {"text": "<@U12345> do something", "ts": "1234567890.000001", "channel": "C123"}
 
-        with patch(
-            "bender.slack_handler.invoke_claude",
-            new_callable=AsyncMock,
-            side_effect=ClaudeCodeError("CLI crashed"),
+        stream = _fake_stream(_result("never"))
+        error = SchedulerFullError("Invocation queue is full (32 waiting)", retry_after=45)
+        with (
+            patch.object(scheduler, "admit", side_effect=error),
+            patch.object(scheduler, "stream", stream),
         ):
             await handler(event=event, say=mock_say)
 
-        mock_say.assert_called_once()
-        call_kwargs = mock_say.call_args[1]
-        assert "Sorry, something went wrong" in call_kwargs["text"]
-        assert "CLI crashed" in call_kwargs["text"]
+        mock_slack_client.chat_postMessage.assert_called_once()
+        text = mock_slack_client.chat_postMessage.call_args[1]["text"]
+        assert "busy" in text and "45s" in text
+        assert stream.calls == []
+
+    async def test_mention_placeholder_failure_still_replies(
+        self,
+        setup_handler,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """A placeholder Slack rejects is skipped; the answer is posted fresh."""
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> check the logs", "ts": "1234567890.000001", "channel": "C123"}
+        mock_slack_client.chat_postMessage.side_effect = [_slack_error(), {"ts": "2.0"}]
+
+        with patch.object(scheduler, "stream", _fake_stream(_result("Logs look fine"))):
+            await handler(event=event, say=mock_say)
+
+        assert mock_slack_client.chat_postMessage.call_args[1]["text"] == "Logs look fine"
+
+    async def test_mention_shows_queue_position(
+        self,
+        setup_handler,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """A turn waiting for a slot shows its queue position in the placeholder."""
+        handler = setup_handler["app_mention"]
+        event = {"text": "<@U12345> do something", "ts": "1234567890.000001", "channel": "C123"}
+
+        async def stream(on_queued, **kwargs) -> AsyncIterator[ClaudeEvent]:
+            await on_queued(3)
+            yield _result("done")
+
+        with patch.object(scheduler, "stream", stream):
+            await handler(event=event, say=mock_say)
+
+        texts = [c[1]["text"] for c in mock_slack_client.chat_update.call_args_list]
+        assert texts == ["_Busy, queued at position 3..._", "done"]
 
 
 class TestHandleMessage:
     """Tests for the message event handler (thread replies)."""
 
-    @pytest.fixture
-    def setup_handler(self, settings: Settings, session_manager: SessionManager):
-        """Set up a mock bolt app and register handlers."""
+    async def test_thread_reply_resumes_session(
+        self,
+        setup_handler,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """Thread reply resumes existing Claude Code session."""
+        handler = setup_handler["message"]
+        thread_ts = "1234567890.000001"
+        await session_manager.create_session(thread_ts)
+
+        event = {
+            "text": "yes, go ahead",
+            "thread_ts": thread_ts,
+            "channel": "C123",
+        }
+
+        stream = _fake_stream(_result("Done!"))
+        with patch.object(scheduler, "stream", stream):
+            await handler(event=event, say=mock_say)
+
+        # Should invoke with resume=True
+        assert len(stream.calls) == 1
+        assert stream.calls[0]["resume"] is True
+        assert _final_text(mock_slack_client) == "Done!"
+
+    async def test_concurrent_replies_coalesced(
+        self,
+        setup_handler,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+    ) -> None:
+        """Replies sent while a turn runs are merged into one follow-up run."""
+        handler = setup_handler["message"]
+        thread_ts = "1234567890.000001"
+        await session_manager.create_session(thread_ts)
+        release = asyncio.Event()
+
+        def reply(text: str) -> dict:
+            return {"text": text, "thread_ts": thread_ts, "channel": "C123"}
+
+        stream = _fake_stream(_result("ok"), gate=release)
+        with patch.object(scheduler, "stream", stream):
+            first = asyncio.create_task(handler(event=reply("one"), say=mock_say))
+            await asyncio.sleep(0.01)
+            await handler(event=reply("two"), say=mock_say)
+            await handler(event=reply("three"), say=mock_say)
+            release.set()
+            await first
+
+        prompts = [call["prompt"] for call in stream.calls]
+        assert prompts == ["one", "two\n\nthree"]
+        assert all(call["resume"] is True for call in stream.calls)
+
+    async def test_slack_failure_keeps_coalesced_replies(
+        self,
+        setup_handler,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
+    ) -> None:
+        """A reply Slack rejects is logged; queued replies still get their turn."""
+        handler = setup_handler["message"]
+        thread_ts = "1234567890.000001"
+        await session_manager.create_session(thread_ts)
+        mock_slack_client.chat_update.side_effect = _slack_error()
+        release = asyncio.Event()
+
+        def reply(text: str) -> dict:
+            return {"text": text, "thread_ts": thread_ts, "channel": "C123"}
+
+        stream = _fake_stream(_result("ok"), gate=release)
+        with patch.object(scheduler, "stream", stream):
+            first = asyncio.create_task(handler(event=reply("one"), say=mock_say))
+            await asyncio.sleep(0.01)
+            await handler(event=reply("two"), say=mock_say)
+            release.set()
+            await first
+
+        assert [call["prompt"] for call in stream.calls] == ["one", "two"]
+        assert mock_slack_client.chat_update.call_count == 2
+
+    async def test_redelivered_reply_ignored(
+        self,
+        setup_handler,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+    ) -> None:
+        """Without an event_id, a reply is deduplicated by channel and ts."""
+        handler = setup_handler["message"]
+        thread_ts = "1234567890.000001"
+        await session_manager.create_session(thread_ts)
+        event = {
+            "type": "message",
+            "text": "go",
+            "thread_ts": thread_ts,
+            "ts": "1234567890.000002",
+            "channel": "C123",
+        }
+
+        stream = _fake_stream(_result("ok"))
+        with patch.object(scheduler, "stream", stream):
+            await handler(event=event, say=mock_say)
+            await handler(event=dict(event), say=mock_say)
+
+        assert len(stream.calls) == 1
+
+    async def test_empty_configured_deduplicator_is_used(
+        self,
+        settings: Settings,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_slack_client: AsyncMock,
+        mock_say: AsyncMock,
+    ) -> None:
+        """A deduplicator passed in is used even while it has seen no events."""
+        dedup = EventDeduplicator(ttl=60)
+        assert len(dedup) == 0
         mock_app = AsyncMock()
+        mock_app.client = mock_slack_client
         handlers = {}
 
         def capture_event(event_type):
@@ -129,35 +487,21 @@ class TestHandleMessage:
             return decorator
 
         mock_app.event = capture_event
-        register_handlers(mock_app, settings, session_manager)
-        return handlers
-
-    async def test_thread_reply_resumes_session(
-        self, setup_handler, session_manager: SessionManager, mock_say: AsyncMock
-    ) -> None:
-        """Thread reply resumes existing Claude Code session."""
-        handler = setup_handler["message"]
+        register_handlers(mock_app, settings, session_manager, scheduler, dedup=dedup)
         thread_ts = "1234567890.000001"
         await session_manager.create_session(thread_ts)
-
         event = {
-            "text": "yes, go ahead",
+            "type": "message",
+            "text": "go",
             "thread_ts": thread_ts,
+            "ts": "1234567890.000002",
             "channel": "C123",
         }
 
-        mock_response = ClaudeResponse(result="Done!", session_id="s1")
-        with patch(
-            "bender.slack_handler.invoke_claude",
-            new_callable=AsyncMock,
-            return_value=mock_response,
-        ) as mock_invoke:
-            await handler(event=event, say=mock_say)
+        with patch.object(scheduler, "stream", _fake_stream(_result("ok"))):
+            await handlers["message"](event=event, say=mock_say)
 
-        # Should invoke with resume=True
-        mock_invoke.assert_called_once()
-        assert mock_invoke.call_args[1]["resume"] is True
-        mock_say.assert_called_once_with(text="Done!", thread_ts=thread_ts)
+        assert len(dedup) == 1
 
     async def test_thread_reply_ignores_bot_messages(
         self, setup_handler, session_manager: SessionManager, mock_say: AsyncMock
@@ -233,7 +577,12 @@ class TestHandleMessage:
         mock_say.assert_not_called()
 
     async def test_thread_reply_claude_error(
-        self, setup_handler, session_manager: SessionManager, mock_say: AsyncMock
+        self,
+        setup_handler,
+        session_manager: SessionManager,
+        scheduler: InvocationScheduler,
+        mock_say: AsyncMock,
+        mock_slack_client: AsyncMock,
     ) -> None:
         """Posts error message on Claude Code failure in thread replies."""
         handler = setup_handler["message"]
@@ -246,12 +595,7 @@ class TestHandleMessage:
             "channel": "C123",
         }
 
-        with patch(
-            "bender.slack_handler.invoke_claude",
-            new_callable=AsyncMock,
-            side_effect=ClaudeCodeError("timeout"),
-        ):
+        with patch.object(scheduler, "stream", _fake_stream(error=ClaudeCodeError("timeout"))):
             await handler(event=event, say=mock_say)
 
-        mock_say.assert_called_once()
-        assert "Sorry, something went wrong" in mock_say.call_args[1]["text"]
+        assert "Sorry, something went wrong" in _final_text(mock_slack_client)
@@ -0,0 +1,164 @@
+"""Tests for the progressive Slack reply module."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from bender.slack_progress import PLACEHOLDER_TEXT, ProgressiveReply
+from bender.slack_utils import SNIPPET_NOTICE
+
+
+@pytest.fixture
+def client() -> AsyncMock:
+    """Slack client whose posts return increasing message timestamps."""
+    client = AsyncMock()
+    client.chat_postMessage = AsyncMock(
+        side_effect=[{"ts": f"1.{i}"} for i in range(1, 10)]
+    )
+    return client
+
+
+def _updates(client: AsyncMock) -> list[tuple[str, str]]:
+    return [(c[1]["ts"], c[1]["text"]) for c in client.chat_update.call_args_list]
+
+
+async def _rendered() -> None:
+    """Let background renders of streamed text reach the client."""
+    await asyncio.sleep(0.01)
+
+
+class TestProgressiveReply:
+    """Tests for the ProgressiveReply class."""
+
+    async def test_start_posts_placeholder(self, client: AsyncMock) -> None:
+        """start() posts the placeholder in the thread."""
+        reply = ProgressiveReply(client, "C1", "1.0")
+        await reply.start()
+        client.chat_postMessage.assert_called_once_with(
+            channel="C1", thread_ts="1.0", text=PLACEHOLDER_TEXT
+        )
+
+    async def test_status_replaces_placeholder_until_output(self, client: AsyncMock) -> None:
+        """status() edits the placeholder, but not once text has streamed."""
+        reply = ProgressiveReply(client, "C1", "1.0", interval=0)
+        await reply.start()
+        await reply.status("queued")
+        await reply.append("output")
+        await _rendered()
+        await reply.status("ignored")
+        assert _updates(client) == [("1.1", "queued"), ("1.1", "output")]
+
+    async def test_append_throttled(self, client: AsyncMock) -> None:
+        """Streamed text within the interval is buffered, not sent."""
+        reply = ProgressiveReply(client, "C1", "1.0", interval=60)
+        await reply.start()
+        await reply.append("one")
+        await reply.append("two")
+        client.chat_update.assert_not_called()
+        assert reply.text == "one\n\ntwo"
+        await reply.finish("done")
+        assert _updates(client) == [("1.1", "done")]
+
+    async def test_throttled_text_rendered_when_interval_ends(self, client: AsyncMock) -> None:
+        """Text held back by the throttle appears once the interval is up."""
+        reply = ProgressiveReply(client, "C1", "1.0", interval=0.05)
+        await reply.start()
+        await reply.append("first")
+        await reply.append("Let me check the logs")
+        client.chat_update.assert_not_called()
+
+        await asyncio.sleep(0.1)
+
+        assert _updates(client) == [("1.1", "first\n\nLet me check the logs")]
+
+    async def test_fail_cancels_deferred_render(self, client: AsyncMock) -> None:
+        """A pending deferred render never overwrites the final text."""
+        reply = ProgressiveReply(client, "C1", "1.0", interval=0.05)
+        await reply.start()
+        await reply.append("partial")
+        await reply.fail("boom")
+
+        await asyncio.sleep(0.1)
+
+        assert _updates(client) == [("1.1", "partial\n\nboom")]
+
+    async def test_append_updates_after_interval(self, client: AsyncMock) -> None:
+        """With no throttle every append edits the placeholder."""
+        reply = ProgressiveReply(client, "C1", "1.0", interval=0)
+        await reply.start()
+        await reply.append("one")
+        await _rendered()
+        await reply.append("two")
+        await _rendered()
+        assert _updates(client) == [("1.1", "one"), ("1.1", "one\n\ntwo")]
+
+    async def test_append_never_waits_on_slack(self, client: AsyncMock) -> None:
+        """While an update is stuck in Slack, appends return and text keeps buffering."""
+        release = asyncio.Event()
+
+        async def slow_update(**kwargs) -> dict:
+            await release.wait()
+            return {}
+
+        client.chat_update = AsyncMock(side_effect=slow_update)
+        reply = ProgressiveReply(client, "C1", "1.0", interval=0)
+        await reply.start()
+        await reply.append("one")
+        await _rendered()
+        assert client.chat_update.call_count == 1
+
+        await asyncio.wait_for(reply.append("two"), 0.1)
+        await asyncio.wait_for(reply.append("three"), 0.1)
+        release.set()
+        await _rendered()
+
+        assert _updates(client) == [("1.1", "one"), ("1.1", "one\n\ntwo\n\nthree")]
+
+    async def test_rolls_over_past_limit(self, client: AsyncMock) -> None:
+        """Text beyond the limit continues in a new message."""
+        reply = ProgressiveReply(client, "C1", "1.0", interval=0, limit=10)
+        await reply.start()
+        await reply.append("aaaaaaaa\nbbbbbbbb")
+        await _rendered()
+        assert _updates(client) == [("1.1", "aaaaaaaa")]
+        assert client.chat_postMessage.call_args[1]["text"] == "bbbbbbbb"
+
+    async def test_finish_skips_unchanged_and_deletes_extra(self, client: AsyncMock) -> None:
+        """finish() only edits changed messages and removes unused ones."""
+        reply = ProgressiveReply(client, "C1", "1.0", interval=0, limit=10)
+        await reply.start()
+        await reply.append("aaaaaaaa\nbbbbbbbb")
+        await _rendered()
+        client.chat_update.reset_mock()
+
+        await reply.finish("aaaaaaaa")
+        client.chat_update.assert_not_called()
+        client.chat_delete.assert_called_once_with(channel="C1", ts="1.2", thread_ts="1.0")
+
+    async def test_fail_keeps_streamed_text(self, client: AsyncMock) -> None:
+        """fail() appends the error below anything already streamed."""
+        reply = ProgressiveReply(client, "C1", "1.0", interval=60)
+        await reply.start()
+        await reply.append("partial")
+        await reply.fail("boom")
+        assert _updates(client) == [("1.1", "partial\n\nboom")]
+
+    async def test_long_finish_uploads_snippet(self, client: AsyncMock) -> None:
+        """A final response over the threshold leaves only a head in the thread."""
+        client.upload_snippet = AsyncMock(return_value=True)
+        reply = ProgressiveReply(client, "C1", "1.0", interval=60, snippet_threshold=50)
+        await reply.start()
+        await reply.finish("word " * 100)
+
+        client.upload_snippet.assert_called_once_with("C1", "1.0", "word " * 100)
+        assert _updates(client)[-1][1].endswith(SNIPPET_NOTICE)
+
+    async def test_failed_snippet_posts_full_text(self, client: AsyncMock) -> None:
+        """If the upload is rejected the full text is posted as messages."""
+        client.upload_snippet = AsyncMock(return_value=False)
+        reply = ProgressiveReply(client, "C1", "1.0", interval=60, limit=100, snippet_threshold=50)
+        await reply.start()
+        await reply.finish("word " * 100)
+
+        assert client.chat_postMessage.call_count > 1
@@ -1,6 +1,6 @@
 """Tests for the Slack utilities module."""
 
-from bender.slack_utils import SLACK_MSG_LIMIT, split_text
+from bender.slack_utils import SLACK_MSG_LIMIT, iter_chunks, split_text
 
 
 class TestSlackMsgLimit:
@@ -63,3 +63,57 @@ class TestSplitText:
         result = split_text(text, 6)
         assert result[0] == "abcde"
         assert result[1] == "fghij"
+
+    def test_split_at_space_before_hard_cut(self) -> None:
+        """Falls back to a space when no newline fits."""
+        result = split_text("alpha beta gamma", 12)
+        assert result == ["alpha beta", "gamma"]
+
+    def test_chunks_within_limit(self) -> None:
+        """No chunk exceeds the limit, and no text is lost."""
+        text = "\n".join(f"line {i} " + "x" * (i % 37) for i in range(500))
+        result = split_text(text, 100)
+        assert all(len(chunk) <= 100 for chunk in result)
+        assert "".join(result).replace("\n", "") == text.replace("\n", "")
+
+
+class TestCodeFences:
+    """Tests for code-fence handling across chunk boundaries."""
+
+    def test_fence_closed_and_reopened(self) -> None:
+        """A code block split across chunks is closed and reopened."""
+        code = "\n".join(f"print({i})" for i in range(20))
+        text = f"Here:\n```python\n{code}\n```\nDone."
+        result = split_text(text, 80)
+
+        assert len(result) > 1
+        for chunk in result:
+            assert chunk.count("```") % 2 == 0
+            assert len(chunk) <= 80
+        assert result[1].startswith("```python\n")
+
+    def test_text_after_fence_not_reopened(self) -> None:
+        """Chunks after a closed code block are plain text."""
+        text = "```\ncode\n```\n" + "word " * 40
+        result = split_text(text, 60)
+        assert result[0].startswith("```\ncode\n```")
+        assert not any(chunk.startswith("```") for chunk in result[1:])
+
+    def test_no_fences_untouched(self) -> None:
+        """Text without code blocks gets no fence markers."""
+        result = split_text("a" * 25, 10)
+        assert result == ["a" * 10, "a" * 10, "a" * 5]
+
+
+class TestIterChunks:
+    """Tests for the iter_chunks generator."""
+
+    def test_is_lazy(self) -> None:
+        """Chunks are produced on demand."""
+        chunks = iter_chunks("a" * 1_000_000, 10)
+        assert next(chunks) == "a" * 10
+
+    def test_matches_split_text(self) -> None:
+        """split_text is the materialized form of iter_chunks."""
+        text = "one two\nthree four five\n\nsix"
+        assert list(iter_chunks(text, 9)) == split_text(text, 9)
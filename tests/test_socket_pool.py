@@ -0,0 +1,59 @@
+"""Tests for the Socket Mode connection pool module."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from bender.socket_pool import SocketModePool
+
+
+def _handler(connected: bool = True) -> MagicMock:
+    """Socket Mode handler stand-in with a controllable connection state."""
+    handler = MagicMock()
+    handler.client.socket_mode_request_listeners = []
+    handler.client.is_connected = AsyncMock(return_value=connected)
+    handler.start_async = AsyncMock()
+    handler.close_async = AsyncMock()
+    return handler
+
+
+@pytest.fixture
+def handlers() -> list[MagicMock]:
+    """Three connections, the second one down."""
+    return [_handler(), _handler(connected=False), _handler()]
+
+
+class TestSocketModePool:
+    """Tests for the SocketModePool class."""
+
+    async def test_status_reports_each_connection(self, handlers: list[MagicMock]) -> None:
+        """status() lists every connection with its state."""
+        pool = SocketModePool(handlers)
+        status = await pool.status()
+
+        assert len(pool) == 3
+        assert [s["index"] for s in status] == [0, 1, 2]
+        assert [s["connected"] for s in status] == [True, False, True]
+        assert all(s["events"] == 0 and s["last_event_at"] is None for s in status)
+
+    async def test_counts_events_per_connection(self, handlers: list[MagicMock]) -> None:
+        """Requests arriving on a connection are counted against it."""
+        pool = SocketModePool(handlers)
+        listener = handlers[2].client.socket_mode_request_listeners[0]
+        await listener(handlers[2].client, MagicMock())
+        await listener(handlers[2].client, MagicMock())
+
+        status = await pool.status()
+        assert [s["events"] for s in status] == [0, 0, 2]
+        assert status[2]["last_event_at"] is not None
+
+    async def test_start_and_close_every_connection(self, handlers: list[MagicMock]) -> None:
+        """Starting and closing the pool starts and closes each handler."""
+        pool = SocketModePool(handlers)
+        await asyncio.wait_for(pool.start_async(), 1)
+        await pool.close_async()
+
+        for handler in handlers:
+            handler.start_async.assert_awaited_once()
+            handler.close_async.assert_awaited_once()
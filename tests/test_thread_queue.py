@@ -0,0 +1,122 @@
+"""Tests for the per-thread work queue module."""
+
+import asyncio
+
+import pytest
+
+from bender.thread_queue import ThreadQueue
+
+
+class RecordingTurn:
+    """Turn function that records calls and blocks until released."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, bool]] = []
+        self.release = asyncio.Event()
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, prompt: str, resume: bool) -> None:
+        self.calls.append((prompt, resume))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await self.release.wait()
+        finally:
+            self.running -= 1
+
+
+class TestThreadQueue:
+    """Tests for the ThreadQueue class."""
+
+    async def test_idle_thread_runs_immediately(self) -> None:
+        """A message for an idle thread runs right away."""
+        queue = ThreadQueue()
+        turn = RecordingTurn()
+        turn.release.set()
+
+        ran = await queue.submit("t1", "hello", turn)
+
+        assert ran is True
+        assert turn.calls == [("hello", False)]
+        assert queue.is_busy("t1") is False
+
+    async def test_resume_flag_passed_to_first_turn(self) -> None:
+        """The resume flag is forwarded to the first turn."""
+        queue = ThreadQueue()
+        turn = RecordingTurn()
+        turn.release.set()
+
+        await queue.submit("t1", "hello", turn, resume=True)
+
+        assert turn.calls == [("hello", True)]
+
+    async def test_replies_during_run_are_coalesced(self) -> None:
+        """Replies arriving mid-run are merged into one resumed follow-up."""
+        queue = ThreadQueue()
+        turn = RecordingTurn()
+
+        first = asyncio.create_task(queue.submit("t1", "first", turn))
+        await asyncio.sleep(0)
+        assert queue.is_busy("t1") is True
+
+        assert await queue.submit("t1", "second", turn) is False
+        assert await queue.submit("t1", "third", turn) is False
+
+        turn.release.set()
+        assert await first is True
+
+        assert turn.calls == [("first", False), ("second\n\nthird", True)]
+        assert turn.max_running == 1
+        assert queue.coalesced == 2
+
+    async def test_threads_run_independently(self) -> None:
+        """Different threads are not serialized against each other."""
+        queue = ThreadQueue()
+        turn = RecordingTurn()
+
+        tasks = [
+            asyncio.create_task(queue.submit("t1", "a", turn)),
+            asyncio.create_task(queue.submit("t2", "b", turn)),
+        ]
+        await asyncio.sleep(0)
+        assert turn.running == 2
+
+        turn.release.set()
+        assert await asyncio.gather(*tasks) == [True, True]
+
+    async def test_failure_frees_thread(self) -> None:
+        """An exception in a turn leaves the thread idle again."""
+        queue = ThreadQueue()
+
+        async def failing(prompt: str, resume: bool) -> None:
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await queue.submit("t1", "hello", failing)
+
+        assert queue.is_busy("t1") is False
+
+    async def test_failed_turn_keeps_queued_replies(self) -> None:
+        """Replies queued behind a failing turn still run before the error is raised."""
+        queue = ThreadQueue()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls: list[tuple[str, bool]] = []
+
+        async def turn(prompt: str, resume: bool) -> None:
+            calls.append((prompt, resume))
+            if len(calls) == 1:
+                started.set()
+                await release.wait()
+                raise RuntimeError("boom")
+
+        first = asyncio.create_task(queue.submit("t1", "first", turn))
+        await started.wait()
+        await queue.submit("t1", "second", turn)
+        release.set()
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await first
+        assert calls == [("first", False), ("second", True)]
+        assert queue.is_busy("t1") is False
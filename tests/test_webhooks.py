@@ -0,0 +1,98 @@
+"""Tests for the completion webhooks module."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+
+from bender.webhooks import WebhookSender
+
+
+class TestWebhookSender:
+    """Tests for the WebhookSender class."""
+
+    async def test_delivers_once_on_success(self) -> None:
+        """A 2xx response is delivered on the first attempt."""
+        sender = WebhookSender(backoff=0)
+        with patch.object(sender, "_post", new_callable=AsyncMock, return_value=200) as post:
+            assert await sender.deliver("https://example.test/hook", {"job_id": "j1"})
+        post.assert_called_once_with("https://example.test/hook", {"job_id": "j1"})
+        assert sender.delivered == 1
+
+    async def test_retries_server_errors(self) -> None:
+        """5xx responses and connection errors are retried."""
+        sender = WebhookSender(backoff=0)
+        outcomes = [503, aiohttp.ClientError("reset"), 200]
+        with patch.object(sender, "_post", new_callable=AsyncMock, side_effect=outcomes) as post:
+            assert await sender.deliver("https://example.test/hook", {})
+        assert post.call_count == 3
+
+    async def test_client_errors_not_retried(self) -> None:
+        """4xx responses other than 429 are final."""
+        sender = WebhookSender(backoff=0)
+        with patch.object(sender, "_post", new_callable=AsyncMock, return_value=404) as post:
+            assert not await sender.deliver("https://example.test/hook", {})
+        post.assert_called_once()
+        assert sender.failed == 1
+
+    async def test_gives_up_after_max_retries(self) -> None:
+        """Delivery stops after max_retries additional attempts."""
+        sender = WebhookSender(backoff=0, max_retries=2)
+        with patch.object(sender, "_post", new_callable=AsyncMock, return_value=500) as post:
+            assert not await sender.deliver("https://example.test/hook", {})
+        assert post.call_count == 3
+
+    async def test_backoff_is_exponential(self) -> None:
+        """Retry delays double each attempt."""
+        sender = WebhookSender(backoff=1.0, max_retries=3)
+        with (
+            patch.object(sender, "_post", new_callable=AsyncMock, return_value=500),
+            patch("bender.webhooks.asyncio.sleep", new_callable=AsyncMock) as sleep,
+        ):
+            await sender.deliver("https://example.test/hook", {})
+        assert [call.args[0] for call in sleep.call_args_list] == [1.0, 2.0, 4.0]
+
+    async def test_concurrency_bounded(self) -> None:
+        """No more than ``concurrency`` deliveries run at once."""
+        sender = WebhookSender(concurrency=2)
+        running = peak = 0
+
+        async def slow_post(url: str, payload: dict) -> int:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return 200
+
+        with patch.object(sender, "_post", side_effect=slow_post):
+            for _ in range(6):
+                sender.submit("https://example.test/hook", {})
+            await sender.close()
+        assert peak == 2
+        assert sender.delivered == 6
+
+    async def test_backoff_does_not_hold_a_slot(self) -> None:
+        """A delivery waiting to retry lets others use its slot."""
+        sender = WebhookSender(concurrency=1, backoff=0.2, max_retries=1)
+        outcomes = {"https://example.test/flaky": [503, 200], "https://example.test/ok": [200]}
+
+        async def post(url: str, payload: dict) -> int:
+            return outcomes[url].pop(0)
+
+        with patch.object(sender, "_post", side_effect=post):
+            flaky = asyncio.create_task(sender.deliver("https://example.test/flaky", {}))
+            await asyncio.sleep(0.01)
+            ok = await asyncio.wait_for(sender.deliver("https://example.test/ok", {}), 0.1)
+            assert ok
+            assert await flaky
+
+    async def test_close_abandons_slow_deliveries(self) -> None:
+        """close() gives up on deliveries still pending after close_timeout."""
+        sender = WebhookSender(backoff=60, close_timeout=0.01)
+        with patch.object(sender, "_post", new_callable=AsyncMock, return_value=503):
+            sender.submit("https://example.test/hook", {})
+            await asyncio.sleep(0)
+            await asyncio.wait_for(sender.close(), 1)
+        assert sender.failed == 1
+        assert not sender._tasks
@@ -0,0 +1,226 @@
+"""Tests for the warm worker pool module."""
+
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bender.claude_code import ClaudeCodeError, ClaudeResponse, ResultEvent, TextDelta
+from bender.metrics import PROCESSES_RUNNING
+from bender.worker_pool import WorkerPool
+
+
+class FakeWorkerProcess:
+    """Stand-in for a streaming-input ``claude`` process.
+
+    Answers every user message on stdin with a text event and a result
+    event, unless ``fail`` is set, in which case it exits.
+    """
+
+    def __init__(self, session_id: str, fail: bool = False) -> None:
+        self.session_id = session_id
+        self.fail = fail
+        self.returncode: int | None = None
+        self.prompts: list[str] = []
+        self.stdout = asyncio.StreamReader()
+        self.stderr = asyncio.StreamReader()
+        self.stdin = MagicMock()
+        self.stdin.write = self._write
+        self.stdin.drain = self._noop
+        self.stdin.close = self._exit
+
+    async def _noop(self) -> None:
+        return None
+
+    def _write(self, data: bytes) -> None:
+        message = json.loads(data)
+        prompt = message["message"]["content"]
+        self.prompts.append(prompt)
+        if self.fail:
+            self._exit(1)
+            return
+        lines = [
+            {"type": "assistant", "message": {"content": [{"type": "text", "text": prompt}]}},
+            {"type": "result", "result": f"re: {prompt}", "session_id": self.session_id},
+        ]
+        for line in lines:
+            self.stdout.feed_data(json.dumps(line).encode() + b"\n")
+
+    def _exit(self, code: int = 0) -> None:
+        if self.returncode is None:
+            self.returncode = code
+            self.stdout.feed_eof()
+            self.stderr.feed_eof()
+
+    def kill(self) -> None:
+        self._exit(-9)
+
+    async def wait(self) -> int:
+        return self.returncode
+
+
+class FakeSpawner:
+    """Replacement for asyncio.create_subprocess_exec recording spawned workers."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.processes: list[FakeWorkerProcess] = []
+        self.commands: list[tuple] = []
+
+    async def __call__(self, *cmd, **kwargs) -> FakeWorkerProcess:
+        self.commands.append(cmd)
+        session_id = cmd[cmd.index("--session-id") + 1]
+        process = FakeWorkerProcess(session_id, fail=self.fail)
+        self.processes.append(process)
+        return process
+
+
+async def _collect(pool: WorkerPool, prompt: str, tmp_path: Path, **kwargs) -> list:
+    return [event async for event in pool.stream(prompt, tmp_path, **kwargs)]
+
+
+class TestWorkerPool:
+    """Tests for the WorkerPool class."""
+
+    async def test_start_prespawns_workers(self, tmp_path: Path) -> None:
+        """start() launches size workers in streaming-input mode."""
+        spawner = FakeSpawner()
+        pool = WorkerPool(tmp_path, size=2)
+        with patch("bender.worker_pool.asyncio.create_subprocess_exec", spawner):
+            await pool.start()
+
+        assert len(spawner.processes) == 2
+        cmd = spawner.commands[0]
+        assert cmd[cmd.index("--input-format") + 1] == "stream-json"
+        assert cmd[cmd.index("--output-format") + 1] == "stream-json"
+        assert pool.stats()["idle"] == 2
+        await pool.stop()
+
+    async def test_new_session_served_by_warm_worker(self, tmp_path: Path) -> None:
+        """A new conversation runs on an idle worker and reports its session ID."""
+        spawner = FakeSpawner()
+        pool = WorkerPool(tmp_path, size=1)
+        with patch("bender.worker_pool.asyncio.create_subprocess_exec", spawner):
+            await pool.start()
+            events = await _collect(pool, "hello", tmp_path, session_id="requested")
+            await asyncio.sleep(0)
+
+        worker_session = spawner.processes[0].session_id
+        assert events[0] == TextDelta(text="hello")
+        assert events[1].response.result == "re: hello"
+        assert events[1].response.session_id == worker_session
+        assert pool.warm_hits == 1
+        # The used worker stays attached and a replacement was started
+        assert pool.stats()["attached"] == 1
+        assert len(spawner.processes) == 2
+        await pool.stop()
+
+    async def test_resume_reuses_attached_worker(self, tmp_path: Path) -> None:
+        """Replies for a session go to the worker already holding it."""
+        spawner = FakeSpawner()
+        pool = WorkerPool(tmp_path, size=1)
+        with patch("bender.worker_pool.asyncio.create_subprocess_exec", spawner):
+            await pool.start()
+            await _collect(pool, "first", tmp_path)
+            session_id = spawner.processes[0].session_id
+            await _collect(pool, "second", tmp_path, session_id=session_id, resume=True)
+
+        assert spawner.processes[0].prompts == ["first", "second"]
+        assert pool.warm_hits == 2
+        await pool.stop()
+
+    async def test_idle_and_attached_capped_at_size(self, tmp_path: Path) -> None:
+        """Attached workers take idle slots; the least recently used goes first."""
+        spawner = FakeSpawner()
+        pool = WorkerPool(tmp_path, size=2)
+        with patch("bender.worker_pool.asyncio.create_subprocess_exec", spawner):
+            await pool.start()
+            for prompt in ("a", "b", "c"):
+                await _collect(pool, prompt, tmp_path)
+                await asyncio.gather(*pool._spawning)
+                stats = pool.stats()
+                assert stats["idle"] + stats["attached"] <= 2
+
+            attached = list(pool._attached.values())
+            assert [worker.process.prompts for worker in attached] == [["c"]]
+            alive = [process for process in spawner.processes if process.returncode is None]
+            assert len(alive) == 2
+        await pool.stop()
+
+    async def test_worker_recycled_after_max_requests(self, tmp_path: Path) -> None:
+        """Workers are stopped once they served max_requests turns."""
+        spawner = FakeSpawner()
+        pool = WorkerPool(tmp_path, size=1, max_requests=1)
+        with patch("bender.worker_pool.asyncio.create_subprocess_exec", spawner):
+            await pool.start()
+            await _collect(pool, "only", tmp_path)
+
+        assert spawner.processes[0].returncode is not None
+        assert pool.recycled == 1
+        assert pool.stats()["attached"] == 0
+        await pool.stop()
+
+    async def test_worker_recycled_on_error(self, tmp_path: Path) -> None:
+        """A worker that dies mid-turn raises and is discarded."""
+        spawner = FakeSpawner(fail=True)
+        pool = WorkerPool(tmp_path, size=1)
+        with patch("bender.worker_pool.asyncio.create_subprocess_exec", spawner):
+            await pool.start()
+            with pytest.raises(ClaudeCodeError, match="worker exited"):
+                await _collect(pool, "hello", tmp_path)
+
+        assert pool.recycled == 1
+        assert pool.stats()["attached"] == 0
+        await pool.stop()
+
+    async def test_broken_pipe_raises_claude_code_error(self, tmp_path: Path) -> None:
+        """A worker that died before its turn was written fails like any CLI error."""
+        spawner = FakeSpawner()
+        pool = WorkerPool(tmp_path, size=1)
+        with patch("bender.worker_pool.asyncio.create_subprocess_exec", spawner):
+            await pool.start()
+            spawner.processes[0].stdin.write = MagicMock(side_effect=BrokenPipeError())
+            with pytest.raises(ClaudeCodeError, match="went away"):
+                await _collect(pool, "hello", tmp_path)
+
+        assert pool.recycled == 1
+        await pool.stop()
+
+    async def test_dead_worker_is_closed_on_checkout(self, tmp_path: Path) -> None:
+        """A worker found dead at checkout is reaped, not just dropped."""
+        spawner = FakeSpawner()
+        pool = WorkerPool(tmp_path, size=1)
+
+        async def fake_stream(prompt, workspace, **kwargs):
+            yield ResultEvent(ClaudeResponse(result="cold", session_id="s1"))
+
+        with (
+            patch("bender.worker_pool.asyncio.create_subprocess_exec", spawner),
+            patch("bender.worker_pool.stream_claude", fake_stream),
+        ):
+            await pool.start()
+            running = PROCESSES_RUNNING.value
+            spawner.processes[0].kill()
+            await _collect(pool, "hi", tmp_path)
+            # The dead worker no longer counts; any replacement spawned since does
+            replacements = len(spawner.processes) - 1
+            assert PROCESSES_RUNNING.value == running - 1 + replacements
+
+        assert pool.recycled == 1
+        assert pool.cold_starts == 1
+        await pool.stop()
+
+    async def test_falls_back_to_cold_start(self, tmp_path: Path) -> None:
+        """Resumes of unknown sessions use a regular stream_claude run."""
+        pool = WorkerPool(tmp_path, size=1)
+
+        async def fake_stream(prompt, workspace, **kwargs):
+            yield ResultEvent(ClaudeResponse(result="cold", session_id=kwargs["session_id"]))
+
+        with patch("bender.worker_pool.stream_claude", fake_stream):
+            events = await _collect(pool, "hi", tmp_path, session_id="old", resume=True)
+
+        assert events == [ResultEvent(ClaudeResponse(result="cold", session_id="old"))]
+        assert pool.cold_starts == 1